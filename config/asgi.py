@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Bajo ASGI las lecturas más frecuentes las atienden las vistas de cursosapi.asincrono
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'config.urls_asgi')
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,15 +45,24 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Antes que el resto: comprime la respuesta ya completa
+    'cursosapi.compresion.CompresionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'cursosapi.perfilado.PerfiladoMiddleware',
+    # Al final, para que sus tiempos de vista rodeen solo a la vista
+    'cursosapi.metricas.MetricasMiddleware',
 ]
 
-ROOT_URLCONF = 'config.urls'
+# IPs que pueden consultar /metrics
+INTERNAL_IPS = os.environ.get('DJANGO_INTERNAL_IPS', '127.0.0.1,::1').split(',')
+
+# config/asgi.py la cambia por config.urls_asgi (vistas async en las lecturas frecuentes)
+ROOT_URLCONF = os.environ.get('DJANGO_ROOT_URLCONF', 'config.urls')
 
 TEMPLATES = [
     {
@@ -79,10 +89,79 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Las transacciones toman el candado de escritura al empezar: una
+            # segunda escritura concurrente espera (timeout) en lugar de fallar
+            # con "database is locked" al pasar de lectura a escritura
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # En archivo: la base en memoria compartida bloquea por tabla y no
+        # espera, así que las pruebas con varios hilos no reflejarían lo real
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# En memoria local por defecto (desarrollo y tests). En producción, por ejemplo:
+#   DJANGO_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#   DJANGO_CACHE_LOCATION=/var/tmp/cursosapi_cache
+# o un backend compartido como django.core.cache.backends.redis.RedisCache.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'cursosapi'),
+    }
+}
+
+# Segundos que una respuesta cacheada se considera fresca (cursosapi.cache_respuestas)
+CACHE_RESPUESTAS_TIMEOUT = int(os.environ.get('CACHE_RESPUESTAS_TIMEOUT', 300))
+
+
+# Sincronización incremental (?since=) de cursosapi.sincronizacion
+SINCRONIZACION_VENTANA_SEGUNDOS = 5
+SINCRONIZACION_RETENCION_DIAS = 90
+
+
+# Instrumentación (cursosapi.metricas): consultas más lentas que esto se registran
+METRICAS_CONSULTA_LENTA_MS = int(os.environ.get('METRICAS_CONSULTA_LENTA_MS', 100))
+
+# Compresión gzip (cursosapi.compresion): tipos de contenido y tamaño mínimo
+COMPRESION_TIPOS = (
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain',
+)
+COMPRESION_MIN_BYTES = int(os.environ.get('COMPRESION_MIN_BYTES', 1024))
+
+# Perfilado bajo demanda (cursosapi.perfilado), solo para usuarios staff
+PERFILADO_DIRECTORIO = os.environ.get('PERFILADO_DIRECTORIO', BASE_DIR / 'perfiles')
+PERFILADO_MAX_POR_MINUTO = 6
+PERFILADO_MAX_ARTEFACTOS = 50
+
+# Asistencia en vivo por SSE (cursosapi.en_vivo), solo bajo ASGI
+EN_VIVO_LATIDO_SEGUNDOS = int(os.environ.get('EN_VIVO_LATIDO_SEGUNDOS', 15))
+EN_VIVO_MAX_PENDIENTES = 100
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'cursosapi': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -129,6 +208,11 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # For development - change in production
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        # orjson si está instalado, json de la biblioteca estándar si no
+        'cursosapi.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10
 }
@@ -16,9 +16,15 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from cursosapi.metricas import vista_metricas
+from cursosapi.perfilado import descargar_perfil, detalle_perfil, lista_perfiles
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('cursosapi.urls')),
+    path('metrics', vista_metricas, name='metricas'),
+    path('internal/perfiles/', lista_perfiles, name='perfil-lista'),
+    path('internal/perfiles/<slug:perfil_id>/', detalle_perfil, name='perfil-detalle'),
+    path('internal/perfiles/<slug:perfil_id>/descarga/', descargar_perfil, name='perfil-descarga'),
 ]
@@ -0,0 +1,26 @@
+"""URLs bajo ASGI: las de ``config.urls`` con las vistas async de
+``cursosapi.asincrono`` por delante para las lecturas más frecuentes, más el
+flujo de ``cursosapi.en_vivo``, que solo tiene sentido con un bucle de eventos."""
+from django.urls import path
+
+from cursosapi import asincrono, en_vivo
+from .urls import urlpatterns as urlpatterns_wsgi
+
+
+urlpatterns = [
+    path('api/cursos/', asincrono.catalogo, name='curso-list'),
+    path('api/cursos/<int:pk>/estudiantes/', asincrono.estudiantes_curso, name='curso-estudiantes'),
+    path('api/estudiantes/<int:pk>/horario/', asincrono.horario_estudiante, name='estudiante-horario'),
+    path('api/estudiantes/<int:pk>/cursos/', asincrono.cursos_estudiante, name='estudiante-cursos'),
+    path(
+        'api/estudiantes/<int:pk>/calificaciones/', asincrono.calificaciones_estudiante,
+        name='estudiante-calificaciones'
+    ),
+    path(
+        'api/cursos/<int:pk>/asistencia_en_vivo/',
+        # Los mismos permisos y límites que la hoja de asistencia del viewset
+        asincrono.con_acceso_drf('curso-lista-asistencia')(en_vivo.asistencia_en_vivo),
+        name='curso-asistencia-en-vivo'
+    ),
+    *urlpatterns_wsgi,
+]
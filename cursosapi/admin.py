@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia
+from .models import Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia, ResumenAsistencia
 
 @admin.register(Profesor)
 class ProfesorAdmin(admin.ModelAdmin):
@@ -67,4 +67,15 @@ class AsistenciaAdmin(admin.ModelAdmin):
     
     def get_curso(self, obj):
         return f"{obj.inscripcion.curso.codigo} - {obj.inscripcion.curso.nombre}"
-    get_curso.short_description = 'Curso'
\ No newline at end of file
+    get_curso.short_description = 'Curso'
+
+@admin.register(ResumenAsistencia)
+class ResumenAsistenciaAdmin(admin.ModelAdmin):
+    list_display = ('inscripcion', 'sesiones', 'presentes', 'justificadas', 'ausentes')
+    list_select_related = ('inscripcion__estudiante', 'inscripcion__curso')
+    search_fields = (
+        'inscripcion__estudiante__nombre', 
+        'inscripcion__estudiante__apellido', 
+        'inscripcion__curso__codigo'
+    )
+    readonly_fields = ('inscripcion', 'sesiones', 'presentes', 'justificadas', 'ausentes')
@@ -0,0 +1,266 @@
+"""Vistas async para las lecturas más frecuentes del portal.
+
+Bajo ASGI (``config/asgi.py`` usa ``config.urls_asgi``) estas vistas atienden
+``GET`` en las mismas URLs que el router: el horario, los cursos y las
+calificaciones de un estudiante, los estudiantes de un curso y el catálogo.
+Leen con el ORM asíncrono (``aget``, ``acount``, ``async for``), así que un
+mismo proceso puede tener muchas peticiones en espera de la base sin ocupar
+un hilo por cada una.
+
+La respuesta es la misma que la del viewset, byte a byte: usan las mismas
+proyecciones, los mismos validadores de ``condicional`` (el ETag coincide) y
+las mismas claves de ``cache_respuestas``. Antes de responder pasan por la
+autenticación, los permisos y los límites de peticiones del viewset
+(``con_acceso_drf``). Lo que no cubren (otros métodos,
+la API navegable, ``?format=``, búsqueda y orden, errores) lo delegan en la
+vista de DRF correspondiente.
+"""
+import math
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import cache_respuestas, condicional, proyecciones
+from .models import Curso, Estudiante, Inscripcion
+from .renderers import JSONRapidoRenderer
+from .urls import router
+from .views import (
+    COLUMNAS_CALIFICACIONES,
+    CursoViewSet,
+    calificacion_inscripcion,
+    fuentes_calificaciones_estudiante,
+    fuentes_cursos_estudiante,
+    fuentes_estudiantes_curso,
+)
+
+RENDERER = JSONRapidoRenderer()
+
+# Tipos de Accept que DRF resuelve con el renderer JSON
+_ACEPTA_JSON = {'application/json', 'application/*', '*/*'}
+
+_METODOS_HTTP = ('get', 'post', 'put', 'patch', 'delete', 'head', 'options')
+
+
+def _vista_drf(nombre):
+    # La primera ruta con ese nombre es la que no lleva sufijo de formato
+    return next(patron.callback for patron in router.urls if patron.name == nombre)
+
+
+def _acepta_json(request):
+    aceptados = request.headers.get('Accept')
+    if not aceptados:
+        return True
+    return all(tipo.split(';')[0].strip() in _ACEPTA_JSON for tipo in aceptados.split(','))
+
+
+def _proyeccion(request, proyeccion):
+    return proyeccion.variante(
+        proyecciones.parametro_lista(request.GET, 'fields'),
+        proyecciones.parametro_lista(request.GET, 'expand') or []
+    )
+
+
+async def _objeto(modelo, pk):
+    try:
+        return await modelo.objects.only('pk').aget(pk=pk)
+    except modelo.DoesNotExist:
+        raise Http404
+
+
+def _comprobar_acceso(vista_drf, request, **kwargs):
+    """Autenticación, permisos y límites de ``vista_drf`` sin ejecutar la acción.
+
+    Devuelve ``None`` si la petición pasa, o la respuesta de error que daría DRF.
+    """
+    vista = vista_drf.cls(**vista_drf.initkwargs)
+    # Como ViewSetMixin.as_view: los métodos HTTP apuntan a las acciones
+    vista.action_map = vista_drf.actions
+    for metodo, accion in vista_drf.actions.items():
+        setattr(vista, metodo, getattr(vista, accion))
+    vista.args, vista.kwargs = (), kwargs
+    vista.format_kwarg = None
+    vista.headers = vista.default_response_headers
+    vista.request = vista.initialize_request(request, **kwargs)
+    try:
+        vista.perform_authentication(vista.request)
+        vista.check_permissions(vista.request)
+        vista.check_throttles(vista.request)
+    except APIException as exc:
+        return vista.finalize_response(vista.request, vista.handle_exception(exc)).render()
+    return None
+
+
+def con_acceso_drf(nombre):
+    """Aplica a una vista async las comprobaciones de la ruta ``nombre`` del router."""
+    vista_drf = _vista_drf(nombre)
+
+    def decorador(vista):
+        @wraps(vista)
+        async def protegida(request, **kwargs):
+            error = await sync_to_async(_comprobar_acceso)(vista_drf, request, **kwargs)
+            if error is not None:
+                return error
+            return await vista(request, **kwargs)
+        # Como APIView.as_view: la vista de DRF aplica CSRF cuando hace falta
+        protegida.csrf_exempt = True
+        return protegida
+    return decorador
+
+
+def lectura_asincrona(nombre, fuentes, parametros=('fields', 'expand'), cache=None):
+    """Convierte ``calcular(request, **kwargs)`` (corrutina que devuelve los datos) en vista.
+
+    ``nombre`` es el de la ruta del router a la que sustituye y en la que se
+    delega; ``fuentes(request, **kwargs)`` son las de ``respuesta_condicional``
+    y ``cache`` la pareja ``(dependencias, acción)`` de ``cachear_respuesta``.
+    """
+    vista_drf = _vista_drf(nombre)
+    acciones = vista_drf.actions
+    permitidos = [
+        metodo.upper() for metodo in _METODOS_HTTP
+        if metodo in acciones or metodo == 'options' or (metodo == 'head' and 'get' in acciones)
+    ]
+    nombre_vista = vista_drf.cls.__name__
+
+    def decorador(calcular):
+        async def delegar(request, **kwargs):
+            return await sync_to_async(vista_drf)(request, **kwargs)
+
+        async def responder(request, **kwargs):
+            origenes = fuentes(request, **kwargs)
+            etag, ultima = condicional.etiquetas(
+                request, RENDERER.format, *await condicional.avalidadores(origenes),
+                con_last_modified=condicional.usa_last_modified(fuentes, origenes)
+            )
+            respuesta_304 = condicional.no_modificada(request, etag, ultima)
+            if respuesta_304 is not None:
+                return respuesta_304
+
+            if cache is None:
+                datos = await calcular(request, **kwargs)
+            else:
+                dependencias, accion = cache
+                versiones = await cache_respuestas.aobtener_versiones(
+                    [dependencia.format(**kwargs) for dependencia in dependencias]
+                )
+                clave = cache_respuestas.clave_respuesta(
+                    nombre_vista, accion, request, RENDERER.format, versiones
+                )
+                datos = await cache_respuestas.aobtener_o_calcular(
+                    clave, lambda: calcular(request, **kwargs)
+                )
+
+            response = HttpResponse(RENDERER.render(datos), content_type=RENDERER.media_type)
+            response['Allow'] = ', '.join(permitidos)
+            patch_vary_headers(response, ('Accept',))
+            condicional.agregar_validadores(response, etag, ultima)
+            return response
+
+        @wraps(calcular)
+        async def vista(request, **kwargs):
+            if (
+                request.method != 'GET'
+                or not _acepta_json(request)
+                or set(request.GET) - set(parametros)
+            ):
+                return await delegar(request, **kwargs)
+            error = await sync_to_async(_comprobar_acceso)(vista_drf, request, **kwargs)
+            if error is not None:
+                return error
+            try:
+                return await responder(request, **kwargs)
+            except (Http404, ValidationError):
+                # DRF arma la respuesta de error (y vuelve a contar la petición
+                # en los límites, como cualquier error que le llegue)
+                return await delegar(request, **kwargs)
+
+        vista.ruta_metricas = f"{nombre_vista}.{acciones['get']}"
+        # Como APIView.as_view: lo que se delega lo comprueba DRF (solo para
+        # la autenticación por sesión); si no, CsrfViewMiddleware rechazaría
+        # los POST a la misma URL que con WSGI se aceptan
+        vista.csrf_exempt = True
+        return vista
+    return decorador
+
+
+def _detalle(fuentes):
+    # Las fuentes de estas acciones no usan la vista
+    return lambda request, pk: fuentes(None, pk=pk)
+
+
+@lectura_asincrona(
+    'estudiante-horario', _detalle(fuentes_cursos_estudiante), cache=(('estudiante:{pk}',), 'horario')
+)
+async def horario_estudiante(request, pk):
+    estudiante = await _objeto(Estudiante, pk)
+    proyeccion = _proyeccion(request, proyecciones.HORARIO)
+    return await proyeccion.adatos(Inscripcion.objects.filter(estudiante=estudiante, estado='ACTIVO'))
+
+
+@lectura_asincrona('estudiante-cursos', _detalle(fuentes_cursos_estudiante))
+async def cursos_estudiante(request, pk):
+    estudiante = await _objeto(Estudiante, pk)
+    proyeccion = _proyeccion(request, proyecciones.CURSO)
+    return await proyeccion.adatos(
+        Inscripcion.objects.filter(estudiante=estudiante, estado='ACTIVO'), prefijo='curso__'
+    )
+
+
+@lectura_asincrona('estudiante-calificaciones', _detalle(fuentes_calificaciones_estudiante), parametros=())
+async def calificaciones_estudiante(request, pk):
+    estudiante = await _objeto(Estudiante, pk)
+    inscripciones = Inscripcion.objects.filter(estudiante=estudiante).values_list(*COLUMNAS_CALIFICACIONES)
+    return [calificacion_inscripcion(*fila) async for fila in inscripciones]
+
+
+@lectura_asincrona('curso-estudiantes', _detalle(fuentes_estudiantes_curso))
+async def estudiantes_curso(request, pk):
+    curso = await _objeto(Curso, pk)
+    proyeccion = _proyeccion(request, proyecciones.ESTUDIANTE)
+    return await proyeccion.adatos(
+        Inscripcion.objects.filter(curso=curso, estado='ACTIVO'), prefijo='estudiante__'
+    )
+
+
+def _fuentes_catalogo(request):
+    # Como condicional.lista('updated_at', 'profesor__updated_at') sin búsqueda ni orden
+    campos = ('updated_at', 'profesor__updated_at')
+    expandidos = _proyeccion(request, proyecciones.CURSO).validadores_expandidos()
+    return [(Curso.objects.all(), campos + tuple(campo for campo in expandidos if campo not in campos))]
+
+
+@lectura_asincrona(
+    'curso-list', _fuentes_catalogo, parametros=('fields', 'expand', 'page'), cache=(('catalogo',), 'list')
+)
+async def catalogo(request):
+    """Primera página o ``?page=n`` del catálogo, con el mismo formato que ``PageNumberPagination``."""
+    proyeccion = _proyeccion(request, proyecciones.CURSO)
+    try:
+        pagina = int(request.GET.get('page', 1))
+    except ValueError:
+        raise Http404
+    tamano = CursoViewSet.pagination_class.page_size
+    total = await Curso.objects.acount()
+    paginas = max(math.ceil(total / tamano), 1)
+    if not 1 <= pagina <= paginas:
+        raise Http404
+
+    inicio = (pagina - 1) * tamano
+    filas = [fila async for fila in proyeccion.proyectar(Curso.objects.all())[inicio:inicio + tamano]]
+    url = request.build_absolute_uri()
+    anterior = None
+    if pagina > 1:
+        anterior = (
+            remove_query_param(url, 'page') if pagina == 2
+            else replace_query_param(url, 'page', pagina - 1)
+        )
+    return {
+        'count': total,
+        'next': replace_query_param(url, 'page', pagina + 1) if pagina < paginas else None,
+        'previous': anterior,
+        'results': proyeccion.serializar(filas),
+    }
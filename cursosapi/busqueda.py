@@ -0,0 +1,170 @@
+"""Índice de texto completo para estudiantes, profesores y cursos.
+
+En SQLite es una tabla virtual FTS5 por modelo (``cursosapi_busqueda_curso``,
+etc.) con ``remove_diacritics`` y prefijos indexados, cuyo ``rowid`` es el id
+del objeto: reemplazar o borrar una fila es una búsqueda por ``rowid`` y no
+un recorrido de la tabla. En PostgreSQL es una sola tabla con clave primaria
+``(modelo, objeto_id)``, una columna ``tsvector`` (sin acentos vía
+``unaccent``) e índice GIN. Con otros motores ``BusquedaTextoFilter`` se
+comporta igual que ``SearchFilter``.
+
+El índice se mantiene con señales (ver ``signals.py``) y se reconstruye con
+``manage.py reconstruir_indice_busqueda``.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .models import Profesor, Curso, Estudiante
+
+TABLA = 'cursosapi_busqueda'
+MOTORES = ('sqlite', 'postgresql')
+
+_PALABRA = re.compile(r'\w+', re.UNICODE)
+
+
+def soportado():
+    return connection.vendor in MOTORES
+
+
+def tabla_sqlite(modelo):
+    return f'{TABLA}_{modelo}'
+
+
+def texto_profesor(profesor):
+    return ' '.join([profesor.nombre, profesor.apellido, profesor.email, profesor.especialidad])
+
+
+def texto_curso(curso):
+    partes = [curso.codigo, curso.nombre, curso.descripcion]
+    if curso.profesor_id:
+        partes += [curso.profesor.nombre, curso.profesor.apellido]
+    return ' '.join(partes)
+
+
+def texto_estudiante(estudiante):
+    return ' '.join([estudiante.matricula, estudiante.nombre, estudiante.apellido, estudiante.email])
+
+
+TEXTOS = {
+    'profesor': texto_profesor,
+    'curso': texto_curso,
+    'estudiante': texto_estudiante,
+}
+
+
+def indexar(objetos):
+    """Inserta o reemplaza en el índice las filas de ``objetos`` (de un mismo modelo)."""
+    objetos = list(objetos)
+    if not objetos or not soportado():
+        return
+    modelo = objetos[0]._meta.model_name
+    filas = [(modelo, objeto.pk, TEXTOS[modelo](objeto)) for objeto in objetos]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.executemany(
+                f"INSERT INTO {TABLA} (modelo, objeto_id, texto, documento) "
+                f"VALUES (%s, %s, %s, to_tsvector('simple', unaccent(%s))) "
+                f"ON CONFLICT (modelo, objeto_id) DO UPDATE "
+                f"SET texto = EXCLUDED.texto, documento = EXCLUDED.documento",
+                [fila + (fila[2],) for fila in filas]
+            )
+        else:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {tabla_sqlite(modelo)} (rowid, texto) VALUES (%s, %s)",
+                [fila[1:] for fila in filas]
+            )
+
+
+def desindexar(modelo, ids):
+    ids = list(ids)
+    if not ids or not soportado():
+        return
+    marcadores = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f"DELETE FROM {TABLA} WHERE modelo = %s AND objeto_id IN ({marcadores})",
+                [modelo, *ids]
+            )
+        else:
+            cursor.execute(f"DELETE FROM {tabla_sqlite(modelo)} WHERE rowid IN ({marcadores})", ids)
+
+
+def reconstruir(tamanio_lote=2000):
+    if not soportado():
+        return 0
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"DELETE FROM {TABLA}")
+        else:
+            for modelo in TEXTOS:
+                cursor.execute(f"DELETE FROM {tabla_sqlite(modelo)}")
+    total = 0
+    for queryset in (
+        Profesor.objects.order_by('pk'),
+        Curso.objects.select_related('profesor').order_by('pk'),
+        Estudiante.objects.order_by('pk'),
+    ):
+        lote = []
+        for objeto in queryset.iterator(chunk_size=tamanio_lote):
+            lote.append(objeto)
+            if len(lote) >= tamanio_lote:
+                indexar(lote)
+                total += len(lote)
+                lote = []
+        indexar(lote)
+        total += len(lote)
+    return total
+
+
+def ids_coincidentes(modelo, terminos):
+    """Subconsulta con los ids de ``modelo`` que contienen todos los términos como prefijo."""
+    palabras = [palabra for termino in terminos for palabra in _PALABRA.findall(termino)]
+    if not palabras:
+        return None
+    if connection.vendor == 'postgresql':
+        consulta = ' & '.join(f'{palabra}:*' for palabra in palabras)
+        sql = (
+            f"SELECT objeto_id FROM {TABLA} WHERE modelo = %s "
+            f"AND documento @@ to_tsquery('simple', unaccent(%s))"
+        )
+        return RawSQL(sql, [modelo, consulta])
+    tabla = tabla_sqlite(modelo)
+    consulta = ' '.join(f'"{palabra}"*' for palabra in palabras)
+    return RawSQL(f"SELECT rowid FROM {tabla} WHERE {tabla} MATCH %s", [consulta])
+
+
+class BusquedaTextoFilter(filters.SearchFilter):
+    """``SearchFilter`` que consulta el índice de texto completo.
+
+    La vista declara ``busqueda_indices``: modelo indexado -> campo del
+    queryset con su id, por ejemplo ``{'estudiante': 'inscripcion__estudiante_id'}``.
+    Como en ``SearchFilter``, una fila coincide si cada término aparece en
+    alguno de sus modelos indexados, no necesariamente el mismo: "Pérez MAT101"
+    encuentra las inscripciones de Pérez en MAT101. Las palabras de un mismo
+    término (``jose.perez``) sí deben estar en el mismo modelo. Sin índice
+    disponible se usa ``search_fields`` con ``icontains``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        indices = getattr(view, 'busqueda_indices', None)
+        terminos = self.get_search_terms(request)
+        if not terminos:
+            return queryset
+        if not indices or not soportado():
+            return super().filter_queryset(request, queryset, view)
+
+        if not all(_PALABRA.search(termino) for termino in terminos):
+            # Sin palabras indexables (solo signos): mismo criterio que SearchFilter
+            return super().filter_queryset(request, queryset, view)
+
+        for termino in terminos:
+            condicion = Q()
+            for modelo, campo in indices.items():
+                condicion |= Q(**{f'{campo}__in': ids_coincidentes(modelo, [termino])})
+            queryset = queryset.filter(condicion)
+        return queryset
@@ -0,0 +1,192 @@
+"""Caché de respuestas para acciones de lectura con claves versionadas por entidad.
+
+Cada respuesta se guarda bajo una clave que incluye la versión actual de las
+entidades de las que depende (``'curso:3'``, ``'catalogo'``...). Invalidar una
+entidad es cambiar su versión: las claves viejas dejan de consultarse y
+expiran solas, sin tener que buscarlas ni borrarlas una por una.
+"""
+import asyncio
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+
+def _cache():
+    return caches[getattr(settings, 'CACHE_RESPUESTAS_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'CACHE_RESPUESTAS_TIMEOUT', 300)
+
+
+def _clave_version(entidad):
+    return f'version:{entidad}'
+
+
+def obtener_versiones(entidades):
+    """Versión actual de cada entidad; las que no tienen se inicializan."""
+    cache = _cache()
+    claves = [_clave_version(entidad) for entidad in entidades]
+    versiones = cache.get_many(claves)
+    nuevas = {clave: uuid.uuid4().hex for clave in claves if clave not in versiones}
+    if nuevas:
+        for clave, version in nuevas.items():
+            # add() no pisa una versión creada entretanto por otra petición
+            if not cache.add(clave, version, None):
+                version = cache.get(clave, version)
+            versiones[clave] = version
+    return [versiones[clave] for clave in claves]
+
+
+async def aobtener_versiones(entidades):
+    """Versión asíncrona de ``obtener_versiones``."""
+    cache = _cache()
+    claves = [_clave_version(entidad) for entidad in entidades]
+    versiones = await cache.aget_many(claves)
+    for clave in claves:
+        if clave not in versiones:
+            version = uuid.uuid4().hex
+            if not await cache.aadd(clave, version, None):
+                version = await cache.aget(clave, version)
+            versiones[clave] = version
+    return [versiones[clave] for clave in claves]
+
+
+def clave_respuesta(vista, accion, request, formato, versiones):
+    """Clave de la respuesta de ``vista.accion``; la comparten las vistas síncronas y las async."""
+    huella = hashlib.md5(
+        '|'.join([request.get_full_path(), formato or '', *versiones]).encode()
+    ).hexdigest()
+    return f'respuesta:{vista}:{accion}:{huella}'
+
+
+def invalidar(*entidades):
+    """Cambia la versión de las entidades cuando la transacción se confirma."""
+    entidades = {entidad for entidad in entidades if entidad is not None}
+    if not entidades:
+        return
+
+    def bump():
+        _cache().set_many(
+            {_clave_version(entidad): uuid.uuid4().hex for entidad in entidades},
+            None
+        )
+    transaction.on_commit(bump)
+
+
+def obtener_o_calcular(clave, calcular, timeout=None, espera=2.0):
+    """Lee ``clave`` o la calcula protegiendo contra estampidas.
+
+    Los valores se guardan con una expiración suave: pasado ese punto, solo la
+    petición que obtiene el candado recalcula mientras las demás siguen
+    sirviendo el valor anterior. Si no hay ningún valor, las demás esperan
+    hasta ``espera`` segundos a que aparezca antes de calcularlo por su cuenta.
+    """
+    cache = _cache()
+    timeout = _timeout() if timeout is None else timeout
+    clave_candado = f'{clave}:candado'
+
+    entrada = cache.get(clave)
+    if entrada is not None and entrada['fresco_hasta'] > time.time():
+        return entrada['valor']
+
+    if cache.add(clave_candado, 1, max(int(espera * 2), 1)):
+        try:
+            valor = calcular()
+            # Se conserva el doble de tiempo para poder servirlo vencido
+            cache.set(
+                clave,
+                {'valor': valor, 'fresco_hasta': time.time() + timeout},
+                timeout * 2
+            )
+            return valor
+        finally:
+            cache.delete(clave_candado)
+
+    if entrada is not None:
+        return entrada['valor']
+
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        time.sleep(0.05)
+        entrada = cache.get(clave)
+        if entrada is not None:
+            return entrada['valor']
+    return calcular()
+
+
+async def aobtener_o_calcular(clave, calcular, timeout=None, espera=2.0):
+    """Versión asíncrona de ``obtener_o_calcular``; ``calcular`` es una corrutina."""
+    cache = _cache()
+    timeout = _timeout() if timeout is None else timeout
+    clave_candado = f'{clave}:candado'
+
+    entrada = await cache.aget(clave)
+    if entrada is not None and entrada['fresco_hasta'] > time.time():
+        return entrada['valor']
+
+    if await cache.aadd(clave_candado, 1, max(int(espera * 2), 1)):
+        try:
+            valor = await calcular()
+            await cache.aset(
+                clave,
+                {'valor': valor, 'fresco_hasta': time.time() + timeout},
+                timeout * 2
+            )
+            return valor
+        finally:
+            await cache.adelete(clave_candado)
+
+    if entrada is not None:
+        return entrada['valor']
+
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        await asyncio.sleep(0.05)
+        entrada = await cache.aget(clave)
+        if entrada is not None:
+            return entrada['valor']
+    return await calcular()
+
+
+class _RespuestaNoCacheable(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+def cachear_respuesta(*dependencias, timeout=None):
+    """Decorador para métodos GET de un viewset.
+
+    ``dependencias`` son plantillas de entidad formateadas con los kwargs de la
+    URL, por ejemplo ``'curso:{pk}'``. Solo se guardan respuestas 200.
+    """
+    def decorador(metodo):
+        @wraps(metodo)
+        def envoltura(self, request, *args, **kwargs):
+            if request.method != 'GET':
+                return metodo(self, request, *args, **kwargs)
+
+            entidades = [dependencia.format(**kwargs) for dependencia in dependencias]
+            clave = clave_respuesta(
+                type(self).__name__, metodo.__name__, request,
+                request.accepted_renderer.format, obtener_versiones(entidades)
+            )
+
+            def calcular():
+                response = metodo(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    raise _RespuestaNoCacheable(response)
+                return response.data
+
+            try:
+                return Response(obtener_o_calcular(clave, calcular, timeout))
+            except _RespuestaNoCacheable as e:
+                return e.response
+        return envoltura
+    return decorador
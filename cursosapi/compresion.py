@@ -0,0 +1,33 @@
+"""Compresión gzip de las respuestas según su tamaño y tipo de contenido.
+
+``GZipMiddleware`` de Django comprime cualquier respuesta de más de 200
+bytes. Aquí solo se comprimen los tipos de ``COMPRESION_TIPOS`` y a partir de
+``COMPRESION_MIN_BYTES``: por debajo de ese tamaño la cabecera gzip y la CPU
+no compensan lo que se ahorra de red. Los flujos de eventos
+(``text/event-stream``) no deben figurar en la lista, porque el buffer del
+compresor retrasaría cada evento.
+"""
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+TIPOS_POR_DEFECTO = (
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain',
+)
+MIN_BYTES_POR_DEFECTO = 1024
+
+
+class CompresionMiddleware(GZipMiddleware):
+    """Va al principio de ``MIDDLEWARE`` para comprimir la respuesta ya terminada."""
+
+    def process_response(self, request, response):
+        tipo = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if tipo not in getattr(settings, 'COMPRESION_TIPOS', TIPOS_POR_DEFECTO):
+            return response
+        minimo = getattr(settings, 'COMPRESION_MIN_BYTES', MIN_BYTES_POR_DEFECTO)
+        if not response.streaming and len(response.content) < minimo:
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,189 @@
+"""GET condicionales (ETag / Last-Modified) calculados sin serializar la respuesta.
+
+Los validadores salen de ``MAX(updated_at)`` y ``COUNT(*)`` de las filas que
+forman la respuesta: cualquier alta, baja o modificación cambia alguno de los
+dos. Con ``If-None-Match`` o ``If-Modified-Since`` vigentes se devuelve 304
+antes de ejecutar la vista.
+
+``Last-Modified`` solo acompaña a la respuesta de un objeto (``detalle``) con
+sus relaciones de un solo valor. En listas y agregados un borrado, o una fila
+que deja de cumplir el filtro, no sube ``MAX(updated_at)``: con
+``If-Modified-Since`` se respondería 304 con filas que ya no están. Ahí solo
+se envía el ETag, que incluye el total.
+
+Una página de cursor no lleva total, así que no se cuenta la tabla: la
+fuente es la propia página (un queryset recortado) y la huella se arma con
+los ``(pk, updated_at...)`` de sus filas, leídas por el mismo rango indexado
+que usa la paginación.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def _con_expandidos(view, campos):
+    # Con ?expand= la respuesta también cambia con las relaciones anidadas
+    if hasattr(view, 'validadores_expandidos'):
+        campos += tuple(campo for campo in view.validadores_expandidos() if campo not in campos)
+    return campos
+
+
+def lista(*campos):
+    """Fuente para ``list``: el queryset filtrado de la vista, o solo su página si es de cursor."""
+    campos = campos or ('updated_at',)
+
+    def fuentes(view, **kwargs):
+        queryset = view.filter_queryset(view.get_queryset())
+        campos_vista = _con_expandidos(view, campos)
+        paginator = view.paginator
+        if paginator is None or not hasattr(paginator, 'consulta_pagina'):
+            return [(queryset, campos_vista)]
+        request = view.request
+        if not paginator.usa_cursor_en(request) or paginator.pide_total(request):
+            return [(queryset, campos_vista)]
+        pagina, _, _ = paginator.consulta_pagina(queryset, request, view)
+        return [(pagina, campos_vista)]
+    return fuentes
+
+
+def detalle(*campos):
+    """Fuente para ``retrieve`` y acciones de detalle: el objeto de la URL."""
+    campos = campos or ('updated_at',)
+
+    def fuentes(view, pk=None, **kwargs):
+        return [(view.get_queryset().filter(pk=pk), _con_expandidos(view, campos))]
+    fuentes.un_objeto = True
+    return fuentes
+
+
+def _un_solo_valor(modelo, campo):
+    # ``inscripciones__updated_at`` recorre un conjunto: perder una fila no lo sube
+    for nombre in campo.split('__')[:-1]:
+        relacion = modelo._meta.get_field(nombre)
+        if relacion.one_to_many or relacion.many_to_many:
+            return False
+        modelo = relacion.related_model
+    return True
+
+
+def usa_last_modified(fuentes, origenes):
+    """Si ``Last-Modified`` refleja todo cambio de la respuesta (ver el docstring del módulo)."""
+    return getattr(fuentes, 'un_objeto', False) and all(
+        _un_solo_valor(queryset.model, campo) for queryset, campos in origenes for campo in campos
+    )
+
+
+def _agregados(campos):
+    return {'_total': Count('pk'), **{f'_max_{i}': Max(campo) for i, campo in enumerate(campos)}}
+
+
+def _acumular(agregados, ultima, partes):
+    partes.append(str(agregados.pop('_total')))
+    for valor in agregados.values():
+        if valor is not None and (ultima is None or valor > ultima):
+            ultima = valor
+    return ultima
+
+
+def _acumular_filas(filas, ultima, partes):
+    # Filas (pk, campos...) de un queryset recortado: la huella cubre altas, bajas y cambios
+    partes.append(hashlib.md5(repr(filas).encode()).hexdigest())
+    for _, *valores in filas:
+        for valor in valores:
+            if valor is not None and (ultima is None or valor > ultima):
+                ultima = valor
+    return ultima
+
+
+def validadores(fuentes):
+    """Devuelve ``(ultima_modificacion, huella)`` con una consulta por fuente."""
+    ultima = None
+    partes = []
+    for queryset, campos in fuentes:
+        if queryset.query.is_sliced:
+            ultima = _acumular_filas(list(queryset.values_list('pk', *campos)), ultima, partes)
+        else:
+            ultima = _acumular(queryset.order_by().aggregate(**_agregados(campos)), ultima, partes)
+    return ultima, partes
+
+
+async def avalidadores(fuentes):
+    """Versión asíncrona de ``validadores`` para las vistas de ``asincrono``."""
+    ultima = None
+    partes = []
+    for queryset, campos in fuentes:
+        if queryset.query.is_sliced:
+            filas = [fila async for fila in queryset.values_list('pk', *campos)]
+            ultima = _acumular_filas(filas, ultima, partes)
+        else:
+            ultima = _acumular(await queryset.order_by().aaggregate(**_agregados(campos)), ultima, partes)
+    return ultima, partes
+
+
+def etiquetas(request, formato, ultima, partes, con_last_modified=False):
+    """``(ETag, Last-Modified en segundos)`` de la respuesta a ``request``.
+
+    Sin ``con_last_modified`` el segundo es ``None``: la respuesta solo lleva ETag.
+    """
+    etag = quote_etag(hashlib.md5('|'.join([
+        request.get_full_path(),
+        formato or '',
+        ultima.isoformat() if ultima else '',
+        *partes
+    ]).encode()).hexdigest())
+    return etag, int(ultima.timestamp()) if ultima and con_last_modified else None
+
+
+def no_modificada(request, etag, ultima):
+    """La respuesta 304 si los validadores de la petición siguen vigentes."""
+    response = get_conditional_response(request, etag=etag, last_modified=ultima)
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+
+def agregar_validadores(response, etag, ultima):
+    response['ETag'] = etag
+    if ultima is not None:
+        response['Last-Modified'] = http_date(ultima)
+
+
+def respuesta_condicional(fuentes, con_efectos=False):
+    """Decorador para métodos GET de un viewset.
+
+    ``fuentes(view, **kwargs)`` devuelve una lista de ``(queryset, campos)``
+    cuyos ``MAX(campo)`` y ``COUNT(*)`` identifican el estado de la respuesta
+    (o, si el queryset está recortado, sus filas). ``Last-Modified`` solo se
+    envía con las fuentes de ``detalle``.
+    Con ``con_efectos`` (vistas que escriben al responder) los validadores se
+    vuelven a calcular después de ejecutar la vista.
+    """
+    def decorador(metodo):
+        @wraps(metodo)
+        def envoltura(self, request, *args, **kwargs):
+            if request.method != 'GET':
+                return metodo(self, request, *args, **kwargs)
+
+            def calcular():
+                origenes = fuentes(self, **kwargs)
+                return etiquetas(
+                    request, request.accepted_renderer.format, *validadores(origenes),
+                    con_last_modified=usa_last_modified(fuentes, origenes)
+                )
+
+            etag, ultima = calcular()
+            respuesta_304 = no_modificada(request, etag, ultima)
+            if respuesta_304 is not None:
+                return respuesta_304
+
+            response = metodo(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                if con_efectos:
+                    etag, ultima = calcular()
+                agregar_validadores(response, etag, ultima)
+            return response
+        return envoltura
+    return decorador
@@ -0,0 +1,229 @@
+"""Asistencia en vivo de una sesión (curso, fecha) por Server-Sent Events.
+
+``GET /api/cursos/<id>/asistencia_en_vivo/?fecha=YYYY-MM-DD`` (solo bajo
+ASGI, ver ``config.urls_asgi``) abre un flujo ``text/event-stream``: primero
+un evento ``lista`` con la hoja completa, leída en una sola consulta y sin
+crear filas, y después un evento ``asistencia`` con las filas que cambien
+cada vez que ``registrar_asistencia`` o ``AsistenciaViewSet`` confirmen una
+escritura. Si no hay cambios se envía un comentario de latido cada
+``EN_VIVO_LATIDO_SEGUNDOS`` para que los proxies no corten la conexión. La
+ruta aplica la autenticación, los permisos y los límites de peticiones de
+``lista_asistencia`` en el viewset.
+
+La difusión es en memoria y por proceso: quien escribe arma el mensaje una
+sola vez y ``CANALES`` lo reparte a la cola de cada suscriptor en su bucle
+de eventos, sin consultar la base por suscriptor. Solo llegan las
+escrituras hechas en el mismo proceso que sirve el flujo. Un suscriptor que
+acumula más de ``EN_VIVO_MAX_PENDIENTES`` mensajes sin leer pierde los
+pendientes y recibe de nuevo la hoja completa.
+"""
+import asyncio
+import itertools
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import FilteredRelation, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .models import Asistencia, Curso, Inscripcion, apellido_nombre
+from .renderers import JSONRapidoRenderer
+
+RENDERER = JSONRapidoRenderer()
+
+# Marca en la cola de un suscriptor desbordado: hay que reenviar la hoja
+RESINCRONIZAR = object()
+
+_booleano = Asistencia._meta.get_field('presente').to_python
+
+
+def _latido():
+    return getattr(settings, 'EN_VIVO_LATIDO_SEGUNDOS', 15)
+
+
+def _max_pendientes():
+    return getattr(settings, 'EN_VIVO_MAX_PENDIENTES', 100)
+
+
+def mensaje(evento, datos, identificador=None):
+    """Evento SSE ya codificado; el JSON compacto no lleva saltos de línea."""
+    cabecera = f'id: {identificador}\n' if identificador is not None else ''
+    return f'{cabecera}event: {evento}\ndata: '.encode() + RENDERER.render(datos) + b'\n\n'
+
+
+class Suscripcion:
+    def __init__(self, clave, loop, maximo):
+        self.clave = clave
+        self.loop = loop
+        self.cola = asyncio.Queue(maximo)
+
+    def entregar(self, contenido):
+        # Corre en el bucle del suscriptor: asyncio.Queue no es segura entre hilos
+        if self.cola.full():
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            contenido = RESINCRONIZAR
+        self.cola.put_nowait(contenido)
+
+    async def siguiente(self):
+        return await self.cola.get()
+
+
+class Canales:
+    """Suscripciones por ``(curso_id, fecha)``; se publica desde cualquier hilo."""
+
+    def __init__(self):
+        self._suscripciones = defaultdict(set)
+        self._fechas = Counter()
+        self._candado = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def suscribir(self, clave, maximo=None):
+        suscripcion = Suscripcion(clave, asyncio.get_running_loop(), maximo or _max_pendientes())
+        with self._candado:
+            self._suscripciones[clave].add(suscripcion)
+            self._fechas[clave[1]] += 1
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._candado:
+            suscripciones = self._suscripciones.get(suscripcion.clave)
+            if suscripciones is None or suscripcion not in suscripciones:
+                return
+            suscripciones.discard(suscripcion)
+            if not suscripciones:
+                del self._suscripciones[suscripcion.clave]
+            self._fechas[suscripcion.clave[1]] -= 1
+            if not self._fechas[suscripcion.clave[1]]:
+                del self._fechas[suscripcion.clave[1]]
+
+    def suscriptores(self, clave):
+        with self._candado:
+            return len(self._suscripciones.get(clave, ()))
+
+    def escuchando(self, fecha):
+        """Si alguien sigue esa fecha; evita preparar mensajes que nadie va a leer."""
+        return fecha in self._fechas
+
+    def publicar(self, clave, evento, datos):
+        with self._candado:
+            suscripciones = list(self._suscripciones.get(clave, ()))
+        if not suscripciones:
+            return 0
+        contenido = mensaje(evento, datos, next(self._ids))
+        for suscripcion in suscripciones:
+            try:
+                suscripcion.loop.call_soon_threadsafe(suscripcion.entregar, contenido)
+            except RuntimeError:
+                # El bucle ya se cerró sin que el flujo llegara a cancelarse
+                self.cancelar(suscripcion)
+        return len(suscripciones)
+
+
+CANALES = Canales()
+
+
+def publicar(filas):
+    """Publica al confirmar la transacción ``(curso_id, fecha, estudiante_id, presente, justificada)``."""
+    sesiones = defaultdict(list)
+    for curso_id, fecha, estudiante_id, presente, justificada in filas:
+        if CANALES.escuchando(fecha):
+            sesiones[(curso_id, fecha)].append({
+                'estudiante_id': estudiante_id,
+                'presente': _booleano(presente),
+                'justificada': _booleano(justificada),
+            })
+    if not sesiones:
+        return
+
+    def difundir():
+        for clave, cambios in sesiones.items():
+            CANALES.publicar(clave, 'asistencia', cambios)
+    transaction.on_commit(difundir)
+
+
+def publicar_asistencia(asistencia=None, anterior=None):
+    """Cambio hecho por ``AsistenciaViewSet``.
+
+    ``anterior`` es el ``(inscripcion_id, fecha)`` que tenía la asistencia
+    antes de modificarla o borrarla: si deja de existir, en la hoja esa
+    casilla vuelve a ausente.
+    """
+    cambios = []
+    if anterior is not None and (asistencia is None or anterior != (asistencia.inscripcion_id, asistencia.fecha)):
+        cambios.append((*anterior, False, False))
+    if asistencia is not None:
+        cambios.append((asistencia.inscripcion_id, asistencia.fecha, asistencia.presente, asistencia.justificada))
+    cambios = [cambio for cambio in cambios if CANALES.escuchando(cambio[1])]
+    if not cambios:
+        return
+    inscripciones = {
+        inscripcion_id: (curso_id, estudiante_id)
+        for inscripcion_id, curso_id, estudiante_id in Inscripcion.objects.filter(
+            id__in={cambio[0] for cambio in cambios}
+        ).values_list('id', 'curso_id', 'estudiante_id')
+    }
+    publicar(
+        (inscripciones[inscripcion_id][0], fecha, inscripciones[inscripcion_id][1], presente, justificada)
+        for inscripcion_id, fecha, presente, justificada in cambios
+        if inscripcion_id in inscripciones
+    )
+
+
+async def hoja(curso_id, fecha):
+    """Estado actual de la sesión; sin fila de asistencia cuenta como ausente."""
+    inscripciones = Inscripcion.objects.filter(curso_id=curso_id, estado='ACTIVO').annotate(
+        asistencia_dia=FilteredRelation('asistencias', condition=Q(asistencias__fecha=fecha))
+    ).values_list(
+        'estudiante_id', 'estudiante__matricula', apellido_nombre('estudiante__'),
+        'asistencia_dia__presente', 'asistencia_dia__justificada'
+    )
+    return [
+        {
+            'estudiante_id': estudiante_id,
+            'matricula': matricula,
+            'nombre': nombre,
+            'presente': bool(presente),
+            'justificada': bool(justificada),
+        }
+        async for estudiante_id, matricula, nombre, presente, justificada in inscripciones
+    ]
+
+
+async def _eventos(curso_id, fecha):
+    # Antes de leer la hoja: lo que cambie mientras tanto queda en la cola
+    suscripcion = CANALES.suscribir((curso_id, fecha))
+    try:
+        yield f'retry: {int(_latido() * 1000)}\n\n'.encode()
+        yield mensaje('lista', await hoja(curso_id, fecha))
+        while True:
+            try:
+                contenido = await asyncio.wait_for(suscripcion.siguiente(), _latido())
+            except asyncio.TimeoutError:
+                yield b': latido\n\n'
+                continue
+            if contenido is RESINCRONIZAR:
+                contenido = mensaje('lista', await hoja(curso_id, fecha))
+            yield contenido
+    finally:
+        CANALES.cancelar(suscripcion)
+
+
+@require_GET
+async def asistencia_en_vivo(request, pk):
+    fecha_str = request.GET.get('fecha')
+    try:
+        fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date() if fecha_str else datetime.now().date()
+    except ValueError:
+        return JsonResponse({"error": "Formato de fecha inválido. Use YYYY-MM-DD"}, status=400)
+    if not await Curso.objects.filter(pk=pk).aexists():
+        return JsonResponse({"error": "Curso no encontrado"}, status=404)
+
+    response = StreamingHttpResponse(_eventos(pk, fecha), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Sin búfer en nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
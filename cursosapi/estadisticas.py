@@ -0,0 +1,124 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import (
+    Avg, Case, Count, IntegerField, Max, Min, Q, StdDev, Value, When,
+)
+
+from .models import Calificacion, Curso
+
+NOTA_APROBATORIA = Decimal('6.00')
+RANGOS_HISTOGRAMA = 10
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def clave_cache(curso_id):
+    return f'estadisticas_calificaciones:{curso_id}'
+
+
+def invalidar(curso_id):
+    cache.delete(clave_cache(curso_id))
+
+
+def _redondear(valor):
+    return None if valor is None else round(float(valor), 2)
+
+
+def _percentil(ordenados, p):
+    """Percentil con interpolación lineal sobre una lista ya ordenada."""
+    if not ordenados:
+        return None
+    posicion = (len(ordenados) - 1) * p
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    fraccion = posicion - inferior
+    return float(ordenados[inferior]) * (1 - fraccion) + float(ordenados[superior]) * fraccion
+
+
+def _calcular(curso_ids):
+    calificaciones = Calificacion.objects.filter(inscripcion__curso_id__in=curso_ids).order_by()
+
+    # Agregados por curso en una sola consulta
+    agregados = {
+        fila['inscripcion__curso_id']: fila
+        for fila in calificaciones.values('inscripcion__curso_id').annotate(
+            total=Count('id'),
+            promedio=Avg('valor'),
+            desviacion_estandar=StdDev('valor'),
+            minimo=Min('valor'),
+            maximo=Max('valor'),
+            aprobados=Count('id', filter=Q(valor__gte=NOTA_APROBATORIA))
+        )
+    }
+
+    # Histograma 0-10 con rangos calculados en la base de datos; 10 cae en el último
+    rango = Case(
+        *[When(valor__lt=i + 1, then=Value(i)) for i in range(RANGOS_HISTOGRAMA - 1)],
+        default=Value(RANGOS_HISTOGRAMA - 1),
+        output_field=IntegerField()
+    )
+    histogramas = {}
+    for fila in calificaciones.annotate(rango=rango).values(
+        'inscripcion__curso_id', 'rango'
+    ).annotate(total=Count('id')):
+        histograma = histogramas.setdefault(
+            fila['inscripcion__curso_id'], [0] * RANGOS_HISTOGRAMA
+        )
+        histograma[fila['rango']] = fila['total']
+
+    # SQLite no calcula percentiles: una única pasada ordenada para todos los cursos
+    valores = {}
+    for curso_id, valor in calificaciones.order_by(
+        'inscripcion__curso_id', 'valor'
+    ).values_list('inscripcion__curso_id', 'valor'):
+        valores.setdefault(curso_id, []).append(valor)
+
+    cursos = Curso.objects.filter(id__in=curso_ids).values('id', 'codigo', 'nombre')
+    resultados = {}
+    for curso in cursos:
+        fila = agregados.get(curso['id'], {})
+        ordenados = valores.get(curso['id'], [])
+        total = fila.get('total', 0)
+        histograma = histogramas.get(curso['id'], [0] * RANGOS_HISTOGRAMA)
+        resultados[curso['id']] = {
+            'curso_id': curso['id'],
+            'codigo': curso['codigo'],
+            'nombre': curso['nombre'],
+            'total': total,
+            'promedio': _redondear(fila.get('promedio')),
+            'mediana': _redondear(_percentil(ordenados, 0.5)),
+            'desviacion_estandar': _redondear(fila.get('desviacion_estandar')),
+            'percentil_25': _redondear(_percentil(ordenados, 0.25)),
+            'percentil_75': _redondear(_percentil(ordenados, 0.75)),
+            'minimo': _redondear(fila.get('minimo')),
+            'maximo': _redondear(fila.get('maximo')),
+            'aprobados': fila.get('aprobados', 0),
+            'tasa_aprobacion': _redondear(fila['aprobados'] / total) if total else None,
+            'histograma': [
+                {'rango': f'{i}-{i + 1}', 'total': histograma[i]}
+                for i in range(RANGOS_HISTOGRAMA)
+            ],
+        }
+    return resultados
+
+
+def estadisticas_cursos(curso_ids):
+    """Estadísticas de calificaciones por curso, desde caché cuando es posible.
+
+    Devuelve un diccionario ``curso_id -> estadísticas``. Solo se calculan
+    los cursos que no están en caché, todos juntos con consultas agrupadas.
+    """
+    curso_ids = list(curso_ids)
+    claves = {clave_cache(curso_id): curso_id for curso_id in curso_ids}
+    en_cache = cache.get_many(claves)
+    resultados = {claves[clave]: valor for clave, valor in en_cache.items()}
+
+    faltantes = [curso_id for curso_id in curso_ids if curso_id not in resultados]
+    if faltantes:
+        calculados = _calcular(faltantes)
+        cache.set_many(
+            {clave_cache(curso_id): valor for curso_id, valor in calculados.items()},
+            CACHE_TIMEOUT
+        )
+        resultados.update(calculados)
+    return resultados
@@ -0,0 +1,216 @@
+"""Choques de horario de estudiantes y profesores.
+
+Cada persona tiene un índice de intervalos por día (``IndiceHorario``) con
+las franjas de sus cursos activos: inscripciones ``ACTIVO`` para un
+estudiante, cursos asignados para un profesor. El índice se arma con una
+sola consulta y se guarda en la caché hasta que una señal lo invalida, así
+que comprobar un curso nuevo es una búsqueda binaria sobre las franjas de
+ese día y no una lectura de todas las inscripciones.
+
+El índice en caché sirve para consultar y para rechazar pronto, pero no
+garantiza nada frente a otra petición que escribe a la vez: quien inscribe o
+asigna vuelve a comprobar con ``indices_bloqueados`` dentro de la misma
+transacción en la que escribe.
+
+Dos cursos chocan si comparten día, sus horas se solapan (terminar a la hora
+en que empieza el otro no es choque) y sus periodos de fechas se cruzan.
+"""
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .models import Curso, Estudiante, Inscripcion, Profesor
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+CAMPOS_FRANJA = ('id', 'codigo', 'nombre', 'dias', 'hora_inicio', 'hora_fin', 'fecha_inicio', 'fecha_fin')
+
+Franja = namedtuple(
+    'Franja', ('curso_id', 'codigo', 'nombre', 'dia', 'hora_inicio', 'hora_fin', 'fecha_inicio', 'fecha_fin')
+)
+
+
+def franja_curso(curso):
+    return Franja(*(getattr(curso, campo) for campo in CAMPOS_FRANJA))
+
+
+def se_cruzan(a, b):
+    return (
+        a.dia == b.dia
+        and a.hora_inicio < b.hora_fin and b.hora_inicio < a.hora_fin
+        and a.fecha_inicio <= b.fecha_fin and b.fecha_inicio <= a.fecha_fin
+    )
+
+
+def describir(franja):
+    return f"{franja.codigo} ({franja.dia} {franja.hora_inicio:%H:%M}-{franja.hora_fin:%H:%M})"
+
+
+def mensaje(conflictos):
+    return "El horario se superpone con " + ", ".join(map(describir, conflictos))
+
+
+def como_dict(franja):
+    return {
+        'id': franja.curso_id,
+        'codigo': franja.codigo,
+        'nombre': franja.nombre,
+        'dias': franja.dia,
+        'hora_inicio': franja.hora_inicio,
+        'hora_fin': franja.hora_fin,
+        'fecha_inicio': franja.fecha_inicio,
+        'fecha_fin': franja.fecha_fin,
+    }
+
+
+class IndiceHorario:
+    """Franjas de una persona por día, ordenadas por hora de inicio.
+
+    ``_fin_max[dia][i]`` es la mayor hora de fin entre las ``i + 1`` primeras
+    franjas del día: al recorrer hacia atrás desde la última que empieza
+    antes de que termine la franja buscada, se puede parar en cuanto ninguna
+    anterior llegue a su hora de inicio.
+    """
+
+    def __init__(self, franjas=()):
+        self._franjas = {}
+        self._fin_max = {}
+        for franja in sorted(franjas, key=lambda franja: franja.hora_inicio):
+            self._franjas.setdefault(franja.dia, []).append(franja)
+        for dia in self._franjas:
+            self._recalcular(dia)
+
+    def _recalcular(self, dia):
+        fin_max = []
+        for franja in self._franjas[dia]:
+            fin_max.append(max(fin_max[-1], franja.hora_fin) if fin_max else franja.hora_fin)
+        self._fin_max[dia] = fin_max
+
+    def __len__(self):
+        return sum(len(franjas) for franjas in self._franjas.values())
+
+    def agregar(self, franja):
+        insort(self._franjas.setdefault(franja.dia, []), franja, key=lambda franja: franja.hora_inicio)
+        self._recalcular(franja.dia)
+
+    def conflictos(self, franja):
+        """Franjas que chocan con ``franja``, sin contar el mismo curso."""
+        franjas = self._franjas.get(franja.dia)
+        if not franjas:
+            return []
+        fin_max = self._fin_max[franja.dia]
+        encontradas = []
+        i = bisect_left(franjas, franja.hora_fin, key=lambda franja: franja.hora_inicio) - 1
+        while i >= 0 and fin_max[i] > franja.hora_inicio:
+            otra = franjas[i]
+            if otra.curso_id != franja.curso_id and se_cruzan(franja, otra):
+                encontradas.append(otra)
+            i -= 1
+        encontradas.reverse()
+        return encontradas
+
+    def choques(self):
+        """Pares de franjas del índice que chocan entre sí, por día y hora."""
+        pares = []
+        for franjas in self._franjas.values():
+            # Barrido: cada franja contra las posteriores que empiezan antes de que termine
+            for i, franja in enumerate(franjas):
+                for otra in franjas[i + 1:]:
+                    if otra.hora_inicio >= franja.hora_fin:
+                        break
+                    if se_cruzan(franja, otra):
+                        pares.append((franja, otra))
+        return pares
+
+
+def clave_cache(tipo, persona_id):
+    return f'horario_{tipo}:{persona_id}'
+
+
+def _franjas(tipo, persona_ids):
+    if tipo == 'estudiante':
+        filas = Inscripcion.objects.filter(
+            estudiante_id__in=persona_ids, estado='ACTIVO', curso__activo=True
+        ).values_list('estudiante_id', *(f'curso__{campo}' for campo in CAMPOS_FRANJA))
+    else:
+        filas = Curso.objects.filter(
+            profesor_id__in=persona_ids, activo=True
+        ).values_list('profesor_id', *CAMPOS_FRANJA)
+    franjas = {persona_id: [] for persona_id in persona_ids}
+    for persona_id, *campos in filas:
+        franjas[persona_id].append(Franja(*campos))
+    return franjas
+
+
+def indices(tipo, persona_ids):
+    """``{persona_id: IndiceHorario}``; las que no están en caché se leen en una consulta."""
+    claves = {persona_id: clave_cache(tipo, persona_id) for persona_id in set(persona_ids)}
+    guardados = cache.get_many(claves.values())
+    resultado = {
+        persona_id: guardados[clave] for persona_id, clave in claves.items() if clave in guardados
+    }
+    faltantes = [persona_id for persona_id in claves if persona_id not in resultado]
+    if faltantes:
+        nuevos = {
+            persona_id: IndiceHorario(franjas)
+            for persona_id, franjas in _franjas(tipo, faltantes).items()
+        }
+        cache.set_many({claves[persona_id]: indice for persona_id, indice in nuevos.items()}, CACHE_TIMEOUT)
+        resultado.update(nuevos)
+    return resultado
+
+
+def indices_bloqueados(tipo, persona_ids):
+    """Como ``indices``, pero leídos de la base con las personas bloqueadas (``SELECT ... FOR UPDATE``).
+
+    Se llama dentro de ``transaction.atomic()`` y antes de escribir la
+    inscripción o el curso: dos peticiones que tocan a la misma persona se
+    esperan, y la segunda ve lo que confirmó la primera. Como en
+    ``Inscripcion.bloquear``, SQLite no bloquea filas y no le hace falta.
+    """
+    persona_ids = sorted(set(persona_ids))
+    if connection.features.has_select_for_update:
+        modelo = Estudiante if tipo == 'estudiante' else Profesor
+        list(
+            modelo.objects.select_for_update()
+            .filter(id__in=persona_ids).order_by('id').values_list('id', flat=True)
+        )
+    return {persona_id: IndiceHorario(franjas) for persona_id, franjas in _franjas(tipo, persona_ids).items()}
+
+
+def indice_estudiante(estudiante_id):
+    return indices('estudiante', [estudiante_id])[estudiante_id]
+
+
+def indice_profesor(profesor_id):
+    return indices('profesor', [profesor_id])[profesor_id]
+
+
+def invalidar(tipo, *persona_ids):
+    """Descarta los índices ahora y otra vez al confirmar la transacción.
+
+    El borrado inmediato hace que el resto de la transacción vea sus propias
+    escrituras; el segundo descarta lo que se haya cacheado entretanto.
+    """
+    claves = [clave_cache(tipo, persona_id) for persona_id in set(persona_ids) if persona_id is not None]
+    if claves:
+        cache.delete_many(claves)
+        transaction.on_commit(lambda: cache.delete_many(claves))
+
+
+def conflictos_curso(indice, curso):
+    """``[{'dia', 'cursos': [curso, otro]}]`` para cada curso del índice que choca con ``curso``."""
+    franja = franja_curso(curso)
+    return [
+        {'dia': franja.dia, 'cursos': [como_dict(franja), como_dict(otra)]}
+        for otra in indice.conflictos(franja)
+    ]
+
+
+def choques_indice(indice):
+    return [
+        {'dia': franja.dia, 'cursos': [como_dict(franja), como_dict(otra)]}
+        for franja, otra in indice.choques()
+    ]
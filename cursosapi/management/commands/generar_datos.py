@@ -0,0 +1,390 @@
+import random
+import time as reloj
+from datetime import date, time, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from cursosapi.models import (
+    Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia, ResumenAsistencia,
+    Eliminacion,
+)
+
+NOMBRES = (
+    'Ana', 'Luis', 'María', 'José', 'Carmen', 'Juan', 'Lucía', 'Carlos', 'Sofía', 'Miguel',
+    'Valentina', 'Diego', 'Camila', 'Andrés', 'Isabel', 'Jorge', 'Paula', 'Pedro', 'Elena',
+    'Fernando', 'Daniela', 'Ricardo', 'Gabriela', 'Javier', 'Natalia', 'Raúl', 'Mariana',
+    'Sergio', 'Verónica', 'Tomás',
+)
+APELLIDOS = (
+    'García', 'Rodríguez', 'González', 'Fernández', 'López', 'Martínez', 'Sánchez', 'Pérez',
+    'Gómez', 'Martín', 'Jiménez', 'Ruiz', 'Hernández', 'Díaz', 'Moreno', 'Muñoz', 'Álvarez',
+    'Romero', 'Alonso', 'Gutiérrez', 'Navarro', 'Torres', 'Domínguez', 'Vázquez', 'Ramos',
+    'Gil', 'Ramírez', 'Serrano', 'Blanco', 'Molina', 'Castro', 'Ortiz', 'Rubio', 'Núñez',
+)
+AREAS = (
+    ('MAT', 'Matemáticas', ('Cálculo', 'Álgebra', 'Estadística', 'Geometría')),
+    ('FIS', 'Física', ('Mecánica', 'Electromagnetismo', 'Óptica', 'Termodinámica')),
+    ('QUI', 'Química', ('Química General', 'Química Orgánica', 'Bioquímica')),
+    ('INF', 'Informática', ('Programación', 'Bases de Datos', 'Redes', 'Algoritmos')),
+    ('HIS', 'Historia', ('Historia Universal', 'Historia del Arte', 'Historia Moderna')),
+    ('LEN', 'Lengua', ('Redacción', 'Literatura', 'Lingüística')),
+    ('ECO', 'Economía', ('Microeconomía', 'Macroeconomía', 'Contabilidad', 'Finanzas')),
+    ('BIO', 'Biología', ('Biología Celular', 'Genética', 'Ecología')),
+)
+# Casi todo se dicta entre semana; el sábado es minoritario
+PESOS_DIAS = {'LUN': 20, 'MAR': 20, 'MIE': 20, 'JUE': 20, 'VIE': 15, 'SAB': 5, 'DOM': 0}
+DIAS_SEMANA = {codigo: numero for numero, (codigo, _) in enumerate(Curso.DIAS_CHOICES)}
+CUPOS = ((25, 15), (40, 25), (60, 25), (90, 15), (150, 12), (250, 8))
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos a escala (profesores, cursos, estudiantes, inscripciones, "
+        "calificaciones y asistencia) para reproducir la carga de producción."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profesores', type=int, default=200)
+        parser.add_argument('--cursos', type=int, default=2000)
+        parser.add_argument('--estudiantes', type=int, default=50000)
+        parser.add_argument(
+            '--cursos-por-estudiante', type=float, default=5,
+            help="Media de inscripciones por estudiante."
+        )
+        parser.add_argument(
+            '--desde', type=date.fromisoformat, default=date(date.today().year, 1, 1),
+            help="Primer día del periodo lectivo (YYYY-MM-DD); por defecto el 1 de enero actual."
+        )
+        parser.add_argument(
+            '--dias', type=int, default=365,
+            help="Duración del periodo con asistencia diaria; se divide en dos semestres."
+        )
+        parser.add_argument('--semilla', type=int, default=0, help="Semilla del generador aleatorio.")
+        parser.add_argument('--lote', type=int, default=5000, help="Filas por bulk_create.")
+        parser.add_argument(
+            '--rapido', action='store_true',
+            help="SQLite: PRAGMAs de carga masiva e índices reconstruidos al final."
+        )
+        parser.add_argument(
+            '--limpiar', action='store_true',
+            help="Borra los datos existentes de cursosapi antes de generar."
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['semilla'])
+        self.lote = options['lote']
+
+        if options['limpiar']:
+            self.limpiar()
+        elif Estudiante.objects.exists() or Curso.objects.exists():
+            raise CommandError("Ya hay datos en la base; use --limpiar para reemplazarlos.")
+
+        rapido = self.rapido = options['rapido'] and connection.vendor == 'sqlite'
+        if options['rapido'] and not rapido:
+            self.stdout.write(self.style.WARNING(
+                "--rapido solo tiene efecto con SQLite; se usa la carga normal."
+            ))
+
+        inicio = reloj.monotonic()
+        pragmas = self.activar_modo_rapido() if rapido else {}
+        indices = self.quitar_indices() if rapido else []
+        try:
+            with transaction.atomic():
+                profesor_ids = self.generar_profesores(options['profesores'])
+                cursos = self.generar_cursos(options['cursos'], profesor_ids, options['desde'], options['dias'])
+                estudiante_ids = self.generar_estudiantes(options['estudiantes'], options['desde'])
+                self.generar_inscripciones(estudiante_ids, cursos, options['cursos_por_estudiante'])
+                self.generar_calificaciones_y_asistencia(estudiante_ids, cursos)
+        finally:
+            if indices:
+                self.restaurar_indices(indices)
+            if pragmas:
+                self.restaurar_pragmas(pragmas)
+
+        # bulk_create no envía señales: los datos derivados se reconstruyen aquí
+        call_command('recalcular_inscritos', stdout=self.stdout)
+        call_command('reconstruir_indice_busqueda', stdout=self.stdout)
+        cache.clear()
+        if rapido:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Datos generados en {reloj.monotonic() - inicio:.1f} s."
+        ))
+
+    # Carga
+
+    def insertar(self, modelo, objetos):
+        """Inserta ``objetos`` (iterable, posiblemente perezoso) en lotes."""
+        objetos = iter(objetos)
+        total = 0
+        while True:
+            lote = list(islice(objetos, self.lote))
+            if not lote:
+                break
+            modelo.objects.bulk_create(lote, batch_size=self.lote)
+            total += len(lote)
+        return total
+
+    def insertar_asistencias(self, filas):
+        """Inserta ``(inscripcion_id, fecha, presente, justificada)``.
+
+        Es la tabla que concentra el volumen: en modo rápido se evita crear una
+        instancia por fila y se usa ``executemany`` con valores ya adaptados.
+        """
+        if not self.rapido:
+            return self.insertar(Asistencia, (
+                Asistencia(inscripcion_id=inscripcion_id, fecha=fecha, presente=presente, justificada=justificada)
+                for inscripcion_id, fecha, presente, justificada in filas
+            ))
+        ahora = connection.ops.adapt_datetimefield_value(timezone.now())
+        fechas = {
+            fecha: connection.ops.adapt_datefield_value(fecha)
+            for fecha in {fila[1] for fila in filas}
+        }
+        sql = (
+            f"INSERT INTO {connection.ops.quote_name(Asistencia._meta.db_table)} "
+            f"(inscripcion_id, fecha, presente, justificada, observaciones, updated_at) "
+            f"VALUES (%s, %s, %s, %s, '', %s)"
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [
+                (inscripcion_id, fechas[fecha], presente, justificada, ahora)
+                for inscripcion_id, fecha, presente, justificada in filas
+            ])
+        return len(filas)
+
+    def informar(self, modelo, total):
+        self.stdout.write(f"  {total} {modelo._meta.verbose_name_plural}")
+
+    def limpiar(self):
+        # DELETE directo: Model.delete() recorrería las filas para enviar señales
+        with transaction.atomic(), connection.cursor() as cursor:
+            for modelo in (
+                Eliminacion, ResumenAsistencia, Asistencia, Calificacion, Inscripcion,
+                Estudiante, Curso, Profesor,
+            ):
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(modelo._meta.db_table)}")
+        self.stdout.write("Datos anteriores borrados.")
+
+    def activar_modo_rapido(self):
+        """Ajusta PRAGMAs de SQLite para carga masiva y devuelve los valores previos."""
+        nuevos = {'cache_size': -262144}
+        # Estos no pueden cambiarse dentro de una transacción (p. ej. en los tests)
+        if not connection.in_atomic_block:
+            nuevos.update({'journal_mode': 'MEMORY', 'synchronous': 'OFF', 'temp_store': 'MEMORY'})
+        anteriores = {}
+        with connection.cursor() as cursor:
+            for pragma, valor in nuevos.items():
+                cursor.execute(f'PRAGMA {pragma}')
+                anteriores[pragma] = cursor.fetchone()[0]
+                cursor.execute(f'PRAGMA {pragma} = {valor}')
+        return anteriores
+
+    def restaurar_pragmas(self, anteriores):
+        with connection.cursor() as cursor:
+            for pragma, valor in anteriores.items():
+                cursor.execute(f'PRAGMA {pragma} = {valor}')
+
+    def quitar_indices(self):
+        """Borra los índices secundarios de las tablas a cargar para crearlos al final.
+
+        Los índices de restricciones UNIQUE (sin ``sql`` en ``sqlite_master``)
+        no pueden borrarse y se mantienen.
+        """
+        tablas = [
+            modelo._meta.db_table for modelo in (
+                Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia,
+                ResumenAsistencia,
+            )
+        ]
+        marcadores = ', '.join(['%s'] * len(tablas))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                f"AND sql IS NOT NULL AND tbl_name IN ({marcadores})",
+                tablas
+            )
+            indices = cursor.fetchall()
+            for nombre, _ in indices:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(nombre)}')
+        return indices
+
+    def restaurar_indices(self, indices):
+        inicio = reloj.monotonic()
+        with connection.cursor() as cursor:
+            for _, sql in indices:
+                cursor.execute(sql)
+        self.stdout.write(
+            f"  {len(indices)} índices reconstruidos en {reloj.monotonic() - inicio:.1f} s"
+        )
+
+    # Generadores
+
+    def persona(self, indice, dominio):
+        nombre = self.rng.choice(NOMBRES)
+        apellido = f"{self.rng.choice(APELLIDOS)} {self.rng.choice(APELLIDOS)}"
+        email = f"{nombre.lower()}.{indice}@{dominio}"
+        telefono = f"+34 6{self.rng.randrange(10 ** 8):08d}" if self.rng.random() < 0.7 else None
+        return nombre, apellido, email, telefono
+
+    def generar_profesores(self, cantidad):
+        def profesores():
+            for i in range(cantidad):
+                nombre, apellido, email, telefono = self.persona(i, 'profesores.example.com')
+                yield Profesor(
+                    nombre=nombre, apellido=apellido, email=email, telefono=telefono,
+                    especialidad=self.rng.choice(AREAS)[1],
+                    fecha_contratacion=date(2000, 1, 1) + timedelta(days=self.rng.randrange(9000)),
+                    activo=self.rng.random() < 0.95
+                )
+        self.informar(Profesor, self.insertar(Profesor, profesores()))
+        return list(Profesor.objects.order_by('id').values_list('id', flat=True))
+
+    def generar_cursos(self, cantidad, profesor_ids, desde, dias):
+        """Devuelve ``[(id, cupo_maximo, sesiones)]`` en orden de creación."""
+        mitad = timedelta(days=dias // 2)
+        semestres = [(desde, desde + mitad - timedelta(days=1)), (desde + mitad, desde + timedelta(days=dias - 1))]
+        codigos_dias = list(PESOS_DIAS)
+        pesos_dias = list(PESOS_DIAS.values())
+        cupos, pesos_cupos = zip(*CUPOS)
+        definiciones = []
+
+        def cursos():
+            for i in range(cantidad):
+                prefijo, _, materias = self.rng.choice(AREAS)
+                inicio, fin = semestres[i % 2]
+                dia = self.rng.choices(codigos_dias, pesos_dias)[0]
+                hora = self.rng.randrange(7, 20)
+                duracion = self.rng.choice((1, 2, 2, 3))
+                cupo = self.rng.choices(cupos, pesos_cupos)[0]
+                definiciones.append((cupo, self.sesiones(inicio, fin, dia)))
+                yield Curso(
+                    codigo=f"{prefijo}{i:05d}",
+                    nombre=f"{self.rng.choice(materias)} {self.rng.choice('IIIV')}",
+                    descripcion='',
+                    creditos=self.rng.choice((2, 3, 4, 4, 6)),
+                    profesor_id=self.rng.choice(profesor_ids) if profesor_ids and self.rng.random() < 0.95 else None,
+                    cupo_maximo=cupo,
+                    dias=dia,
+                    hora_inicio=time(hora),
+                    hora_fin=time(min(hora + duracion, 23)),
+                    fecha_inicio=inicio,
+                    fecha_fin=fin,
+                    activo=True
+                )
+        self.informar(Curso, self.insertar(Curso, cursos()))
+        ids = Curso.objects.order_by('id').values_list('id', flat=True)
+        return [(curso_id, cupo, sesiones) for curso_id, (cupo, sesiones) in zip(ids, definiciones)]
+
+    @staticmethod
+    def sesiones(inicio, fin, dia):
+        primera = inicio + timedelta(days=(DIAS_SEMANA[dia] - inicio.weekday()) % 7)
+        return [primera + timedelta(weeks=semana) for semana in range((fin - primera).days // 7 + 1)]
+
+    def generar_estudiantes(self, cantidad, desde):
+        def estudiantes():
+            for i in range(cantidad):
+                nombre, apellido, email, telefono = self.persona(i, 'alumnos.example.com')
+                ingreso = date(desde.year - self.rng.choice((0, 0, 1, 1, 2, 3, 4)), 8, 1)
+                yield Estudiante(
+                    matricula=f"E{i:08d}", nombre=nombre, apellido=apellido, email=email,
+                    telefono=telefono,
+                    fecha_nacimiento=ingreso - timedelta(days=365 * 18 + self.rng.randrange(2000)),
+                    fecha_ingreso=ingreso,
+                    activo=self.rng.random() < 0.97
+                )
+        self.informar(Estudiante, self.insertar(Estudiante, estudiantes()))
+        return list(Estudiante.objects.order_by('id').values_list('id', flat=True))
+
+    def generar_inscripciones(self, estudiante_ids, cursos, media):
+        # Popularidad tipo Zipf: unos pocos cursos concentran la demanda
+        orden = list(range(len(cursos)))
+        self.rng.shuffle(orden)
+        pesos = [0.0] * len(cursos)
+        for rango, posicion in enumerate(orden, start=1):
+            pesos[posicion] = 1 / rango ** 0.8
+        acumulados = []
+        total = 0
+        for peso in pesos:
+            total += peso
+            acumulados.append(total)
+        ocupados = [0] * len(cursos)
+
+        def inscripciones():
+            for estudiante_id in estudiante_ids:
+                cantidad = max(1, min(len(cursos), round(self.rng.gauss(media, 1.5))))
+                elegidos = set()
+                for posicion in self.rng.choices(range(len(cursos)), cum_weights=acumulados, k=cantidad * 4):
+                    if len(elegidos) == cantidad:
+                        break
+                    if posicion in elegidos:
+                        continue
+                    curso_id, cupo, _ = cursos[posicion]
+                    sorteo = self.rng.random()
+                    estado = 'BAJA' if sorteo < 0.08 else 'COMPLETO' if sorteo < 0.13 else 'ACTIVO'
+                    if estado == 'ACTIVO':
+                        if ocupados[posicion] >= cupo:
+                            continue
+                        ocupados[posicion] += 1
+                    elegidos.add(posicion)
+                    yield Inscripcion(estudiante_id=estudiante_id, curso_id=curso_id, estado=estado)
+        self.informar(Inscripcion, self.insertar(Inscripcion, inscripciones()))
+
+    def generar_calificaciones_y_asistencia(self, estudiante_ids, cursos):
+        """Recorre las inscripciones por páginas de id y genera sus filas dependientes.
+
+        Cada estudiante tiene una "aptitud" que sesga a la vez sus notas y su
+        asistencia, como ocurre con datos reales.
+        """
+        aptitud = {estudiante_id: self.rng.gauss(0, 1) for estudiante_id in estudiante_ids}
+        sesiones = {curso_id: fechas for curso_id, _, fechas in cursos}
+        totales = {Calificacion: 0, Asistencia: 0, ResumenAsistencia: 0}
+        ultimo_id = 0
+        while True:
+            pagina = list(
+                Inscripcion.objects.filter(id__gt=ultimo_id).order_by('id')
+                .values_list('id', 'estudiante_id', 'curso_id', 'estado')[:self.lote]
+            )
+            if not pagina:
+                break
+            ultimo_id = pagina[-1][0]
+            calificaciones, asistencias, resumenes = [], [], []
+            for inscripcion_id, estudiante_id, curso_id, estado in pagina:
+                sesgo = aptitud[estudiante_id]
+                if estado == 'COMPLETO' or (estado == 'ACTIVO' and self.rng.random() < 0.6):
+                    valor = min(10.0, max(0.0, self.rng.gauss(7 + sesgo, 1.3)))
+                    calificaciones.append(Calificacion(
+                        inscripcion_id=inscripcion_id,
+                        valor=Decimal(round(valor * 4) / 4).quantize(Decimal('0.01'))
+                    ))
+
+                fechas = sesiones[curso_id]
+                if estado == 'BAJA':
+                    fechas = fechas[:self.rng.randrange(len(fechas) + 1)]
+                probabilidad = min(0.99, max(0.3, self.rng.gauss(0.85 + sesgo * 0.05, 0.08)))
+                resumen = ResumenAsistencia(inscripcion_id=inscripcion_id, sesiones=len(fechas))
+                for fecha in fechas:
+                    presente = self.rng.random() < probabilidad
+                    justificada = not presente and self.rng.random() < 0.3
+                    if presente:
+                        resumen.presentes += 1
+                    elif justificada:
+                        resumen.justificadas += 1
+                    else:
+                        resumen.ausentes += 1
+                    asistencias.append((inscripcion_id, fecha, presente, justificada))
+                if fechas:
+                    resumenes.append(resumen)
+
+            totales[Calificacion] += self.insertar(Calificacion, calificaciones)
+            totales[Asistencia] += self.insertar_asistencias(asistencias)
+            totales[ResumenAsistencia] += self.insertar(ResumenAsistencia, resumenes)
+        for modelo, total in totales.items():
+            self.informar(modelo, total)
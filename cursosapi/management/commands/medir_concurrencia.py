@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from cursosapi import rendimiento
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga de las lecturas frecuentes con muchas peticiones a la vez: "
+        "viewsets de DRF bajo WSGI frente a las vistas async bajo ASGI, en el mismo proceso."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--escala', default='mediana', choices=list(rendimiento.ESCALAS),
+            help="Tamaño de los datos generados."
+        )
+        parser.add_argument('--concurrencia', type=int, default=32, help="Clientes simultáneos.")
+        parser.add_argument('--peticiones', type=int, default=400, help="Peticiones por endpoint y servidor.")
+        parser.add_argument(
+            '--hilos-wsgi', type=int, default=4, help="Hilos del servidor WSGI (0 = uno por cliente)."
+        )
+        parser.add_argument(
+            '--latencia-db', type=float, default=1.0,
+            help="Milisegundos de ida y vuelta simulados en cada consulta."
+        )
+        parser.add_argument('--semilla', type=int, default=0)
+
+    def handle(self, *args, **options):
+        # Base de datos de pruebas aparte: generar_datos borra lo que encuentra
+        setup_test_environment(debug=False)
+        nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Generando datos '{options['escala']}'...")
+            call_command(
+                'generar_datos', limpiar=True, rapido=True, semilla=options['semilla'],
+                stdout=StringIO(), **rendimiento.ESCALAS[options['escala']]
+            )
+            resultados = rendimiento.medir_concurrencia(
+                options['concurrencia'], options['peticiones'], options['hilos_wsgi'], options['latencia_db']
+            )
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'endpoint':<26} {'wsgi req/s':>10} {'p50':>7} {'p95':>7} "
+            f"{'asgi req/s':>10} {'p50':>7} {'p95':>7} {'x':>5} {'igual':>6}"
+        )
+        for nombre, medida in resultados.items():
+            self.stdout.write(
+                f"{nombre:<26} {medida['wsgi_peticiones_s']:>10} {medida['wsgi_p50_ms']:>7} "
+                f"{medida['wsgi_p95_ms']:>7} {medida['asgi_peticiones_s']:>10} {medida['asgi_p50_ms']:>7} "
+                f"{medida['asgi_p95_ms']:>7} {medida['relacion']:>5} {'sí' if medida['igual'] else 'NO':>6}"
+            )
+        distintas = [nombre for nombre, medida in resultados.items() if not medida['igual']]
+        if distintas:
+            raise CommandError(f"Respuestas distintas o con error en: {', '.join(distintas)}")
+        self.stdout.write(self.style.SUCCESS("WSGI y ASGI devuelven las mismas respuestas."))
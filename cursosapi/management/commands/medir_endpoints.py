@@ -0,0 +1,96 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from cursosapi import rendimiento
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide latencia, consultas, filas y memoria de cada endpoint sobre datos generados "
+        "de tamaño creciente y falla si hay regresiones respecto de la línea base."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--escalas', default='pequena,mediana',
+            help=f"Escalas separadas por comas: {', '.join(rendimiento.ESCALAS)}."
+        )
+        parser.add_argument('--repeticiones', type=int, default=15)
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--solo', help="Mide solo los endpoints cuyo nombre contiene este texto.")
+        parser.add_argument(
+            '--umbral', type=float, default=1.0,
+            help="Aumento relativo tolerado en latencia p50 y memoria (1.0 = el doble)."
+        )
+        parser.add_argument('--linea-base', default=str(rendimiento.LINEA_BASE))
+        parser.add_argument(
+            '--guardar', action='store_true',
+            help="Escribe los resultados de las escalas medidas en la línea base en lugar de comparar."
+        )
+
+    def handle(self, *args, **options):
+        escalas = [escala.strip() for escala in options['escalas'].split(',') if escala.strip()]
+        desconocidas = set(escalas) - set(rendimiento.ESCALAS)
+        if desconocidas:
+            raise CommandError(f"Escalas desconocidas: {', '.join(sorted(desconocidas))}")
+
+        # Base de datos de pruebas aparte: generar_datos borra lo que encuentra
+        setup_test_environment(debug=False)
+        nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            resultados = {}
+            for escala in escalas:
+                self.stdout.write(f"Generando datos '{escala}'...")
+                call_command(
+                    'generar_datos', limpiar=True, rapido=True, semilla=options['semilla'],
+                    stdout=StringIO(), **rendimiento.ESCALAS[escala]
+                )
+                resultados[escala] = rendimiento.medir(options['repeticiones'], options['solo'])
+                self.mostrar(escala, resultados[escala])
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        problemas = [
+            f"N+1 {problema}" for problema in rendimiento.crecimiento_consultas(resultados)
+        ]
+        if options['guardar']:
+            # Solo se reemplazan las escalas medidas; las demás siguen en la base
+            try:
+                with open(options['linea_base'], encoding='utf-8') as archivo:
+                    base = json.load(archivo)
+            except FileNotFoundError:
+                base = {}
+            with open(options['linea_base'], 'w', encoding='utf-8') as archivo:
+                json.dump({**base, **resultados}, archivo, indent=2, sort_keys=True)
+                archivo.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Línea base guardada en {options['linea_base']}"))
+        else:
+            try:
+                with open(options['linea_base'], encoding='utf-8') as archivo:
+                    base = json.load(archivo)
+            except FileNotFoundError:
+                base = {}
+                self.stdout.write(self.style.WARNING("No hay línea base; solo se revisa el crecimiento de consultas."))
+            problemas += rendimiento.comparar(resultados, base, options['umbral'])
+
+        if problemas:
+            for problema in problemas:
+                self.stderr.write(f"  {problema}")
+            raise CommandError(f"{len(problemas)} regresiones de rendimiento.")
+        self.stdout.write(self.style.SUCCESS("Sin regresiones."))
+
+    def mostrar(self, escala, resultados):
+        self.stdout.write(
+            f"{'endpoint':<40} {'estado':>6} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'consultas':>9} {'filas':>8} {'mem KB':>8}"
+        )
+        for nombre, medida in resultados.items():
+            self.stdout.write(
+                f"{nombre:<40} {medida['estado']:>6} {medida['p50_ms']:>8} {medida['p95_ms']:>8} "
+                f"{medida['consultas']:>9} {medida['filas']:>8} {medida['memoria_kb']:>8}"
+            )
@@ -0,0 +1,51 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from cursosapi import rendimiento
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el renderer JSON configurado con el JSONRenderer de DRF sobre las respuestas "
+        "más grandes de datos generados: tiempo, tamaño con y sin gzip y si los bytes coinciden."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--escala', default='mediana', choices=list(rendimiento.ESCALAS),
+            help="Tamaño de los datos generados."
+        )
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--semilla', type=int, default=0)
+
+    def handle(self, *args, **options):
+        # Base de datos de pruebas aparte: generar_datos borra lo que encuentra
+        setup_test_environment(debug=False)
+        nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Generando datos '{options['escala']}'...")
+            call_command(
+                'generar_datos', limpiar=True, rapido=True, semilla=options['semilla'],
+                stdout=StringIO(), **rendimiento.ESCALAS[options['escala']]
+            )
+            resultados = rendimiento.medir_renderizado(options['repeticiones'])
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'carga':<28} {'bytes':>9} {'gzip':>8} {'drf ms':>8} {'nuevo ms':>9} {'x':>5} {'igual':>6}"
+        )
+        for nombre, medida in resultados.items():
+            self.stdout.write(
+                f"{nombre:<28} {medida['bytes']:>9} {medida['bytes_gzip']:>8} {medida['drf_ms']:>8} "
+                f"{medida['configurado_ms']:>9} {medida['aceleracion']:>5} {'sí' if medida['igual'] else 'NO':>6}"
+            )
+        distintas = [nombre for nombre, medida in resultados.items() if not medida['igual']]
+        if distintas:
+            raise CommandError(f"Salida distinta de la de DRF en: {', '.join(distintas)}")
+        renderer = next(iter(resultados.values()))['renderer'] if resultados else '-'
+        self.stdout.write(self.style.SUCCESS(f"{renderer}: misma salida que JSONRenderer."))
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from cursosapi.models import Eliminacion
+
+
+class Command(BaseCommand):
+    help = "Borra el registro de eliminaciones más antiguo que la retención de sincronización."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=getattr(settings, 'SINCRONIZACION_RETENCION_DIAS', 90),
+            help="Días de registro a conservar."
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(days=options['dias'])
+        borrados, _ = Eliminacion.objects.filter(eliminado_en__lt=limite).delete()
+        self.stdout.write(self.style.SUCCESS(f"{borrados} eliminaciones purgadas."))
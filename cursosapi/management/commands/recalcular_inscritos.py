@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from cursosapi.models import Curso, Inscripcion
+
+
+class Command(BaseCommand):
+    help = "Recalcula Curso.inscritos_activos a partir de las inscripciones activas."
+
+    def handle(self, *args, **options):
+        activos = (
+            Inscripcion.objects
+            .filter(curso=OuterRef('pk'), estado='ACTIVO')
+            .order_by()
+            .values('curso')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        with transaction.atomic():
+            actualizados = Curso.objects.update(
+                inscritos_activos=Coalesce(
+                    Subquery(activos, output_field=IntegerField()),
+                    Value(0)
+                ),
+                updated_at=timezone.now()
+            )
+        self.stdout.write(self.style.SUCCESS(f"{actualizados} cursos recalculados."))
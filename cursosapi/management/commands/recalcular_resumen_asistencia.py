@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from cursosapi.models import ResumenAsistencia
+
+
+class Command(BaseCommand):
+    help = "Reconstruye ResumenAsistencia a partir de todos los registros de Asistencia."
+
+    def handle(self, *args, **options):
+        total = ResumenAsistencia.recalcular()
+        self.stdout.write(self.style.SUCCESS(f"{total} resúmenes de asistencia recalculados."))
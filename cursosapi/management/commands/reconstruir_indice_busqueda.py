@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from cursosapi import busqueda
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de texto completo de estudiantes, profesores y cursos."
+
+    def handle(self, *args, **options):
+        if not busqueda.soportado():
+            self.stdout.write(self.style.WARNING("El motor de base de datos no tiene índice de búsqueda."))
+            return
+        with transaction.atomic():
+            total = busqueda.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f"{total} filas indexadas."))
@@ -0,0 +1,336 @@
+"""Instrumentación por petición: consultas, tiempos por fase y tamaño de respuesta.
+
+``MetricasMiddleware`` mide cada petición y añade la cabecera ``Server-Timing``
+(``db``, ``vista``, ``serializador``, ``render`` y ``total``). Los valores se
+acumulan en histogramas por ruta (``ViewSet.accion``) que ``vista_metricas``
+expone en formato de texto de Prometheus. Los histogramas son acumulativos,
+como espera Prometheus: las ventanas móviles se obtienen con ``rate()`` al
+consultarlos. Cada proceso lleva sus propios contadores.
+
+Las consultas se miden con un ``execute_wrapper`` instalado en cada conexión
+nueva (ver ``signals.py``); las que superan ``METRICAS_CONSULTA_LENTA_MS`` se
+registran en el logger ``cursosapi.metricas`` con su SQL y el punto del código
+que las lanzó.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+_medicion = contextvars.ContextVar('medicion', default=None)
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_CONSULTAS = (1, 2, 3, 5, 10, 20, 50, 100)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_DIRECTORIO_PROYECTO = str(getattr(settings, 'BASE_DIR', ''))
+
+
+class Medicion:
+    """Contadores de una petición en curso."""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.db = 0.0
+        self.serializador = 0.0
+        self.serializando = False
+        self.inicio_vista = None
+        self.fin_vista = None
+
+
+def medicion_actual():
+    return _medicion.get()
+
+
+@contextmanager
+def medir_serializacion():
+    """Suma el bloque al tiempo de serialización (sin contar anidamientos)."""
+    medicion = _medicion.get()
+    if medicion is None or medicion.serializando:
+        yield
+        return
+    medicion.serializando = True
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicion.serializador += time.perf_counter() - inicio
+        medicion.serializando = False
+
+
+class MedicionSerializerMixin:
+    """Cuenta el tiempo de ``to_representation`` como tiempo de serializador."""
+
+    def to_representation(self, instance):
+        with medir_serializacion():
+            return super().to_representation(instance)
+
+
+# Consultas
+
+def _punto_de_llamada():
+    """Primer marco de la pila dentro del proyecto (fuera de este módulo)."""
+    for marco in reversed(traceback.extract_stack()[:-2]):
+        if (
+            marco.filename.startswith(_DIRECTORIO_PROYECTO)
+            and 'site-packages' not in marco.filename
+            and marco.filename != __file__
+        ):
+            return f"{marco.filename}:{marco.lineno} en {marco.name}"
+    return "desconocido"
+
+
+def medir_consulta(execute, sql, params, many, context):
+    """``execute_wrapper`` para todas las conexiones."""
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracion = time.perf_counter() - inicio
+        medicion = _medicion.get()
+        if medicion is not None:
+            medicion.consultas += 1
+            medicion.db += duracion
+        limite = getattr(settings, 'METRICAS_CONSULTA_LENTA_MS', 100)
+        if limite is not None and duracion * 1000 >= limite:
+            logger.warning(
+                "Consulta lenta (%.1f ms) desde %s: %s",
+                duracion * 1000, _punto_de_llamada(), sql,
+                extra={'sql': sql, 'params': params, 'duracion_ms': duracion * 1000}
+            )
+
+
+def instalar_en_conexion(sender, connection, **kwargs):
+    """Receptor de ``connection_created``."""
+    if medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(medir_consulta)
+
+
+# Registro de histogramas
+
+class Histograma:
+    def __init__(self, nombre, ayuda, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = buckets
+        self.series = {}
+
+    def observar(self, etiquetas, valor):
+        serie = self.series.get(etiquetas)
+        if serie is None:
+            serie = self.series[etiquetas] = {'cuentas': [0] * len(self.buckets), 'suma': 0.0, 'total': 0}
+        indice = bisect.bisect_left(self.buckets, valor)
+        if indice < len(self.buckets):
+            serie['cuentas'][indice] += 1
+        serie['suma'] += valor
+        serie['total'] += 1
+
+    def exponer(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        for etiquetas, serie in sorted(self.series.items()):
+            base = ','.join(f'{clave}="{_escapar(valor)}"' for clave, valor in etiquetas)
+            acumulado = 0
+            for limite, cuenta in zip(self.buckets, serie['cuentas']):
+                acumulado += cuenta
+                lineas.append(f'{self.nombre}_bucket{{{base},le="{limite}"}} {acumulado}')
+            lineas.append(f'{self.nombre}_bucket{{{base},le="+Inf"}} {serie["total"]}')
+            lineas.append(f'{self.nombre}_sum{{{base}}} {serie["suma"]}')
+            lineas.append(f'{self.nombre}_count{{{base}}} {serie["total"]}')
+        return lineas
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_candado = threading.Lock()
+HISTOGRAMAS = {
+    'duracion': Histograma(
+        'cursosapi_request_duration_seconds', 'Duración total de la petición.', BUCKETS_SEGUNDOS
+    ),
+    'db': Histograma(
+        'cursosapi_db_duration_seconds', 'Tiempo en consultas SQL por petición.', BUCKETS_SEGUNDOS
+    ),
+    'consultas': Histograma(
+        'cursosapi_db_queries', 'Consultas SQL por petición.', BUCKETS_CONSULTAS
+    ),
+    'vista': Histograma(
+        'cursosapi_view_duration_seconds', 'Tiempo dentro de la vista.', BUCKETS_SEGUNDOS
+    ),
+    'serializador': Histograma(
+        'cursosapi_serializer_duration_seconds', 'Tiempo de serialización.', BUCKETS_SEGUNDOS
+    ),
+    'bytes': Histograma(
+        'cursosapi_response_size_bytes', 'Tamaño del cuerpo de la respuesta.', BUCKETS_BYTES
+    ),
+}
+
+
+def observar(ruta, metodo, valores):
+    etiquetas = (('metodo', metodo), ('ruta', ruta))
+    with _candado:
+        for clave, valor in valores.items():
+            HISTOGRAMAS[clave].observar(etiquetas, valor)
+
+
+def reiniciar():
+    with _candado:
+        for histograma in HISTOGRAMAS.values():
+            histograma.series.clear()
+
+
+def exponer():
+    with _candado:
+        lineas = [linea for histograma in HISTOGRAMAS.values() for linea in histograma.exponer()]
+    return '\n'.join(lineas) + '\n'
+
+
+def nombre_ruta(request):
+    """``ViewSet.accion`` para vistas de DRF, el nombre de la URL en otro caso."""
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        return 'sin_ruta'
+    vista = coincidencia.func
+    # Las vistas de ``asincrono`` se registran con el nombre de la acción que sustituyen
+    if getattr(vista, 'ruta_metricas', None):
+        return vista.ruta_metricas
+    clase = getattr(vista, 'cls', None)
+    acciones = getattr(vista, 'actions', None)
+    if clase is not None and acciones:
+        return f"{clase.__name__}.{acciones.get(request.method.lower(), request.method.lower())}"
+    if clase is not None:
+        return clase.__name__
+    return coincidencia.view_name or 'sin_nombre'
+
+
+def vista_metricas(request):
+    """``/metrics``: solo para las IPs de ``INTERNAL_IPS``."""
+    if request.META.get('REMOTE_ADDR') not in settings.INTERNAL_IPS:
+        raise Http404
+    return HttpResponse(exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class MetricasMiddleware:
+    """Mide la petición; va al final de ``MIDDLEWARE`` para rodear solo a la vista.
+
+    Funciona en las dos cadenas de middleware: bajo ASGI no obliga a Django a
+    pasar cada petición por un hilo.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django adapta estos ganchos según sean corrutinas o no
+            self.process_view = self._aprocess_view
+            self.process_template_response = self._aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self.registrar(request, medicion, response)
+
+    async def __acall__(self, request):
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self.registrar(request, medicion, response)
+
+    def registrar(self, request, medicion, response):
+        fin = time.perf_counter()
+
+        total = fin - medicion.inicio
+        vista = render = None
+        if medicion.inicio_vista is not None:
+            fin_vista = medicion.fin_vista or fin
+            vista = fin_vista - medicion.inicio_vista
+            render = fin - fin_vista
+
+        fases = [('db', medicion.db, f'{medicion.consultas} consultas')]
+        if vista is not None:
+            fases += [('vista', vista, None), ('serializador', medicion.serializador, None)]
+            fases.append(('render', render, None))
+        fases.append(('total', total, None))
+        response['Server-Timing'] = ', '.join(
+            f'{nombre};dur={segundos * 1000:.2f}' + (f';desc="{descripcion}"' if descripcion else '')
+            for nombre, segundos, descripcion in fases
+        )
+
+        ruta = nombre_ruta(request)
+        valores = {
+            'duracion': total,
+            'db': medicion.db,
+            'consultas': medicion.consultas,
+            'serializador': medicion.serializador,
+        }
+        if vista is not None:
+            valores['vista'] = vista
+        if response.streaming:
+            # El tamaño solo se conoce cuando termina de enviarse
+            contar = self._acontar_bytes if response.is_async else self._contar_bytes
+            response.streaming_content = contar(response.streaming_content, ruta, request.method)
+        else:
+            valores['bytes'] = len(response.content)
+        observar(ruta, request.method, valores)
+        return response
+
+    @staticmethod
+    def _contar_bytes(contenido, ruta, metodo):
+        total = 0
+        try:
+            for fragmento in contenido:
+                total += len(fragmento)
+                yield fragmento
+        finally:
+            observar(ruta, metodo, {'bytes': total})
+
+    @staticmethod
+    async def _acontar_bytes(contenido, ruta, metodo):
+        total = 0
+        try:
+            async for fragmento in contenido:
+                total += len(fragmento)
+                yield fragmento
+        finally:
+            observar(ruta, metodo, {'bytes': total})
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        medicion = _medicion.get()
+        if medicion is not None:
+            medicion.inicio_vista = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Las respuestas de DRF se renderizan después de este punto
+        medicion = _medicion.get()
+        if medicion is not None:
+            medicion.fin_vista = time.perf_counter()
+        return response
+
+    # Sin ``self.``: en modo async esos nombres apuntan a estas versiones
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return MetricasMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
+
+    async def _aprocess_template_response(self, request, response):
+        return MetricasMiddleware.process_template_response(self, request, response)
@@ -0,0 +1,119 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:44
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Curso',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.CharField(max_length=10, unique=True)),
+                ('nombre', models.CharField(max_length=100)),
+                ('descripcion', models.TextField(blank=True)),
+                ('creditos', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(10)])),
+                ('cupo_maximo', models.PositiveSmallIntegerField(default=30)),
+                ('dias', models.CharField(choices=[('LUN', 'Lunes'), ('MAR', 'Martes'), ('MIE', 'Miércoles'), ('JUE', 'Jueves'), ('VIE', 'Viernes'), ('SAB', 'Sábado'), ('DOM', 'Domingo')], max_length=3)),
+                ('hora_inicio', models.TimeField()),
+                ('hora_fin', models.TimeField()),
+                ('fecha_inicio', models.DateField()),
+                ('fecha_fin', models.DateField()),
+                ('activo', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['codigo'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Estudiante',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matricula', models.CharField(max_length=10, unique=True)),
+                ('nombre', models.CharField(max_length=100)),
+                ('apellido', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('telefono', models.CharField(blank=True, max_length=15, null=True)),
+                ('fecha_nacimiento', models.DateField()),
+                ('fecha_ingreso', models.DateField()),
+                ('activo', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['apellido', 'nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Profesor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('apellido', models.CharField(max_length=100)),
+                ('email', models.EmailField(max_length=254, unique=True)),
+                ('telefono', models.CharField(blank=True, max_length=15, null=True)),
+                ('especialidad', models.CharField(max_length=100)),
+                ('fecha_contratacion', models.DateField()),
+                ('activo', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Profesores',
+                'ordering': ['apellido', 'nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Inscripcion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_inscripcion', models.DateField(auto_now_add=True)),
+                ('estado', models.CharField(choices=[('ACTIVO', 'Activo'), ('BAJA', 'Baja'), ('COMPLETO', 'Completo')], default='ACTIVO', max_length=10)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inscripciones', to='cursosapi.curso')),
+                ('estudiante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inscripciones', to='cursosapi.estudiante')),
+            ],
+            options={
+                'verbose_name_plural': 'Inscripciones',
+                'ordering': ['-fecha_inscripcion'],
+                'unique_together': {('estudiante', 'curso')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Calificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=4, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(10)])),
+                ('fecha_registro', models.DateField(auto_now_add=True)),
+                ('observaciones', models.TextField(blank=True)),
+                ('inscripcion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='calificacion', to='cursosapi.inscripcion')),
+            ],
+            options={
+                'verbose_name_plural': 'Calificaciones',
+            },
+        ),
+        migrations.AddField(
+            model_name='curso',
+            name='profesor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cursos', to='cursosapi.profesor'),
+        ),
+        migrations.CreateModel(
+            name='Asistencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('presente', models.BooleanField(default=False)),
+                ('justificada', models.BooleanField(default=False)),
+                ('observaciones', models.TextField(blank=True)),
+                ('inscripcion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='asistencias', to='cursosapi.inscripcion')),
+            ],
+            options={
+                'verbose_name_plural': 'Asistencias',
+                'ordering': ['-fecha'],
+                'unique_together': {('inscripcion', 'fecha')},
+            },
+        ),
+    ]
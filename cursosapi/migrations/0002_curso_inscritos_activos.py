@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:44
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def calcular_inscritos_activos(apps, schema_editor):
+    Curso = apps.get_model('cursosapi', 'Curso')
+    Inscripcion = apps.get_model('cursosapi', 'Inscripcion')
+    totales = (
+        Inscripcion.objects
+        .filter(estado='ACTIVO')
+        .order_by()
+        .values('curso')
+        .annotate(total=Count('id'))
+    )
+    for fila in totales:
+        Curso.objects.filter(pk=fila['curso']).update(inscritos_activos=fila['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cursosapi', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='curso',
+            name='inscritos_activos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(calcular_inscritos_activos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def calcular_resumenes(apps, schema_editor):
+    Asistencia = apps.get_model('cursosapi', 'Asistencia')
+    ResumenAsistencia = apps.get_model('cursosapi', 'ResumenAsistencia')
+    filas = Asistencia.objects.order_by().values('inscripcion').annotate(
+        sesiones=Count('id'),
+        presentes=Count('id', filter=Q(presente=True)),
+        justificadas=Count('id', filter=Q(presente=False, justificada=True)),
+        ausentes=Count('id', filter=Q(presente=False, justificada=False))
+    )
+    ResumenAsistencia.objects.bulk_create(
+        [
+            ResumenAsistencia(
+                inscripcion_id=fila['inscripcion'],
+                sesiones=fila['sesiones'],
+                presentes=fila['presentes'],
+                justificadas=fila['justificadas'],
+                ausentes=fila['ausentes']
+            )
+            for fila in filas
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cursosapi', '0002_curso_inscritos_activos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenAsistencia',
+            fields=[
+                ('inscripcion', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen_asistencia', serialize=False, to='cursosapi.inscripcion')),
+                ('sesiones', models.PositiveIntegerField(default=0)),
+                ('presentes', models.PositiveIntegerField(default=0)),
+                ('justificadas', models.PositiveIntegerField(default=0)),
+                ('ausentes', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Resúmenes de asistencia',
+            },
+        ),
+        migrations.RunPython(calcular_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cursosapi', '0004_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Eliminacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=30)),
+                ('objeto_id', models.BigIntegerField()),
+                ('eliminado_en', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'Eliminaciones',
+                'ordering': ['eliminado_en', 'id'],
+                'indexes': [models.Index(fields=['modelo', 'eliminado_en', 'id'], name='cursosapi_e_modelo_6abd34_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.db import migrations
+
+TABLA = 'cursosapi_busqueda'
+
+TEXTOS = [
+    (
+        'profesor',
+        "SELECT 'profesor', id, nombre || ' ' || apellido || ' ' || email || ' ' || especialidad "
+        "FROM cursosapi_profesor",
+    ),
+    (
+        'curso',
+        "SELECT 'curso', c.id, c.codigo || ' ' || c.nombre || ' ' || c.descripcion || ' ' || "
+        "COALESCE(p.nombre || ' ' || p.apellido, '') "
+        "FROM cursosapi_curso c LEFT JOIN cursosapi_profesor p ON p.id = c.profesor_id",
+    ),
+    (
+        'estudiante',
+        "SELECT 'estudiante', id, matricula || ' ' || nombre || ' ' || apellido || ' ' || email "
+        "FROM cursosapi_estudiante",
+    ),
+]
+
+
+def crear_indice(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {TABLA} USING fts5("
+            f"modelo UNINDEXED, objeto_id UNINDEXED, texto, "
+            f"tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        for _, select in TEXTOS:
+            schema_editor.execute(f"INSERT INTO {TABLA} (modelo, objeto_id, texto) {select}")
+    elif vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        schema_editor.execute(
+            f"CREATE TABLE {TABLA} ("
+            f"modelo varchar(30) NOT NULL, objeto_id bigint NOT NULL, texto text NOT NULL, "
+            f"documento tsvector NOT NULL, PRIMARY KEY (modelo, objeto_id))"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {TABLA}_documento ON {TABLA} USING GIN (documento)"
+        )
+        for _, select in TEXTOS:
+            schema_editor.execute(
+                f"INSERT INTO {TABLA} (modelo, objeto_id, texto, documento) "
+                f"SELECT modelo, objeto_id, texto, to_tsvector('simple', unaccent(texto)) "
+                f"FROM ({select}) AS origen (modelo, objeto_id, texto)"
+            )
+
+
+def eliminar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLA}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cursosapi', '0005_eliminacion'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cursosapi', '0006_indice_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asistencia',
+            index=models.Index(fields=['fecha', 'id'], name='asistencia_fecha_id'),
+        ),
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(fields=['fecha_registro', 'id'], name='calificacion_fecha_id'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['curso', 'estado'], name='inscripcion_curso_estado'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['estudiante', 'estado'], name='inscripcion_estudiante_estado'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(condition=models.Q(('estado', 'ACTIVO')), fields=['curso'], name='inscripcion_curso_activo'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(condition=models.Q(('estado', 'ACTIVO')), fields=['estudiante'], name='inscripcion_estudiante_activo'),
+        ),
+        migrations.AddIndex(
+            model_name='inscripcion',
+            index=models.Index(fields=['fecha_inscripcion', 'id'], name='inscripcion_fecha_id'),
+        ),
+    ]
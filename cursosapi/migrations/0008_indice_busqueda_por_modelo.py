@@ -0,0 +1,57 @@
+from django.db import migrations
+
+TABLA = 'cursosapi_busqueda'
+
+OPCIONES_FTS5 = "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'"
+
+TEXTOS = {
+    'profesor': (
+        "SELECT id, nombre || ' ' || apellido || ' ' || email || ' ' || especialidad "
+        "FROM cursosapi_profesor"
+    ),
+    'curso': (
+        "SELECT c.id, c.codigo || ' ' || c.nombre || ' ' || c.descripcion || ' ' || "
+        "COALESCE(p.nombre || ' ' || p.apellido, '') "
+        "FROM cursosapi_curso c LEFT JOIN cursosapi_profesor p ON p.id = c.profesor_id"
+    ),
+    'estudiante': (
+        "SELECT id, matricula || ' ' || nombre || ' ' || apellido || ' ' || email "
+        "FROM cursosapi_estudiante"
+    ),
+}
+
+
+def separar_por_modelo(apps, schema_editor):
+    # En PostgreSQL la clave primaria (modelo, objeto_id) ya indexa los borrados
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {TABLA}")
+    for modelo, select in TEXTOS.items():
+        schema_editor.execute(f"CREATE VIRTUAL TABLE {TABLA}_{modelo} USING fts5(texto, {OPCIONES_FTS5})")
+        schema_editor.execute(f"INSERT INTO {TABLA}_{modelo} (rowid, texto) {select}")
+
+
+def unir(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {TABLA} USING fts5("
+        f"modelo UNINDEXED, objeto_id UNINDEXED, texto, {OPCIONES_FTS5})"
+    )
+    for modelo in TEXTOS:
+        schema_editor.execute(
+            f"INSERT INTO {TABLA} (modelo, objeto_id, texto) "
+            f"SELECT '{modelo}', rowid, texto FROM {TABLA}_{modelo}"
+        )
+        schema_editor.execute(f"DROP TABLE {TABLA}_{modelo}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cursosapi', '0007_indices_compuestos'),
+    ]
+
+    operations = [
+        migrations.RunPython(separar_por_modelo, unir),
+    ]
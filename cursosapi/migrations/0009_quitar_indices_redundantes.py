@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-17 01:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cursosapi', '0008_indice_busqueda_por_modelo'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='inscripcion',
+            name='inscripcion_curso_activo',
+        ),
+        migrations.RemoveIndex(
+            model_name='inscripcion',
+            name='inscripcion_estudiante_activo',
+        ),
+        migrations.AlterField(
+            model_name='curso',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='estudiante',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='inscripcion',
+            name='curso',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='inscripciones', to='cursosapi.curso'),
+        ),
+        migrations.AlterField(
+            model_name='inscripcion',
+            name='estudiante',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='inscripciones', to='cursosapi.estudiante'),
+        ),
+        migrations.AlterField(
+            model_name='profesor',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='resumenasistencia',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
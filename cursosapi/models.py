@@ -1,5 +1,76 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Case, CharField, Count, F, Q, Value, When
+from django.db.models.functions import Concat, Greatest
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
+
+
+class CupoAgotado(Exception):
+    """El curso no tiene cupo disponible para una nueva inscripción activa."""
+
+def nombre_completo(prefijo=''):
+    """Expresión SQL para "nombre apellido" de un Profesor o Estudiante relacionado."""
+    return Concat(
+        f'{prefijo}nombre', Value(' '), f'{prefijo}apellido',
+        output_field=CharField()
+    )
+
+
+def apellido_nombre(prefijo=''):
+    """Expresión SQL para "apellido, nombre" de un Estudiante relacionado (listas de clase)."""
+    return Concat(
+        f'{prefijo}apellido', Value(', '), f'{prefijo}nombre',
+        output_field=CharField()
+    )
+
+
+def nombre_profesor(prefijo=''):
+    """Expresión SQL para "nombre apellido" del Profesor de un Curso, o NULL si no tiene."""
+    return Case(
+        When(**{f'{prefijo}profesor__isnull': True}, then=Value(None)),
+        default=nombre_completo(f'{prefijo}profesor__'),
+        output_field=CharField()
+    )
+
+
+def nombre_curso(prefijo=''):
+    """Expresión SQL para "codigo - nombre" de un Curso relacionado."""
+    return Concat(
+        f'{prefijo}codigo', Value(' - '), f'{prefijo}nombre',
+        output_field=CharField()
+    )
+
+
+class CursoQuerySet(models.QuerySet):
+    def con_profesor_nombre(self):
+        return self.annotate(profesor_nombre=nombre_profesor())
+
+
+def _anotar(queryset, anotaciones, campos):
+    """Aplica solo las ``anotaciones`` incluidas en ``campos`` (todas si es ``None``)."""
+    if campos is not None:
+        anotaciones = {nombre: valor for nombre, valor in anotaciones.items() if nombre in campos}
+    return queryset.annotate(**anotaciones)
+
+
+class InscripcionQuerySet(models.QuerySet):
+    def con_detalle(self, campos=None):
+        return _anotar(self, {
+            'estudiante_nombre': nombre_completo('estudiante__'),
+            'curso_nombre': nombre_curso('curso__'),
+            'calificacion_valor': F('calificacion__valor'),
+        }, campos)
+
+
+class DetalleInscripcionQuerySet(models.QuerySet):
+    """Para modelos que cuelgan de una Inscripcion (Calificacion, Asistencia)."""
+
+    def con_detalle(self, campos=None):
+        return _anotar(self, {
+            'estudiante_nombre': nombre_completo('inscripcion__estudiante__'),
+            'curso_nombre': nombre_curso('inscripcion__curso__'),
+        }, campos)
+
 
 class Profesor(models.Model):
     nombre = models.CharField(max_length=100)
@@ -9,6 +80,7 @@ class Profesor(models.Model):
     especialidad = models.CharField(max_length=100)
     fecha_contratacion = models.DateField()
     activo = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = "Profesores"
@@ -48,6 +120,11 @@ class Curso(models.Model):
     fecha_inicio = models.DateField()
     fecha_fin = models.DateField()
     activo = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Contador desnormalizado de inscripciones en estado ACTIVO
+    inscritos_activos = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CursoQuerySet.as_manager()
 
     class Meta:
         ordering = ['codigo']
@@ -55,6 +132,52 @@ class Curso(models.Model):
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._profesor_original_id = instance.__dict__.get('profesor_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # El contador solo se modifica con UPDATE atómicos; un save() con una
+        # copia en memoria desactualizada no debe sobrescribirlo.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'inscritos_activos'
+            ]
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def reservar_cupo(curso_id):
+        """Ocupa un lugar solo si queda cupo; devuelve False si el curso está lleno."""
+        return Curso.reservar_cupos(curso_id, 1)
+
+    @staticmethod
+    def reservar_cupos(curso_id, cantidad):
+        """Ocupa ``cantidad`` lugares a la vez, o ninguno si no alcanzan."""
+        return Curso.objects.filter(
+            pk=curso_id,
+            inscritos_activos__lte=F('cupo_maximo') - cantidad
+        ).update(
+            inscritos_activos=F('inscritos_activos') + cantidad,
+            updated_at=timezone.now()
+        ) == 1
+
+    @staticmethod
+    def liberar_cupo(curso_id):
+        Curso.liberar_cupos(curso_id, 1)
+
+    @staticmethod
+    def liberar_cupos(curso_id, cantidad):
+        Curso.objects.filter(
+            pk=curso_id,
+            inscritos_activos__gt=0
+        ).update(
+            inscritos_activos=Greatest(F('inscritos_activos') - cantidad, Value(0)),
+            updated_at=timezone.now()
+        )
+
 class Estudiante(models.Model):
     matricula = models.CharField(max_length=10, unique=True)
     nombre = models.CharField(max_length=100)
@@ -64,6 +187,7 @@ class Estudiante(models.Model):
     fecha_nacimiento = models.DateField()
     fecha_ingreso = models.DateField()
     activo = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['apellido', 'nombre']
@@ -72,15 +196,18 @@ class Estudiante(models.Model):
         return f"{self.matricula} - {self.apellido}, {self.nombre}"
 
 class Inscripcion(models.Model):
+    # Sin índice propio: (estudiante, curso) y (curso, estado) empiezan por ellos
     estudiante = models.ForeignKey(
         Estudiante, 
         related_name='inscripciones', 
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     curso = models.ForeignKey(
         Curso, 
         related_name='inscripciones', 
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     fecha_inscripcion = models.DateField(auto_now_add=True)
     estado = models.CharField(
@@ -92,15 +219,105 @@ class Inscripcion(models.Model):
         ),
         default='ACTIVO'
     )
+    # Indexado, como en Calificacion y Asistencia: ?since= lee los cambios por updated_at
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = InscripcionQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = "Inscripciones"
         unique_together = ['estudiante', 'curso']
         ordering = ['-fecha_inscripcion']
+        # Cada índice se paga en cada alta, baja o cambio de inscripción: los
+        # compuestos sirven a las consultas por estado ACTIVO y a las que no
+        # filtran por estado (cascadas, calificaciones de un estudiante)
+        indexes = [
+            models.Index(fields=['curso', 'estado'], name='inscripcion_curso_estado'),
+            models.Index(fields=['estudiante', 'estado'], name='inscripcion_estudiante_estado'),
+            models.Index(fields=['fecha_inscripcion', 'id'], name='inscripcion_fecha_id'),
+        ]
 
     def __str__(self):
         return f"{self.estudiante} - {self.curso}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._guardar_estado_original()
+        return instance
+
+    def _guardar_estado_original(self):
+        self._curso_original_id = self.__dict__.get('curso_id')
+        self._estado_original = self.__dict__.get('estado')
+
+    @staticmethod
+    def bloquear(inscripcion_ids):
+        """Bloquea las inscripciones hasta el final de la transacción (``SELECT ... FOR UPDATE``).
+
+        Quien escribe asistencias de una inscripción, o cambia su estado o
+        curso, la bloquea antes de leer el estado previo: así los deltas de
+        ``ResumenAsistencia`` y de ``Curso.inscritos_activos`` salen de datos
+        que nadie más puede cambiar entretanto. SQLite no tiene bloqueo
+        por fila ni le hace falta: con ``transaction_mode`` IMMEDIATE la
+        transacción ya tiene el candado de escritura desde que empieza.
+        ``inscripcion_ids`` puede ser también un queryset de ids (una subconsulta).
+        """
+        if connection.features.has_select_for_update:
+            list(
+                Inscripcion.objects.select_for_update()
+                .filter(id__in=inscripcion_ids).order_by('id').values_list('id', flat=True)
+            )
+
+    def confirmado(self):
+        """``(estado, curso_id)`` guardados en la base, o ``None`` si la fila ya no existe."""
+        Inscripcion.bloquear([self.pk])
+        return Inscripcion.objects.filter(pk=self.pk).values_list('estado', 'curso_id').first()
+
+    def save(self, *args, **kwargs):
+        """Mantiene ``Curso.inscritos_activos`` al crear o cambiar de estado/curso.
+
+        El lugar que ocupaba se toma de la base dentro de la transacción y no
+        de la copia en memoria, que otra petición pudo dejar desactualizada.
+        Lanza ``CupoAgotado`` si la inscripción pasa a ACTIVO en un curso lleno.
+        """
+        ocupa = self.curso_id if self.estado == 'ACTIVO' else None
+
+        with transaction.atomic():
+            confirmado = None if self._state.adding else self.confirmado()
+            if confirmado is not None and confirmado[0] == 'ACTIVO':
+                ocupaba = confirmado[1]
+            else:
+                ocupaba = None
+            if ocupa != ocupaba:
+                if ocupa is not None and not Curso.reservar_cupo(ocupa):
+                    raise CupoAgotado("El curso ha alcanzado su cupo máximo.")
+                if ocupaba is not None:
+                    Curso.liberar_cupo(ocupaba)
+            super().save(*args, **kwargs)
+        self._guardar_estado_original()
+
+    def dar_baja(self):
+        """Pasa a BAJA solo si en la base sigue ACTIVO y libera su lugar.
+
+        Devuelve False, sin tocar nada, si otra petición ya la dio de baja o
+        cambió su estado. Como es un UPDATE y no ``save()``, envía
+        ``post_save`` a mano para que se invaliden cachés e índices.
+        """
+        with transaction.atomic():
+            cambiadas = Inscripcion.objects.filter(pk=self.pk, estado='ACTIVO').update(
+                estado='BAJA', updated_at=timezone.now()
+            )
+            if not cambiadas:
+                return False
+            self.refresh_from_db(fields=['estado', 'curso', 'updated_at'])
+            Curso.liberar_cupo(self.curso_id)
+            self._guardar_estado_original()
+            models.signals.post_save.send(
+                sender=Inscripcion, instance=self, created=False,
+                update_fields={'estado', 'updated_at'}, raw=False, using=self._state.db
+            )
+        return True
+
 class Calificacion(models.Model):
     inscripcion = models.OneToOneField(
         Inscripcion, 
@@ -114,9 +331,15 @@ class Calificacion(models.Model):
     )
     fecha_registro = models.DateField(auto_now_add=True)
     observaciones = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = DetalleInscripcionQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = "Calificaciones"
+        indexes = [
+            models.Index(fields=['fecha_registro', 'id'], name='calificacion_fecha_id'),
+        ]
 
     def __str__(self):
         return f"{self.inscripcion.estudiante} - {self.inscripcion.curso}: {self.valor}"
@@ -131,12 +354,167 @@ class Asistencia(models.Model):
     presente = models.BooleanField(default=False)
     justificada = models.BooleanField(default=False)
     observaciones = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = DetalleInscripcionQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = "Asistencias"
+        # unique_together ya indexa (inscripcion, fecha) para los rangos por inscripción
         unique_together = ['inscripcion', 'fecha']
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['fecha', 'id'], name='asistencia_fecha_id'),
+        ]
 
     def __str__(self):
         estado = "Presente" if self.presente else "Ausente"
-        return f"{self.inscripcion.estudiante} - {self.fecha} - {estado}"
\ No newline at end of file
+        return f"{self.inscripcion.estudiante} - {self.fecha} - {estado}"
+
+    @property
+    def categoria(self):
+        return Asistencia.categoria_de(self.presente, self.justificada)
+
+    @staticmethod
+    def categoria_de(presente, justificada):
+        """Clasifica un registro como 'presente', 'justificada' o 'ausente'."""
+        if presente:
+            return 'presente'
+        return 'justificada' if justificada else 'ausente'
+
+class ResumenAsistencia(models.Model):
+    """Conteos de asistencia por inscripción, mantenidos de forma incremental."""
+
+    CAMPOS_CATEGORIA = {
+        'presente': 'presentes',
+        'justificada': 'justificadas',
+        'ausente': 'ausentes',
+    }
+
+    inscripcion = models.OneToOneField(
+        Inscripcion,
+        related_name='resumen_asistencia',
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    sesiones = models.PositiveIntegerField(default=0)
+    presentes = models.PositiveIntegerField(default=0)
+    justificadas = models.PositiveIntegerField(default=0)
+    ausentes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Resúmenes de asistencia"
+
+    def __str__(self):
+        return f"{self.inscripcion}: {self.presentes}/{self.sesiones}"
+
+    @property
+    def porcentaje_asistencia(self):
+        return self.calcular_porcentaje(self.presentes, self.sesiones)
+
+    @staticmethod
+    def calcular_porcentaje(presentes, sesiones):
+        if not sesiones:
+            return None
+        return round(100 * presentes / sesiones, 2)
+
+    @staticmethod
+    def aplicar_cambios(cambios):
+        """Aplica cambios ``(inscripcion_id, categoria_anterior, categoria_nueva)``.
+
+        ``None`` como categoría anterior indica un registro nuevo y como nueva
+        un registro borrado. Las inscripciones con el mismo delta se actualizan
+        juntas, así que el número de UPDATE está acotado por las combinaciones
+        posibles y no por la cantidad de registros.
+        """
+        deltas = {}
+        for inscripcion_id, anterior, nueva in cambios:
+            if anterior == nueva:
+                continue
+            delta = deltas.setdefault(
+                inscripcion_id,
+                {'sesiones': 0, 'presentes': 0, 'justificadas': 0, 'ausentes': 0}
+            )
+            if anterior is None:
+                delta['sesiones'] += 1
+            else:
+                delta[ResumenAsistencia.CAMPOS_CATEGORIA[anterior]] -= 1
+            if nueva is None:
+                delta['sesiones'] -= 1
+            else:
+                delta[ResumenAsistencia.CAMPOS_CATEGORIA[nueva]] += 1
+
+        grupos = {}
+        for inscripcion_id, delta in deltas.items():
+            clave = tuple((campo, valor) for campo, valor in delta.items() if valor)
+            if clave:
+                grupos.setdefault(clave, []).append(inscripcion_id)
+        if not grupos:
+            return
+
+        with transaction.atomic():
+            ResumenAsistencia.objects.bulk_create(
+                [
+                    ResumenAsistencia(inscripcion_id=inscripcion_id)
+                    for inscripcion_ids in grupos.values()
+                    for inscripcion_id in inscripcion_ids
+                ],
+                ignore_conflicts=True
+            )
+            for clave, inscripcion_ids in grupos.items():
+                ResumenAsistencia.objects.filter(
+                    inscripcion_id__in=inscripcion_ids
+                ).update(
+                    updated_at=timezone.now(),
+                    # Sin bajar de cero si el resumen quedó desfasado (p. ej. altas desde el admin)
+                    **{campo: Greatest(F(campo) + valor, Value(0)) for campo, valor in clave}
+                )
+
+    @staticmethod
+    def recalcular(inscripciones=None):
+        """Reconstruye los resúmenes desde ``Asistencia`` (todas o las indicadas)."""
+        asistencias = Asistencia.objects.order_by()
+        resumenes = ResumenAsistencia.objects.all()
+        if inscripciones is not None:
+            asistencias = asistencias.filter(inscripcion__in=inscripciones)
+            resumenes = resumenes.filter(inscripcion__in=inscripciones)
+        filas = asistencias.values('inscripcion').annotate(
+            sesiones=Count('id'),
+            presentes=Count('id', filter=Q(presente=True)),
+            justificadas=Count('id', filter=Q(presente=False, justificada=True)),
+            ausentes=Count('id', filter=Q(presente=False, justificada=False))
+        )
+        with transaction.atomic():
+            resumenes.delete()
+            creados = ResumenAsistencia.objects.bulk_create(
+                (
+                    ResumenAsistencia(
+                        inscripcion_id=fila['inscripcion'],
+                        sesiones=fila['sesiones'],
+                        presentes=fila['presentes'],
+                        justificadas=fila['justificadas'],
+                        ausentes=fila['ausentes']
+                    )
+                    for fila in filas.iterator()
+                ),
+                batch_size=1000
+            )
+        return len(creados)
+
+class Eliminacion(models.Model):
+    """Registro liviano de filas borradas, para la sincronización incremental."""
+
+    modelo = models.CharField(max_length=30)
+    objeto_id = models.BigIntegerField()
+    eliminado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name_plural = "Eliminaciones"
+        ordering = ['eliminado_en', 'id']
+        indexes = [
+            models.Index(fields=['modelo', 'eliminado_en', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo} {self.objeto_id} ({self.eliminado_en})"
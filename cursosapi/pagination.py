@@ -0,0 +1,182 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError as ErrorValidacion
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PaginacionNumerada(PageNumberPagination):
+    """Paginación por número de página con tamaño elegible por el cliente."""
+
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class PaginacionKeyset(PaginacionNumerada):
+    """Paginación por cursor (keyset) opcional sobre claves estables.
+
+    Se activa con ``?paginacion=cursor`` o al seguir un enlace con ``?cursor=``;
+    sin ellos se comporta como ``PaginacionNumerada``. La vista define el
+    orden con ``cursor_ordering``, que debe terminar en una columna única
+    (p. ej. ``('-fecha', '-id')``). El cursor guarda los valores de la última
+    fila, de modo que cada página es un rango indexado sin OFFSET ni COUNT(*).
+    El total solo se calcula si se pide con ``?count=true``. Como el orden lo
+    fija la vista, ``?ordering=`` en modo cursor es un error 400.
+    """
+
+    cursor_query_param = 'cursor'
+    modo_query_param = 'paginacion'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Cursor inválido'
+    ordering_con_cursor_message = 'La paginación por cursor no admite ordering: usa el orden de la vista'
+    ordering = ('-id',)
+
+    def usa_cursor_en(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.modo_query_param) == 'cursor'
+        )
+
+    def pide_total(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('true', '1')
+
+    def consulta_pagina(self, queryset, request, view=None):
+        """Queryset (sin evaluar) de la página de cursor: ``page_size + 1`` filas a partir del cursor.
+
+        Devuelve ``(queryset, posicion, retroceder)``. También lo usa
+        ``condicional.lista`` para calcular los validadores sobre las mismas filas.
+        """
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            raise ErrorValidacion({api_settings.ORDERING_PARAM: [self.ordering_con_cursor_message]})
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(getattr(view, 'cursor_ordering', self.ordering))
+        self.campos = [
+            (campo.lstrip('-'), campo.startswith('-')) for campo in self.ordering
+        ]
+        self.modelo = queryset.model
+        posicion, retroceder = self.decode_cursor(request)
+        if retroceder:
+            ordering = [
+                campo[1:] if campo.startswith('-') else f'-{campo}'
+                for campo in self.ordering
+            ]
+        else:
+            ordering = list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if posicion is not None:
+            queryset = queryset.filter(self._filtro_despues_de(posicion, retroceder))
+        return queryset[:self.page_size + 1], posicion, retroceder
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.usa_cursor = self.usa_cursor_en(request)
+        if not self.usa_cursor:
+            if not queryset.ordered:
+                # Sin orden las páginas no son estables; el del cursor tiene índice
+                queryset = queryset.order_by(*getattr(view, 'cursor_ordering', self.ordering))
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.total = queryset.count() if self.pide_total(request) else None
+
+        pagina, posicion, retroceder = self.consulta_pagina(queryset, request, view)
+        filas = list(pagina)
+        hay_mas = len(filas) > self.page_size
+        filas = filas[:self.page_size]
+        if retroceder:
+            filas.reverse()
+
+        self.page = filas
+        if retroceder:
+            self.hay_siguiente = posicion is not None
+            self.hay_anterior = hay_mas
+        else:
+            self.hay_siguiente = hay_mas
+            self.hay_anterior = posicion is not None
+        return filas
+
+    def _filtro_despues_de(self, posicion, retroceder):
+        # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y), respetando cada dirección
+        filtro = Q()
+        iguales = {}
+        for (campo, descendente), valor in zip(self.campos, posicion):
+            lookup = 'lt' if descendente != retroceder else 'gt'
+            filtro |= Q(**iguales, **{f'{campo}__{lookup}': valor})
+            iguales[campo] = valor
+        return filtro
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            posicion = datos['p']
+            retroceder = bool(datos.get('r', False))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(posicion, list) or len(posicion) != len(self.campos):
+            raise NotFound(self.invalid_cursor_message)
+        # El JSON trae fechas como texto: se convierten con el campo del orden
+        # para comparar con el tipo correcto y rechazar cursores manipulados
+        try:
+            posicion = [
+                self._campo_modelo(campo).to_python(valor)
+                for (campo, _), valor in zip(self.campos, posicion)
+            ]
+        except (ValidationError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in posicion:
+            raise NotFound(self.invalid_cursor_message)
+        return posicion, retroceder
+
+    def _campo_modelo(self, campo):
+        if campo == 'pk':
+            return self.modelo._meta.pk
+        return self.modelo._meta.get_field(campo)
+
+    def encode_cursor(self, fila, retroceder):
+        datos = {'p': [getattr(fila, campo) for campo, _ in self.campos]}
+        if retroceder:
+            datos['r'] = True
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(datos, cls=DjangoJSONEncoder).encode('ascii')
+        ).decode('ascii')
+        url = remove_query_param(self.request.build_absolute_uri(), self.modo_query_param)
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.usa_cursor:
+            return super().get_next_link()
+        if not self.hay_siguiente or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], retroceder=False)
+
+    def get_previous_link(self):
+        if not self.usa_cursor:
+            return super().get_previous_link()
+        if not self.hay_anterior or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], retroceder=True)
+
+    def get_paginated_response(self, data):
+        if not self.usa_cursor:
+            return super().get_paginated_response(data)
+        respuesta = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.total is not None:
+            respuesta = {'count': self.total, **respuesta}
+        return Response(respuesta)
+
+    def get_paginated_response_schema(self, schema):
+        respuesta = super().get_paginated_response_schema(schema)
+        respuesta['required'] = ['results']
+        return respuesta
@@ -0,0 +1,326 @@
+"""Perfilado bajo demanda de una petición concreta.
+
+Un usuario ``is_staff`` lo pide con la cabecera ``X-Perfilar: 1`` o con
+``?perfilar=1``. La petición se ejecuta dentro de ``cProfile`` con
+``tracemalloc`` activo y con sus consultas SQL capturadas; el resultado se
+guarda en ``PERFILADO_DIRECTORIO`` como ``<id>.prof`` (abrible con ``pstats``
+o ``snakeviz``) y ``<id>.json`` (resumen), y la respuesta lleva la cabecera
+``X-Perfil`` con la URL del resumen.
+
+Para que el propio perfilado no sobrecargue el servidor solo se perfila una
+petición a la vez por proceso, como mucho ``PERFILADO_MAX_POR_MINUTO`` en
+total (contadas en la caché compartida) y se conservan los últimos
+``PERFILADO_MAX_ARTEFACTOS``. Fuera de esos límites la petición se atiende
+normalmente con la cabecera ``X-Perfil-Omitido``.
+"""
+import contextvars
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import FileResponse, Http404
+from django.urls import reverse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .metricas import nombre_ruta
+
+CABECERA = 'HTTP_X_PERFILAR'
+PARAMETRO = 'perfilar'
+
+_en_curso = threading.Semaphore(1)
+
+_captura = contextvars.ContextVar('captura_sql', default=None)
+
+
+def _directorio():
+    directorio = Path(getattr(settings, 'PERFILADO_DIRECTORIO', Path(settings.BASE_DIR) / 'perfiles'))
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+
+def _pedido(request):
+    return (request.META.get(CABECERA) or request.GET.get(PARAMETRO)) in ('1', 'true')
+
+
+def _autorizado(usuario):
+    return bool(usuario and usuario.is_authenticated and usuario.is_staff)
+
+
+def solicitado(request):
+    return _pedido(request) and _autorizado(getattr(request, 'user', None))
+
+
+def _reservar_cupo_minuto():
+    """Cuenta el perfilado en la ventana del minuto actual (compartida entre procesos)."""
+    limite = getattr(settings, 'PERFILADO_MAX_POR_MINUTO', 6)
+    clave = f'perfilado:{int(time.time() // 60)}'
+    cache.add(clave, 0, 120)
+    try:
+        return cache.incr(clave) <= limite
+    except ValueError:
+        return False
+
+
+class CapturaSQL:
+    """``execute_wrapper`` que guarda cada consulta con su duración."""
+
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append((sql, repr(params), (time.perf_counter() - inicio) * 1000))
+
+    def resumen(self):
+        """Consultas agrupadas por SQL, de mayor a menor tiempo total.
+
+        ``repetidas`` cuenta las ejecuciones con los mismos parámetros además
+        de la primera: son candidatas directas a eliminarse o cachearse.
+        """
+        grupos = {}
+        for sql, params, duracion in self.consultas:
+            grupo = grupos.setdefault(sql, {
+                'sql': sql, 'veces': 0, 'total_ms': 0.0, 'max_ms': 0.0, '_params': set()
+            })
+            grupo['veces'] += 1
+            grupo['total_ms'] += duracion
+            grupo['max_ms'] = max(grupo['max_ms'], duracion)
+            grupo['_params'].add(params)
+        filas = []
+        for grupo in grupos.values():
+            grupo['repetidas'] = grupo['veces'] - len(grupo.pop('_params'))
+            grupo['total_ms'] = round(grupo['total_ms'], 3)
+            grupo['max_ms'] = round(grupo['max_ms'], 3)
+            filas.append(grupo)
+        return sorted(filas, key=lambda grupo: grupo['total_ms'], reverse=True)
+
+
+def capturar_consulta(execute, sql, params, many, context):
+    """``execute_wrapper`` para todas las conexiones: entrega la consulta a la captura en curso.
+
+    Bajo ASGI las consultas se ejecutan en otro hilo (con otra conexión) que
+    el de la petición, así que no basta con envolver la conexión del hilo
+    actual; la variable de contexto sí viaja con ``sync_to_async``.
+    """
+    captura = _captura.get()
+    if captura is None:
+        return execute(sql, params, many, context)
+    return captura(execute, sql, params, many, context)
+
+
+def instalar_en_conexion(sender, connection, **kwargs):
+    """Receptor de ``connection_created``."""
+    if capturar_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(capturar_consulta)
+
+
+def _asignaciones(instantanea, limite=25):
+    filtros = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, __file__),
+    ]
+    return [
+        {
+            'lugar': f'{estadistica.traceback[0].filename}:{estadistica.traceback[0].lineno}',
+            'kb': round(estadistica.size / 1024, 1),
+            'bloques': estadistica.count,
+        }
+        for estadistica in instantanea.filter_traces(filtros).statistics('lineno')[:limite]
+    ]
+
+
+def _llamadas(perfil, limite=40):
+    salida = io.StringIO()
+    estadisticas = pstats.Stats(perfil, stream=salida)
+    estadisticas.sort_stats('cumulative').print_stats(limite)
+    estadisticas.print_callees(limite // 4)
+    return salida.getvalue()
+
+
+def _podar():
+    maximo = getattr(settings, 'PERFILADO_MAX_ARTEFACTOS', 50)
+    resumenes = sorted(_directorio().glob('*.json'), key=lambda ruta: ruta.stat().st_mtime)
+    for resumen in resumenes[:max(len(resumenes) - maximo, 0)]:
+        resumen.with_suffix('.prof').unlink(missing_ok=True)
+        resumen.unlink(missing_ok=True)
+
+
+@contextmanager
+def _perfilando(request, usuario):
+    """Perfila el bloque; quien lo usa deja la respuesta en ``resultado['response']``.
+
+    Bajo ASGI ``cProfile`` mide el hilo del bucle de eventos, así que también
+    recoge lo que hagan a la vez otras peticiones; las consultas SQL sí son
+    solo las de esta petición.
+    """
+    captura = CapturaSQL()
+    perfil = cProfile.Profile()
+    resultado = {}
+    iniciar_tracemalloc = not tracemalloc.is_tracing()
+    if iniciar_tracemalloc:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    token = _captura.set(captura)
+    try:
+        perfil.enable()
+        try:
+            # Incluye el render: el handler ya lo hizo al volver de la vista
+            yield resultado
+        finally:
+            perfil.disable()
+            _captura.reset(token)
+        duracion = (time.perf_counter() - inicio) * 1000
+        instantanea = tracemalloc.take_snapshot()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        if iniciar_tracemalloc:
+            tracemalloc.stop()
+    _guardar(request, usuario, resultado['response'], perfil, captura, instantanea, duracion, pico)
+
+
+def _guardar(request, usuario, response, perfil, captura, instantanea, duracion, pico):
+    perfil_id = f"{datetime.now(dt_timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    directorio = _directorio()
+    perfil.dump_stats(directorio / f'{perfil_id}.prof')
+    resumen = {
+        'id': perfil_id,
+        'fecha': datetime.now(dt_timezone.utc).isoformat(),
+        'usuario': usuario.get_username(),
+        'metodo': request.method,
+        'ruta': nombre_ruta(request),
+        'url': request.get_full_path(),
+        'estado': response.status_code,
+        'duracion_ms': round(duracion, 2),
+        'memoria_pico_kb': round(pico / 1024, 1),
+        'consultas': len(captura.consultas),
+        'sql': captura.resumen(),
+        'asignaciones': _asignaciones(instantanea),
+        'llamadas': _llamadas(perfil),
+    }
+    with open(directorio / f'{perfil_id}.json', 'w', encoding='utf-8') as archivo:
+        json.dump(resumen, archivo, ensure_ascii=False, indent=2)
+    _podar()
+
+    response['X-Perfil'] = reverse('perfil-detalle', kwargs={'perfil_id': perfil_id})
+
+
+def perfilar(request, get_response):
+    """Ejecuta ``get_response`` perfilado y guarda los artefactos."""
+    with _perfilando(request, request.user) as resultado:
+        resultado['response'] = get_response(request)
+    return resultado['response']
+
+
+async def aperfilar(request, get_response, usuario):
+    """``perfilar`` para la cadena de middleware async."""
+    with _perfilando(request, usuario) as resultado:
+        resultado['response'] = await get_response(request)
+    return resultado['response']
+
+
+class PerfiladoMiddleware:
+    """Va después de ``AuthenticationMiddleware`` para conocer al usuario."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not solicitado(request):
+            return self.get_response(request)
+        if not _en_curso.acquire(blocking=False):
+            motivo = 'ocupado'
+        elif not _reservar_cupo_minuto():
+            _en_curso.release()
+            motivo = 'limite'
+        else:
+            try:
+                return perfilar(request, self.get_response)
+            finally:
+                _en_curso.release()
+        response = self.get_response(request)
+        response['X-Perfil-Omitido'] = motivo
+        return response
+
+    async def __acall__(self, request):
+        # El usuario solo se carga (con auser()) si la petición pide perfilarse
+        if not _pedido(request) or not _autorizado(await request.auser()):
+            return await self.get_response(request)
+        if not _en_curso.acquire(blocking=False):
+            motivo = 'ocupado'
+        elif not await sync_to_async(_reservar_cupo_minuto)():
+            _en_curso.release()
+            motivo = 'limite'
+        else:
+            try:
+                return await aperfilar(request, self.get_response, await request.auser())
+            finally:
+                _en_curso.release()
+        response = await self.get_response(request)
+        response['X-Perfil-Omitido'] = motivo
+        return response
+
+
+# Endpoints internos
+
+def _resumen(perfil_id):
+    ruta = _directorio() / f'{perfil_id}.json'
+    if not ruta.exists():
+        raise Http404
+    return ruta
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def lista_perfiles(request):
+    perfiles = []
+    for ruta in sorted(_directorio().glob('*.json'), key=lambda ruta: ruta.stat().st_mtime, reverse=True):
+        with open(ruta, encoding='utf-8') as archivo:
+            resumen = json.load(archivo)
+        perfiles.append({
+            campo: resumen[campo]
+            for campo in ('id', 'fecha', 'usuario', 'metodo', 'ruta', 'url', 'estado', 'duracion_ms', 'consultas')
+        } | {
+            'resumen': reverse('perfil-detalle', kwargs={'perfil_id': resumen['id']}),
+            'descarga': reverse('perfil-descarga', kwargs={'perfil_id': resumen['id']}),
+        })
+    return Response(perfiles)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def detalle_perfil(request, perfil_id):
+    with open(_resumen(perfil_id), encoding='utf-8') as archivo:
+        return Response(json.load(archivo))
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def descargar_perfil(request, perfil_id):
+    ruta = _resumen(perfil_id).with_suffix('.prof')
+    if not ruta.exists():
+        raise Http404
+    return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=ruta.name)
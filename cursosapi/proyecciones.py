@@ -0,0 +1,335 @@
+"""Serialización de solo lectura a partir de ``values_list``.
+
+En listas grandes, ``ModelSerializer`` gasta casi todo el tiempo en
+instanciar modelos y en recorrer cada objeto campo por campo. Una
+``Proyeccion`` reproduce la salida de un serializer existente leyendo solo
+las columnas que necesita y armando cada diccionario con un ``zip``: mismas
+claves, mismo orden y mismas representaciones, de modo que el JSON es
+idéntico byte a byte (lo comprueban las pruebas de equivalencia). Las
+escrituras y los detalles siguen pasando por los serializers de DRF.
+
+Con ``?fields=`` la proyección se limita a los campos pedidos, así que solo
+se leen (y se unen con JOIN) las columnas necesarias; con ``?expand=`` las
+relaciones indicadas se anidan como objetos completos leídos en la misma
+consulta. ``CamposSolicitadosMixin`` aplica lo mismo a los serializers de
+DRF en los detalles.
+"""
+from functools import cached_property
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .metricas import medir_serializacion
+from .models import Curso, apellido_nombre, nombre_completo, nombre_curso, nombre_profesor
+from .serializers import (
+    ProfesorSerializer,
+    CursoSerializer,
+    EstudianteSerializer,
+    InscripcionSerializer,
+    CalificacionSerializer,
+    AsistenciaSerializer,
+    AsistenciaDetalleSerializer,
+    HorarioEstudianteSerializer,
+    ListaAsistenciaSerializer,
+)
+
+# Campos cuya representación es el mismo valor que devuelve la base
+_SIN_CONVERSION = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+class Proyeccion:
+    """Salida de ``serializer_class`` construida desde filas de ``values_list``.
+
+    Los campos que no salen directamente de su ``source`` (los
+    ``SerializerMethodField`` o los que llaman a un método del modelo)
+    necesitan en ``columnas`` una función ``prefijo -> expresión`` con la que
+    calcularlos en SQL, y en ``conversiones`` la función que pasa el valor
+    leído a su representación si no es el propio valor. Las demás
+    conversiones (fechas, horas, decimales) usan el ``to_representation`` del
+    campo de DRF, así que respetan la misma configuración.
+
+    ``expansiones`` asocia cada relación expandible con la proyección del
+    modelo relacionado; ``relacionadas`` son las relaciones que el serializer
+    recorre al trabajar con instancias (para su ``select_related``) y
+    ``validadores`` los campos cuyos cambios modifican la salida.
+    """
+
+    def __init__(self, serializer_class, columnas=None, conversiones=None, expansiones=None,
+                 relacionadas=(), validadores=('updated_at',), seleccion=None, expandir=()):
+        self.serializer_class = serializer_class
+        self._columnas = columnas or {}
+        self._conversiones = conversiones or {}
+        self.expansiones = expansiones or {}
+        self.relacionadas = relacionadas
+        self.validadores = validadores
+        self.seleccion = seleccion
+        self.expandir = tuple(expandir)
+        self._variantes = {}
+
+    @cached_property
+    def todos_los_campos(self):
+        # Se construyen al primer uso: los ModelSerializer necesitan los modelos cargados
+        return self.serializer_class().fields
+
+    @cached_property
+    def campos(self):
+        if self.seleccion is None:
+            return self.todos_los_campos
+        return {
+            nombre: campo for nombre, campo in self.todos_los_campos.items()
+            if nombre in self.seleccion or nombre in self.expandir
+        }
+
+    @cached_property
+    def nombres(self):
+        return tuple(self.campos)
+
+    def variante(self, campos=None, expandir=()):
+        """La proyección limitada a ``campos`` y con las relaciones de ``expandir`` anidadas.
+
+        Los nombres desconocidos son un error de validación del parámetro
+        correspondiente (``fields`` o ``expand``).
+        """
+        if campos is None and not expandir:
+            return self
+        clave = (frozenset(campos) if campos is not None else None, frozenset(expandir))
+        variante = self._variantes.get(clave)
+        if variante is None:
+            desconocidos = set(campos or ()) - set(self.todos_los_campos)
+            if desconocidos:
+                raise ValidationError({'fields': f"Campos desconocidos: {', '.join(sorted(desconocidos))}"})
+            desconocidas = set(expandir) - set(self.expansiones)
+            if desconocidas:
+                raise ValidationError({'expand': f"No se puede expandir: {', '.join(sorted(desconocidas))}"})
+            variante = Proyeccion(
+                self.serializer_class, self._columnas, self._conversiones, self.expansiones,
+                self.relacionadas, self.validadores,
+                seleccion=frozenset(campos) if campos is not None else None,
+                # En el orden de los campos, para que las columnas sean estables
+                expandir=[nombre for nombre in self.todos_los_campos if nombre in expandir],
+            )
+            self._variantes[clave] = variante
+        return variante
+
+    def select_related(self):
+        """Rutas de ``select_related`` para serializar las expansiones desde instancias."""
+        rutas = []
+        for nombre in self.expandir:
+            rutas.append(nombre)
+            rutas.extend(f'{nombre}__{relacion}' for relacion in self.expansiones[nombre].relacionadas)
+        return rutas
+
+    def validadores_expandidos(self):
+        """``validadores`` de las relaciones expandidas, vistos desde este modelo."""
+        return tuple(
+            f'{nombre}__{campo}'
+            for nombre in self.expandir
+            for campo in self.expansiones[nombre].validadores
+        )
+
+    @cached_property
+    def anidadas(self):
+        """``(nombre, inicio, fin, proyección)`` de cada relación expandida en la fila."""
+        anidadas = []
+        inicio = len(self.campos)
+        for nombre in self.expandir:
+            proyeccion = self.expansiones[nombre]
+            fin = inicio + len(proyeccion.campos)
+            anidadas.append((nombre, inicio, fin, proyeccion))
+            inicio = fin
+        return tuple(anidadas)
+
+    @cached_property
+    def conversiones(self):
+        conversiones = []
+        for posicion, (nombre, campo) in enumerate(self.campos.items()):
+            if nombre in self._conversiones:
+                conversiones.append((posicion, self._conversiones[nombre]))
+            elif nombre not in self._columnas and not isinstance(campo, _SIN_CONVERSION):
+                conversiones.append((posicion, campo.to_representation))
+        return tuple(conversiones)
+
+    def columnas(self, prefijo=''):
+        """Columnas para ``values_list`` en el orden de los campos del serializer."""
+        columnas = []
+        for nombre, campo in self.campos.items():
+            if nombre in self._columnas:
+                columnas.append(self._columnas[nombre](prefijo))
+            elif isinstance(campo, serializers.SerializerMethodField):
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{nombre} necesita una columna en la proyección"
+                )
+            else:
+                columnas.append(prefijo + campo.source.replace('.', '__'))
+        for nombre in self.expandir:
+            columnas.extend(self.expansiones[nombre].columnas(f'{prefijo}{nombre}__'))
+        return columnas
+
+    def proyectar(self, queryset, *adicionales, prefijo='', named=False):
+        """``values_list`` con las columnas de la proyección.
+
+        ``prefijo`` permite proyectar un modelo relacionado (``'curso__'``
+        sobre inscripciones). Las columnas ``adicionales`` van al final de cada
+        fila, detrás de las de las relaciones expandidas, y ``serializar`` las
+        ignora.
+        """
+        return queryset.values_list(*self.columnas(prefijo), *adicionales, named=named)
+
+    def serializar(self, filas):
+        """Lista de diccionarios a partir de filas en el orden de los campos."""
+        nombres = self.nombres
+        conversiones = self.conversiones
+        anidadas = self.anidadas
+        datos = []
+        with medir_serializacion():
+            for fila in filas:
+                valores = fila
+                if conversiones:
+                    valores = list(fila)
+                    for posicion, conversion in conversiones:
+                        valor = valores[posicion]
+                        if valor is not None:
+                            valores[posicion] = conversion(valor)
+                dato = dict(zip(nombres, valores))
+                # La clave ya existe (el id de la relación): el objeto ocupa su lugar
+                for nombre, inicio, fin, proyeccion in anidadas:
+                    dato[nombre] = (
+                        proyeccion.serializar((fila[inicio:fin],))[0]
+                        if fila[inicio] is not None else None
+                    )
+                datos.append(dato)
+        return datos
+
+    def datos(self, queryset, prefijo=''):
+        # La consulta se evalúa antes para no sumarla al tiempo de serialización
+        return self.serializar(list(self.proyectar(queryset, prefijo=prefijo)))
+
+    async def adatos(self, queryset, prefijo=''):
+        """``datos`` leyendo las filas con el ORM asíncrono."""
+        return self.serializar([fila async for fila in self.proyectar(queryset, prefijo=prefijo)])
+
+
+def parametro_lista(parametros, nombre):
+    """Lista separada por comas de ``?nombre=``; ``None`` si no viene o está vacía."""
+    valor = parametros.get(nombre)
+    if valor is None:
+        return None
+    return [parte.strip() for parte in valor.split(',') if parte.strip()] or None
+
+
+class ListaProyectadaMixin:
+    """``list`` de solo lectura servido por ``proyeccion`` en lugar del serializer.
+
+    También interpreta ``?fields=`` y ``?expand=`` para todas las acciones:
+    la lista y las acciones anidadas usan la variante de la proyección, y las
+    demás acciones pasan la selección al serializer (ver
+    ``CamposSolicitadosMixin``) y limitan el queryset con ``only()`` y
+    ``select_related()``. Las filas son ``namedtuple`` para que la paginación
+    por cursor pueda leer las columnas de ``cursor_ordering``.
+    """
+
+    proyeccion = None
+
+    def campos_solicitados(self):
+        return parametro_lista(self.request.query_params, 'fields')
+
+    def expansiones_solicitadas(self):
+        return parametro_lista(self.request.query_params, 'expand') or []
+
+    def solicitado(self, campo):
+        """Si la respuesta incluye ``campo``; para omitir JOINs y anotaciones innecesarios."""
+        campos = self.campos_solicitados()
+        return campos is None or campo in campos
+
+    def proyeccion_solicitada(self, proyeccion=None):
+        return (proyeccion or self.proyeccion).variante(
+            self.campos_solicitados(), self.expansiones_solicitadas()
+        )
+
+    def validadores_expandidos(self):
+        """Campos de las relaciones expandidas para los validadores de ``condicional``."""
+        return self.proyeccion.variante(expandir=self.expansiones_solicitadas()).validadores_expandidos()
+
+    def get_serializer_context(self):
+        contexto = super().get_serializer_context()
+        if self.request is not None and self.request.method == 'GET':
+            contexto['campos'] = self.campos_solicitados()
+            contexto['expandir'] = self.expansiones_solicitadas()
+        return contexto
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Las acciones anidadas resuelven fields/expand con su propia proyección
+        if self.request is None or self.request.method != 'GET' or self.action not in ('list', 'retrieve'):
+            return queryset
+        expandir = self.expansiones_solicitadas()
+        if expandir:
+            # Para los serializers de DRF (retrieve y deltas de sincronización)
+            queryset = queryset.select_related(
+                *self.proyeccion.variante(expandir=expandir).select_related()
+            )
+        campos = self.campos_solicitados()
+        if self.action == 'retrieve' and campos is not None:
+            queryset = queryset.only(*self.get_serializer_class().columnas_modelo(campos + expandir))
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        proyeccion = self.proyeccion_solicitada()
+        # La paginación por cursor lee de cada fila las columnas de cursor_ordering,
+        # aunque ?fields= no las incluya
+        columnas = proyeccion.columnas()
+        adicionales = [
+            campo.lstrip('-') for campo in getattr(self, 'cursor_ordering', ())
+            if campo.lstrip('-') not in columnas
+        ]
+        filas = proyeccion.proyectar(self.filter_queryset(self.get_queryset()), *adicionales, named=True)
+        page = self.paginate_queryset(filas)
+        if page is not None:
+            return self.get_paginated_response(proyeccion.serializar(page))
+        return Response(proyeccion.serializar(list(filas)))
+
+
+def _dia(valor, dias=dict(Curso.DIAS_CHOICES)):
+    # Igual que Curso.get_dias_display()
+    return str(dias.get(valor, valor))
+
+
+PROFESOR = Proyeccion(ProfesorSerializer)
+CURSO = Proyeccion(
+    CursoSerializer,
+    columnas={'profesor_nombre': nombre_profesor},
+    expansiones={'profesor': PROFESOR},
+    relacionadas=('profesor',),
+    validadores=('updated_at', 'profesor__updated_at'),
+)
+ESTUDIANTE = Proyeccion(EstudianteSerializer)
+INSCRIPCION = Proyeccion(InscripcionSerializer, expansiones={'estudiante': ESTUDIANTE, 'curso': CURSO})
+CALIFICACION = Proyeccion(CalificacionSerializer, expansiones={'inscripcion': INSCRIPCION})
+ASISTENCIA = Proyeccion(AsistenciaSerializer, expansiones={'inscripcion': INSCRIPCION})
+ASISTENCIA_DETALLE = Proyeccion(
+    AsistenciaDetalleSerializer,
+    columnas={
+        'estudiante_nombre': lambda prefijo: nombre_completo(f'{prefijo}inscripcion__estudiante__'),
+        'curso_nombre': lambda prefijo: nombre_curso(f'{prefijo}inscripcion__curso__'),
+    },
+    expansiones={'inscripcion': INSCRIPCION},
+)
+HORARIO = Proyeccion(
+    HorarioEstudianteSerializer,
+    columnas={
+        'dia': lambda prefijo: f'{prefijo}curso__dias',
+        'profesor': lambda prefijo: nombre_profesor(f'{prefijo}curso__'),
+    },
+    conversiones={'dia': _dia},
+)
+LISTA_ASISTENCIA = Proyeccion(ListaAsistenciaSerializer, columnas={
+    'nombre': lambda prefijo: apellido_nombre(f'{prefijo}estudiante__'),
+})
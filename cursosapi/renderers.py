@@ -0,0 +1,131 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """``JSONRenderer`` que codifica con ``orjson`` si está instalado.
+
+    Produce los mismos bytes que el renderer de DRF: JSON compacto en UTF-8,
+    fechas y horas en ISO 8601 (``Z`` para UTC) y ``Decimal`` como número.
+    Los tipos que ``orjson`` no conoce pasan por el ``default`` del encoder
+    de DRF. Sin ``orjson``, o si se pide sangría (la API navegable), se usa
+    la implementación de DRF con ``json`` de la biblioteca estándar.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            # UNICODE_JSON y COMPACT_JSON distintos de los valores por defecto
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            contenido = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+            )
+        except orjson.JSONEncodeError:
+            # Enteros de más de 64 bits y demás casos que solo resuelve json
+            return super().render(data, accepted_media_type, renderer_context)
+        # Como DRF: separadores de línea escapados para poder incrustarlo en JavaScript
+        if b'\xe2\x80' in contenido:
+            contenido = contenido.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return contenido
+
+
+class _Buffer:
+    """Pseudo-archivo para ``csv.writer``: devuelve la línea en lugar de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+# csv.writer no guarda estado entre filas: basta uno para todas las respuestas
+_ESCRITOR = csv.writer(_Buffer())
+
+
+class StreamingRenderer(BaseRenderer):
+    """Renderer de filas que también sabe escribirlas de forma incremental.
+
+    ``render`` cubre las respuestas normales (por ejemplo, errores), mientras
+    que ``streaming_response`` emite un iterador de diccionarios fila a fila
+    sin construir el cuerpo completo en memoria. Si las filas llegan como
+    iterador asíncrono (bajo ASGI), la respuesta también lo es y cada bloque
+    de ``filas_por_bloque`` filas se envía en cuanto está listo.
+    """
+
+    charset = 'utf-8'
+    filas_por_bloque = 500
+
+    def cabecera(self, campos):
+        return ''
+
+    def linea(self, fila, campos):
+        raise NotImplementedError
+
+    def lineas(self, filas, campos):
+        cabecera = self.cabecera(campos)
+        if cabecera:
+            yield cabecera
+        for fila in filas:
+            yield self.linea(fila, campos)
+
+    async def _abloques(self, filas, campos):
+        bloque = [self.cabecera(campos)]
+        async for fila in filas:
+            bloque.append(self.linea(fila, campos))
+            if len(bloque) >= self.filas_por_bloque:
+                yield ''.join(bloque).encode(self.charset)
+                bloque = []
+        if any(bloque):
+            yield ''.join(bloque).encode(self.charset)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        filas = [data] if isinstance(data, dict) else list(data)
+        campos = list(filas[0]) if filas else []
+        return b''.join(linea.encode(self.charset) for linea in self.lineas(filas, campos))
+
+    def streaming_response(self, filas, campos, nombre_archivo):
+        if hasattr(filas, '__aiter__'):
+            contenido = self._abloques(filas, campos)
+        else:
+            contenido = (linea.encode(self.charset) for linea in self.lineas(filas, campos))
+        response = StreamingHttpResponse(
+            contenido, content_type=f'{self.media_type}; charset={self.charset}'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}.{self.format}"'
+        return response
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def linea(self, fila, campos):
+        return json.dumps(fila, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def cabecera(self, campos):
+        return _ESCRITOR.writerow(campos)
+
+    def linea(self, fila, campos):
+        return _ESCRITOR.writerow([fila.get(campo) for campo in campos])
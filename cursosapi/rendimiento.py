@@ -0,0 +1,509 @@
+"""Banco de pruebas de rendimiento de los endpoints de la API.
+
+Recorre todas las rutas registradas en ``urls.router`` (``list``, ``retrieve``
+y cada ``@action``) y mide, para cada una, la latencia p50/p95, el número de
+consultas SQL, las filas leídas de la base y el pico de memoria. Las acciones
+que escriben se ejecutan dentro de una transacción que se revierte, así que
+cada repetición parte de los mismos datos.
+
+Lo usa ``manage.py medir_endpoints``, que además compara contra la línea base
+guardada en ``linea_base_rendimiento.json``. ``medir_renderizado`` compara
+aparte el renderer JSON configurado con el ``JSONRenderer`` de DRF sobre las
+respuestas más grandes (``manage.py medir_renderizado``) y ``medir_concurrencia``
+el rendimiento con muchas peticiones a la vez de las lecturas frecuentes
+servidas por WSGI (viewsets de DRF) y por ASGI (vistas de ``asincrono``)
+(``manage.py medir_concurrencia``).
+"""
+import asyncio
+import gzip
+import json
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+from wsgiref.util import setup_testing_defaults
+
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, reset_queries, transaction
+from django.db.backends.utils import CursorWrapper
+from django.db.models import Count, F
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+
+from .models import Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia
+from .urls import router
+
+LINEA_BASE = Path(__file__).with_name('linea_base_rendimiento.json')
+
+# Tamaños para ``generar_datos``; la fecha fija hace los datos reproducibles
+ESCALAS = {
+    'pequena': {'profesores': 10, 'cursos': 40, 'estudiantes': 400, 'desde': date(2025, 1, 1)},
+    'mediana': {'profesores': 50, 'cursos': 200, 'estudiantes': 4000, 'desde': date(2025, 1, 1)},
+    'grande': {'profesores': 200, 'cursos': 2000, 'estudiantes': 50000, 'desde': date(2025, 1, 1)},
+}
+
+# Márgenes absolutos por debajo de los cuales una diferencia se considera ruido
+MARGEN_MS = 5.0
+MARGEN_KB = 64
+MARGEN_CONSULTAS_ESCALA = 2
+
+
+@contextmanager
+def contar_filas():
+    """Cuenta las filas que devuelven los ``fetch*`` de los cursores de Django."""
+    contador = {'filas': 0}
+
+    def fetchone(self):
+        fila = self.cursor.fetchone()
+        contador['filas'] += fila is not None
+        return fila
+
+    def fetchmany(self, *args, **kwargs):
+        filas = self.cursor.fetchmany(*args, **kwargs)
+        contador['filas'] += len(filas)
+        return filas
+
+    def fetchall(self):
+        filas = self.cursor.fetchall()
+        contador['filas'] += len(filas)
+        return filas
+
+    metodos = {'fetchone': fetchone, 'fetchmany': fetchmany, 'fetchall': fetchall}
+    # CursorWrapper los delega con __getattr__; definirlos en la clase los intercepta
+    for nombre, metodo in metodos.items():
+        setattr(CursorWrapper, nombre, metodo)
+    try:
+        yield contador
+    finally:
+        for nombre in metodos:
+            delattr(CursorWrapper, nombre)
+
+
+def muestras():
+    """Objetos representativos (los más cargados) sobre los que se piden los detalles."""
+    curso = Curso.objects.order_by('-inscritos_activos', 'id').first()
+    estudiante = (
+        Estudiante.objects.annotate(total=Count('inscripciones'))
+        .order_by('-total', 'id').first()
+    )
+    inscripcion = Inscripcion.objects.filter(curso=curso, estado='ACTIVO').order_by('id').first()
+    fecha = (
+        Asistencia.objects.filter(inscripcion__curso=curso)
+        .order_by('fecha').values_list('fecha', flat=True).first()
+    ) or curso.fecha_inicio
+    curso_libre = Curso.objects.filter(inscritos_activos__lt=F('cupo_maximo')).order_by('id').first()
+    return {
+        'profesor': (
+            Profesor.objects.annotate(total=Count('cursos'))
+            .order_by('-total', 'id').first()
+        ),
+        'curso': curso,
+        'estudiante': estudiante,
+        'inscripcion': inscripcion,
+        'calificacion': Calificacion.objects.order_by('id').first(),
+        'asistencia': Asistencia.objects.order_by('id').first(),
+        'fecha': fecha,
+        'curso_libre': curso_libre,
+        'estudiante_libre': Estudiante.objects.exclude(inscripciones__curso=curso_libre).order_by('id').first(),
+        'estudiantes_curso': list(
+            Inscripcion.objects.filter(curso=curso, estado='ACTIVO')
+            .values_list('estudiante_id', flat=True)
+        ),
+    }
+
+
+# Parámetros de las acciones que los necesitan: (basename, acción) -> función(muestras)
+PETICIONES = {
+    ('curso', 'lista_asistencia'): lambda m: {'params': {'fecha': m['fecha'].isoformat()}},
+    ('curso', 'registrar_asistencia'): lambda m: {'data': {
+        'fecha': m['fecha'].isoformat(),
+        'asistencias': [
+            {'estudiante_id': estudiante_id, 'presente': True}
+            for estudiante_id in m['estudiantes_curso']
+        ],
+    }},
+    ('inscripcion', 'inscribir_estudiante'): lambda m: {'data': {
+        'estudiante_id': m['estudiante_libre'].id, 'curso_id': m['curso_libre'].id,
+    }},
+    ('inscripcion', 'inscribir_lote'): lambda m: {'data': {
+        'estudiante_ids': [m['estudiante_libre'].id], 'curso_ids': [m['curso_libre'].id],
+    }},
+    ('calificacion', 'registrar_calificacion'): lambda m: {'data': {
+        'inscripcion_id': m['inscripcion'].id, 'valor': '8.50',
+    }},
+    ('asistencia', 'por_curso'): lambda m: {'params': {
+        'curso_id': m['curso'].id,
+        'fecha_inicio': m['fecha'].isoformat(),
+        'fecha_fin': m['curso'].fecha_fin.isoformat(),
+    }},
+    ('asistencia', 'por_estudiante'): lambda m: {'params': {'estudiante_id': m['estudiante'].id}},
+}
+
+
+def endpoints(m):
+    """``(nombre, método, url, parámetros, datos)`` de cada ruta del router."""
+    for _, viewset, basename in router.registry:
+        pk = m[basename].pk
+        yield f'{basename}-list', 'get', reverse(f'{basename}-list'), {}, None
+        yield f'{basename}-detail', 'get', reverse(f'{basename}-detail', kwargs={'pk': pk}), {}, None
+        for accion in viewset.get_extra_actions():
+            kwargs = {'pk': pk} if accion.detail else {}
+            peticion = PETICIONES.get((basename, accion.__name__), lambda m: {})(m)
+            for metodo in accion.mapping:
+                yield (
+                    f'{basename}-{accion.url_name}', metodo,
+                    reverse(f'{basename}-{accion.url_name}', kwargs=kwargs),
+                    peticion.get('params', {}), peticion.get('data')
+                )
+
+
+def _percentil(valores, percentil):
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method='inclusive')[percentil - 1]
+
+
+def medir(repeticiones=15, filtro=None):
+    """Mide cada endpoint; la caché se vacía antes de cada petición.
+
+    Una ejecución instrumentada (consultas, filas y ``tracemalloc``) da los
+    contadores; las ``repeticiones`` sin instrumentar dan la latencia.
+    """
+    client = APIClient()
+    resultados = {}
+    for nombre, metodo, url, params, datos in endpoints(muestras()):
+        if filtro and filtro not in nombre:
+            continue
+
+        def pedir():
+            cache.clear()
+            with transaction.atomic():
+                if metodo == 'get':
+                    response = client.get(url, params)
+                else:
+                    response = client.generic(
+                        metodo.upper(), url, json.dumps(datos or {}), 'application/json'
+                    )
+                # Las escrituras no deben alterar las mediciones siguientes
+                transaction.set_rollback(True)
+            return response
+
+        pedir()
+        reset_queries()
+        with CaptureQueriesContext(connection) as consultas, contar_filas() as filas:
+            tracemalloc.start()
+            try:
+                response = pedir()
+                _, pico = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        # captured_queries se lee del log de la conexión, que cada petición reinicia
+        total_consultas = len(consultas)
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            pedir()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        resultados[nombre] = {
+            'estado': response.status_code,
+            'p50_ms': round(statistics.median(tiempos), 2),
+            'p95_ms': round(_percentil(tiempos, 95), 2),
+            'consultas': total_consultas,
+            'filas': filas['filas'],
+            'memoria_kb': round(pico / 1024),
+        }
+    return resultados
+
+
+def comparar(actual, base, umbral=1.0):
+    """Devuelve las regresiones de ``actual`` respecto de ``base`` (por escala y endpoint).
+
+    Consultas y filas son deterministas con la misma semilla: cualquier
+    aumento de consultas es una regresión y las filas toleran un 10 %. La
+    latencia (p50; el p95 de pocas repeticiones es demasiado ruidoso) y la
+    memoria dependen de la máquina y usan ``umbral`` más un margen absoluto.
+    Una escala medida que no está en ``base`` (si hay base) también cuenta:
+    si no, esa mitad de la comprobación quedaría apagada sin aviso.
+    """
+    regresiones = []
+    for escala, resultados in actual.items():
+        if base and escala not in base:
+            regresiones.append(f"{escala}: no está en la línea base")
+            continue
+        for nombre, medida in resultados.items():
+            previa = base.get(escala, {}).get(nombre)
+            if previa is None:
+                continue
+            if medida['estado'] != previa['estado']:
+                regresiones.append(
+                    f"{escala} {nombre}: estado {previa['estado']} -> {medida['estado']}"
+                )
+            if medida['consultas'] > previa['consultas']:
+                regresiones.append(
+                    f"{escala} {nombre}: consultas {previa['consultas']} -> {medida['consultas']}"
+                )
+            if medida['filas'] > previa['filas'] * 1.1:
+                regresiones.append(
+                    f"{escala} {nombre}: filas {previa['filas']} -> {medida['filas']}"
+                )
+            for campo, margen in (('p50_ms', MARGEN_MS), ('memoria_kb', MARGEN_KB)):
+                if medida[campo] > previa[campo] * (1 + umbral) and medida[campo] - previa[campo] > margen:
+                    regresiones.append(f"{escala} {nombre}: {campo} {previa[campo]} -> {medida[campo]}")
+    return regresiones
+
+
+def crecimiento_consultas(actual):
+    """Endpoints cuyo número de consultas crece con el tamaño de los datos (N+1)."""
+    escalas = [escala for escala in ESCALAS if escala in actual]
+    if len(escalas) < 2:
+        return []
+    menor, mayor = actual[escalas[0]], actual[escalas[-1]]
+    return [
+        f"{nombre}: {menor[nombre]['consultas']} consultas en {escalas[0]}, "
+        f"{mayor[nombre]['consultas']} en {escalas[-1]}"
+        for nombre in menor
+        if nombre in mayor
+        and mayor[nombre]['consultas'] - menor[nombre]['consultas'] > MARGEN_CONSULTAS_ESCALA
+    ]
+
+
+def cargas_renderizado(m):
+    """``response.data`` de las respuestas más grandes, listas para renderizar."""
+    urls = {
+        'asistencias_por_curso': (
+            reverse('asistencia-por-curso'), {'curso_id': m['curso'].id}
+        ),
+        'estudiantes_curso': (reverse('curso-estudiantes', kwargs={'pk': m['curso'].pk}), {}),
+        'resumen_asistencia_curso': (
+            reverse('curso-resumen-asistencia', kwargs={'pk': m['curso'].pk}), {}
+        ),
+        'calificaciones_estudiante': (
+            reverse('estudiante-calificaciones', kwargs={'pk': m['estudiante'].pk}), {}
+        ),
+        'inscripciones_expandidas': (
+            reverse('inscripcion-list'),
+            {'expand': 'estudiante,curso', 'paginacion': 'cursor', 'page_size': 100}
+        ),
+        'calificaciones': (reverse('calificacion-list'), {'paginacion': 'cursor', 'page_size': 100}),
+    }
+    client = APIClient()
+    cargas = {}
+    for nombre, (url, params) in urls.items():
+        response = client.get(url, params, HTTP_ACCEPT='application/json')
+        cargas[nombre] = response.data
+    return cargas
+
+
+def medir_renderizado(repeticiones=20):
+    """Tiempo y tamaño de cada carga con el ``JSONRenderer`` de DRF y con el configurado.
+
+    ``igual`` indica si los bytes coinciden; el tamaño comprimido usa el
+    mismo nivel de gzip que ``GZipMiddleware``.
+    """
+    base = JSONRenderer()
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    resultados = {}
+    for nombre, datos in cargas_renderizado(muestras()).items():
+        tiempos = {}
+        for clave, actual in (('drf', base), ('configurado', renderer)):
+            muestras_ms = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                contenido = actual.render(datos)
+                muestras_ms.append((time.perf_counter() - inicio) * 1000)
+            tiempos[clave] = (statistics.median(muestras_ms), contenido)
+        (ms_drf, contenido_drf), (ms_configurado, contenido) = tiempos['drf'], tiempos['configurado']
+        resultados[nombre] = {
+            'renderer': type(renderer).__name__,
+            'bytes': len(contenido),
+            'bytes_gzip': len(gzip.compress(contenido, compresslevel=6, mtime=0)),
+            'drf_ms': round(ms_drf, 3),
+            'configurado_ms': round(ms_configurado, 3),
+            'aceleracion': round(ms_drf / ms_configurado, 1) if ms_configurado else None,
+            'igual': contenido == contenido_drf,
+        }
+    return resultados
+
+
+def rutas_concurrencia(m):
+    """Las lecturas que sirven las vistas de ``asincrono`` bajo ASGI."""
+    return {
+        'catalogo': reverse('curso-list'),
+        'estudiantes_curso': reverse('curso-estudiantes', kwargs={'pk': m['curso'].pk}),
+        'horario_estudiante': reverse('estudiante-horario', kwargs={'pk': m['estudiante'].pk}),
+        'cursos_estudiante': reverse('estudiante-cursos', kwargs={'pk': m['estudiante'].pk}),
+        'calificaciones_estudiante': reverse('estudiante-calificaciones', kwargs={'pk': m['estudiante'].pk}),
+    }
+
+
+def _peticion_wsgi(aplicacion, ruta):
+    entorno = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': ruta, 'QUERY_STRING': '',
+        'HTTP_HOST': 'testserver', 'SERVER_NAME': 'testserver', 'HTTP_ACCEPT': 'application/json',
+    }
+    setup_testing_defaults(entorno)
+    estado = {}
+
+    def start_response(status, headers, exc_info=None):
+        estado['codigo'] = int(status.split()[0])
+
+    resultado = aplicacion(entorno, start_response)
+    try:
+        cuerpo = b''.join(resultado)
+    finally:
+        resultado.close()
+    return estado['codigo'], cuerpo
+
+
+async def _peticion_asgi(aplicacion, ruta):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': ruta, 'raw_path': ruta.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'accept', b'application/json')],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    cuerpo_enviado = False
+    estado = {}
+    partes = []
+
+    async def receive():
+        nonlocal cuerpo_enviado
+        if not cuerpo_enviado:
+            cuerpo_enviado = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # El handler cancela la espera de desconexión al terminar la respuesta
+        await asyncio.Event().wait()
+
+    async def send(mensaje):
+        if mensaje['type'] == 'http.response.start':
+            estado['codigo'] = mensaje['status']
+        elif mensaje['type'] == 'http.response.body':
+            partes.append(mensaje.get('body', b''))
+
+    await aplicacion(scope, receive, send)
+    return estado['codigo'], b''.join(partes)
+
+
+def _repartir(peticiones, concurrencia):
+    return [peticiones // concurrencia + (i < peticiones % concurrencia) for i in range(concurrencia)]
+
+
+def _resultado_carga(duracion, latencias, respuestas):
+    latencias.sort()
+    return {
+        'peticiones_s': round(len(latencias) / duracion, 1),
+        'p50_ms': round(_percentil(latencias, 50), 2),
+        'p95_ms': round(_percentil(latencias, 95), 2),
+        'respuestas': respuestas,
+    }
+
+
+@contextmanager
+def latencia_db(ms):
+    """Simula una base de datos en red: cada consulta espera ``ms`` antes de ejecutarse."""
+    if not ms:
+        yield
+        return
+    originales = {nombre: getattr(CursorWrapper, nombre) for nombre in ('execute', 'executemany')}
+
+    def con_espera(original):
+        def metodo(self, *args, **kwargs):
+            time.sleep(ms / 1000)
+            return original(self, *args, **kwargs)
+        return metodo
+
+    for nombre, original in originales.items():
+        setattr(CursorWrapper, nombre, con_espera(original))
+    try:
+        yield
+    finally:
+        for nombre, original in originales.items():
+            setattr(CursorWrapper, nombre, original)
+
+
+def carga_wsgi(ruta, concurrencia, peticiones, hilos=None):
+    """``peticiones`` GET a ``ruta`` desde ``concurrencia`` clientes contra ``WSGIHandler``.
+
+    Como un servidor WSGI, solo ``hilos`` peticiones se atienden a la vez; las
+    demás esperan turno y esa espera cuenta en su latencia.
+    """
+    aplicacion = WSGIHandler()
+    latencias = []
+    respuestas = set()
+
+    def cliente(servidor, cantidad):
+        for _ in range(cantidad):
+            inicio = time.perf_counter()
+            respuestas.add(servidor.submit(_peticion_wsgi, aplicacion, ruta).result())
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(hilos or concurrencia) as servidor, ThreadPoolExecutor(concurrencia) as clientes:
+        list(clientes.map(lambda cantidad: cliente(servidor, cantidad), _repartir(peticiones, concurrencia)))
+    return _resultado_carga(time.perf_counter() - inicio, latencias, respuestas)
+
+
+def carga_asgi(ruta, concurrencia, peticiones):
+    """Lo mismo que ``carga_wsgi`` con ``concurrencia`` tareas en un bucle contra ``ASGIHandler``."""
+    latencias = []
+    respuestas = set()
+
+    async def cliente(aplicacion, cantidad):
+        for _ in range(cantidad):
+            inicio = time.perf_counter()
+            respuestas.add(await _peticion_asgi(aplicacion, ruta))
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    async def lanzar():
+        aplicacion = ASGIHandler()
+        await asyncio.gather(*(
+            cliente(aplicacion, cantidad) for cantidad in _repartir(peticiones, concurrencia)
+        ))
+
+    with override_settings(ROOT_URLCONF='config.urls_asgi'):
+        inicio = time.perf_counter()
+        asyncio.run(lanzar())
+        duracion = time.perf_counter() - inicio
+    return _resultado_carga(duracion, latencias, respuestas)
+
+
+def medir_concurrencia(concurrencia=32, peticiones=400, hilos_wsgi=4, latencia_ms=1.0):
+    """Peticiones por segundo y latencias de cada lectura frecuente bajo WSGI y ASGI.
+
+    ``hilos_wsgi`` son los hilos del servidor WSGI simulado y ``latencia_ms``
+    la ida y vuelta de cada consulta a la base (con SQLite en memoria no hay
+    esperas y ASGI solo añade los saltos entre hilos de la cadena de
+    middleware). ``igual`` indica que todas las respuestas fueron 200 y con
+    el mismo cuerpo en los dos servidores. La caché se vacía antes de cada
+    serie para que las dos partan igual.
+    """
+    cargas = (
+        ('wsgi', lambda ruta: carga_wsgi(ruta, concurrencia, peticiones, hilos_wsgi)),
+        ('asgi', lambda ruta: carga_asgi(ruta, concurrencia, peticiones)),
+    )
+    resultados = {}
+    for nombre, ruta in rutas_concurrencia(muestras()).items():
+        medidas = {}
+        for servidor, carga in cargas:
+            cache.clear()
+            # Con la latencia simulada y la cola, todas pasarían por lentas
+            with latencia_db(latencia_ms), override_settings(METRICAS_CONSULTA_LENTA_MS=None):
+                medidas[servidor] = carga(ruta)
+        respuestas = medidas['wsgi'].pop('respuestas') | medidas['asgi'].pop('respuestas')
+        resultados[nombre] = {
+            **{f'{servidor}_{clave}': valor for servidor, medida in medidas.items() for clave, valor in medida.items()},
+            'relacion': round(medidas['asgi']['peticiones_s'] / medidas['wsgi']['peticiones_s'], 2),
+            'igual': len(respuestas) == 1 and next(iter(respuestas))[0] == 200,
+        }
+    return resultados
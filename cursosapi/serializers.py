@@ -1,34 +1,123 @@
 from rest_framework import serializers
-from .models import Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia
+from rest_framework.settings import api_settings
+from .models import Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia, CupoAgotado
+from django.db import transaction
 from django.db.models import Q
+from .metricas import MedicionSerializerMixin
+from . import horarios
 
-class ProfesorSerializer(serializers.ModelSerializer):
+
+class CamposSolicitadosMixin:
+    """Limita la salida a ``context['campos']`` y anida las relaciones de ``context['expandir']``.
+
+    Solo actúa en el serializer raíz (o en el hijo de su ``many=True``): las
+    relaciones anidadas se devuelven completas. ``expandibles`` asocia cada
+    relación con el serializer que la anida y ``campos_modelo`` indica qué
+    campos del modelo lee cada campo calculado, para el ``only()`` del detalle.
+    """
+
+    expandibles = {}
+    campos_modelo = {}
+
+    def get_fields(self):
+        campos = super().get_fields()
+        padre = self.parent
+        if padre is not None and not (isinstance(padre, serializers.ListSerializer) and padre.parent is None):
+            return campos
+
+        seleccion = self.context.get('campos')
+        expandir = self.context.get('expandir') or ()
+        desconocidas = set(expandir) - set(self.expandibles)
+        if desconocidas:
+            raise serializers.ValidationError(
+                {'expand': f"No se puede expandir: {', '.join(sorted(desconocidas))}"}
+            )
+        for nombre in expandir:
+            campos[nombre] = self.expandibles[nombre](read_only=True)
+        if seleccion is not None:
+            desconocidos = set(seleccion) - set(campos)
+            if desconocidos:
+                raise serializers.ValidationError(
+                    {'fields': f"Campos desconocidos: {', '.join(sorted(desconocidos))}"}
+                )
+            campos = {
+                nombre: campo for nombre, campo in campos.items()
+                if nombre in seleccion or nombre in expandir
+            }
+        return campos
+
+    @classmethod
+    def columnas_modelo(cls, campos):
+        """Campos del modelo que hay que cargar para serializar ``campos``."""
+        opciones = cls.Meta.model._meta
+        concretos = {campo.name for campo in opciones.concrete_fields}
+        columnas = {opciones.pk.name}
+        for nombre in campos:
+            columnas.update(cls.campos_modelo.get(nombre, (nombre,) if nombre in concretos else ()))
+        return sorted(columnas)
+
+
+class ProfesorSerializer(CamposSolicitadosMixin, MedicionSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Profesor
         fields = '__all__'
 
-class CursoSerializer(serializers.ModelSerializer):
+class CursoSerializer(CamposSolicitadosMixin, MedicionSerializerMixin, serializers.ModelSerializer):
     profesor_nombre = serializers.SerializerMethodField()
+    expandibles = {'profesor': ProfesorSerializer}
     
     class Meta:
         model = Curso
         fields = '__all__'
     
+    def conflictos_profesor(self, data, indices):
+        """Choques del curso resultante con los demás cursos de su profesor.
+
+        ``indices`` es ``horarios.indices`` o ``horarios.indices_bloqueados``.
+        """
+        instance = self.instance
+        profesor = data.get('profesor', getattr(instance, 'profesor', None))
+        if profesor is None or not data.get('activo', getattr(instance, 'activo', True)):
+            return []
+        franja = horarios.Franja(getattr(instance, 'id', None), *(
+            data.get(campo, getattr(instance, campo, None)) for campo in horarios.CAMPOS_FRANJA[1:]
+        ))
+        return indices('profesor', [profesor.id])[profesor.id].conflictos(franja)
+
+    def validate(self, data):
+        # El profesor no puede quedar asignado a dos cursos que se superponen
+        conflictos = self.conflictos_profesor(data, horarios.indices)
+        if conflictos:
+            raise serializers.ValidationError({'profesor': horarios.mensaje(conflictos)})
+        return data
+
+    def save(self, **kwargs):
+        # Se repite la comprobación con el profesor bloqueado, en la transacción que guarda el curso
+        with transaction.atomic():
+            conflictos = self.conflictos_profesor({**self.validated_data, **kwargs}, horarios.indices_bloqueados)
+            if conflictos:
+                raise serializers.ValidationError({'profesor': [horarios.mensaje(conflictos)]})
+            return super().save(**kwargs)
+
     def get_profesor_nombre(self, obj):
+        # Anotado por CursoQuerySet.con_profesor_nombre()
+        if hasattr(obj, 'profesor_nombre'):
+            return obj.profesor_nombre
         if obj.profesor:
             return f"{obj.profesor.nombre} {obj.profesor.apellido}"
         return None
 
 class CursoDetalleSerializer(CursoSerializer):
     estudiantes_inscritos = serializers.SerializerMethodField()
+    campos_modelo = {'estudiantes_inscritos': ('inscritos_activos',)}
     
     class Meta(CursoSerializer.Meta):
-        fields = CursoSerializer.Meta.fields + ('estudiantes_inscritos',)
+        fields = CursoSerializer.Meta.fields
     
     def get_estudiantes_inscritos(self, obj):
-        return obj.inscripciones.filter(estado='ACTIVO').count()
+        return obj.inscritos_activos
 
-class EstudianteSerializer(serializers.ModelSerializer):
+class EstudianteSerializer(CamposSolicitadosMixin, MedicionSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Estudiante
         fields = '__all__'
@@ -37,11 +126,14 @@ class EstudianteDetalleSerializer(EstudianteSerializer):
     cursos_inscritos = serializers.SerializerMethodField()
     
     class Meta(EstudianteSerializer.Meta):
-        fields = EstudianteSerializer.Meta.fields + ('cursos_inscritos',)
+        fields = EstudianteSerializer.Meta.fields
     
     def get_cursos_inscritos(self, obj):
         cursos = []
-        inscripciones = obj.inscripciones.filter(estado='ACTIVO')
+        # Precargado por EstudianteViewSet.get_queryset()
+        inscripciones = getattr(obj, 'inscripciones_activas', None)
+        if inscripciones is None:
+            inscripciones = obj.inscripciones.filter(estado='ACTIVO').select_related('curso__profesor')
         for inscripcion in inscripciones:
             cursos.append({
                 'id': inscripcion.curso.id,
@@ -51,53 +143,108 @@ class EstudianteDetalleSerializer(EstudianteSerializer):
             })
         return cursos
 
-class InscripcionSerializer(serializers.ModelSerializer):
+class InscripcionSerializer(CamposSolicitadosMixin, MedicionSerializerMixin, serializers.ModelSerializer):
+    expandibles = {'estudiante': EstudianteSerializer, 'curso': CursoSerializer}
+
     class Meta:
         model = Inscripcion
         fields = '__all__'
 
     def validate(self, data):
+        instance = self.instance
+        estudiante = data.get('estudiante', getattr(instance, 'estudiante', None))
+        curso = data.get('curso', getattr(instance, 'curso', None))
+        estado = data.get('estado', getattr(instance, 'estado', 'ACTIVO'))
+
         # Verificar si el estudiante ya está inscrito en este curso
-        if Inscripcion.objects.filter(
-            Q(estudiante=data['estudiante']) & 
-            Q(curso=data['curso']) & 
+        inscripciones = Inscripcion.objects.filter(
+            Q(estudiante=estudiante) & 
+            Q(curso=curso) & 
             ~Q(estado='BAJA')
-        ).exists():
+        )
+        if instance is not None:
+            inscripciones = inscripciones.exclude(pk=instance.pk)
+        if inscripciones.exists():
             raise serializers.ValidationError("El estudiante ya está inscrito en este curso.")
         
-        # Verificar si hay cupo disponible
-        curso = data['curso']
-        inscritos_activos = Inscripcion.objects.filter(
-            curso=curso, 
-            estado='ACTIVO'
-        ).count()
-        
-        if inscritos_activos >= curso.cupo_maximo:
+        # Verificar si hay cupo disponible (la reserva definitiva la hace Inscripcion.save)
+        ya_ocupa = (
+            instance is not None
+            and instance.estado == 'ACTIVO'
+            and instance.curso_id == curso.id
+        )
+        if estado == 'ACTIVO' and not ya_ocupa and curso.inscritos_activos >= curso.cupo_maximo:
             raise serializers.ValidationError("El curso ha alcanzado su cupo máximo.")
+
+        conflictos = self.conflictos_estudiante(data, horarios.indices)
+        if conflictos:
+            raise serializers.ValidationError(horarios.mensaje(conflictos) + ".")
         
         return data
 
+    def conflictos_estudiante(self, data, indices):
+        """Choques del curso de la inscripción con los demás cursos activos del estudiante.
+
+        ``indices`` es ``horarios.indices`` o ``horarios.indices_bloqueados``.
+        """
+        instance = self.instance
+        estudiante = data.get('estudiante', getattr(instance, 'estudiante', None))
+        curso = data.get('curso', getattr(instance, 'curso', None))
+        if data.get('estado', getattr(instance, 'estado', 'ACTIVO')) != 'ACTIVO':
+            return []
+        # Si la inscripción cambia de curso, el anterior deja de contar
+        return [
+            otra for otra in indices('estudiante', [estudiante.id])[estudiante.id].conflictos(
+                horarios.franja_curso(curso)
+            )
+            if otra.curso_id != getattr(instance, 'curso_id', None)
+        ]
+
+    def save(self, **kwargs):
+        try:
+            # Se repite la comprobación de horario con el estudiante bloqueado, en la transacción que inscribe
+            with transaction.atomic():
+                conflictos = self.conflictos_estudiante(
+                    {**self.validated_data, **kwargs}, horarios.indices_bloqueados
+                )
+                if conflictos:
+                    raise serializers.ValidationError(
+                        {api_settings.NON_FIELD_ERRORS_KEY: [horarios.mensaje(conflictos) + "."]}
+                    )
+                return super().save(**kwargs)
+        except CupoAgotado as e:
+            raise serializers.ValidationError(str(e))
+
 class InscripcionDetalleSerializer(InscripcionSerializer):
     estudiante_nombre = serializers.SerializerMethodField()
     curso_nombre = serializers.SerializerMethodField()
     calificacion_valor = serializers.SerializerMethodField()
     
     class Meta(InscripcionSerializer.Meta):
-        fields = InscripcionSerializer.Meta.fields + ('estudiante_nombre', 'curso_nombre', 'calificacion_valor')
+        fields = InscripcionSerializer.Meta.fields
     
     def get_estudiante_nombre(self, obj):
+        # Los valores anotados por InscripcionQuerySet.con_detalle() evitan un JOIN por fila
+        if hasattr(obj, 'estudiante_nombre'):
+            return obj.estudiante_nombre
         return f"{obj.estudiante.nombre} {obj.estudiante.apellido}"
     
     def get_curso_nombre(self, obj):
+        if hasattr(obj, 'curso_nombre'):
+            return obj.curso_nombre
         return f"{obj.curso.codigo} - {obj.curso.nombre}"
     
     def get_calificacion_valor(self, obj):
+        if hasattr(obj, 'calificacion_valor'):
+            return obj.calificacion_valor
         try:
             return obj.calificacion.valor
         except Calificacion.DoesNotExist:
             return None
 
-class CalificacionSerializer(serializers.ModelSerializer):
+class CalificacionSerializer(CamposSolicitadosMixin, MedicionSerializerMixin, serializers.ModelSerializer):
+    expandibles = {'inscripcion': InscripcionSerializer}
+
     class Meta:
         model = Calificacion
         fields = '__all__'
@@ -107,15 +254,22 @@ class CalificacionDetalleSerializer(CalificacionSerializer):
     curso_nombre = serializers.SerializerMethodField()
     
     class Meta(CalificacionSerializer.Meta):
-        fields = CalificacionSerializer.Meta.fields + ('estudiante_nombre', 'curso_nombre')
+        fields = CalificacionSerializer.Meta.fields
     
     def get_estudiante_nombre(self, obj):
+        # Anotado por DetalleInscripcionQuerySet.con_detalle()
+        if hasattr(obj, 'estudiante_nombre'):
+            return obj.estudiante_nombre
         return f"{obj.inscripcion.estudiante.nombre} {obj.inscripcion.estudiante.apellido}"
     
     def get_curso_nombre(self, obj):
+        if hasattr(obj, 'curso_nombre'):
+            return obj.curso_nombre
         return f"{obj.inscripcion.curso.codigo} - {obj.inscripcion.curso.nombre}"
 
-class AsistenciaSerializer(serializers.ModelSerializer):
+class AsistenciaSerializer(CamposSolicitadosMixin, MedicionSerializerMixin, serializers.ModelSerializer):
+    expandibles = {'inscripcion': InscripcionSerializer}
+
     class Meta:
         model = Asistencia
         fields = '__all__'
@@ -125,15 +279,20 @@ class AsistenciaDetalleSerializer(AsistenciaSerializer):
     curso_nombre = serializers.SerializerMethodField()
     
     class Meta(AsistenciaSerializer.Meta):
-        fields = AsistenciaSerializer.Meta.fields + ('estudiante_nombre', 'curso_nombre')
+        fields = AsistenciaSerializer.Meta.fields
     
     def get_estudiante_nombre(self, obj):
+        # Anotado por DetalleInscripcionQuerySet.con_detalle()
+        if hasattr(obj, 'estudiante_nombre'):
+            return obj.estudiante_nombre
         return f"{obj.inscripcion.estudiante.nombre} {obj.inscripcion.estudiante.apellido}"
     
     def get_curso_nombre(self, obj):
+        if hasattr(obj, 'curso_nombre'):
+            return obj.curso_nombre
         return f"{obj.inscripcion.curso.codigo} - {obj.inscripcion.curso.nombre}"
 
-class HorarioEstudianteSerializer(serializers.Serializer):
+class HorarioEstudianteSerializer(MedicionSerializerMixin, serializers.Serializer):
     dia = serializers.CharField(source='curso.get_dias_display')
     hora_inicio = serializers.TimeField(source='curso.hora_inicio')
     hora_fin = serializers.TimeField(source='curso.hora_fin')
@@ -146,11 +305,12 @@ class HorarioEstudianteSerializer(serializers.Serializer):
             return f"{obj.curso.profesor.nombre} {obj.curso.profesor.apellido}"
         return None
 
-class ListaAsistenciaSerializer(serializers.Serializer):
+class ListaAsistenciaSerializer(MedicionSerializerMixin, serializers.Serializer):
     estudiante_id = serializers.IntegerField(source='estudiante.id')
     matricula = serializers.CharField(source='estudiante.matricula')
     nombre = serializers.SerializerMethodField()
     presente = serializers.BooleanField(required=False, default=False)
     
     def get_nombre(self, obj):
-        return f"{obj.estudiante.apellido}, {obj.estudiante.nombre}"
\ No newline at end of file
+        estudiante = obj['estudiante']
+        return f"{estudiante.apellido}, {estudiante.nombre}"
\ No newline at end of file
@@ -0,0 +1,229 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Count, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from . import busqueda, cache_respuestas, estadisticas, horarios, metricas, perfilado
+from .models import Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia, Eliminacion
+
+
+# Campo de Inscripcion por el que la alcanza el borrado de cada modelo
+_RELACION_INSCRIPCION = {Inscripcion: 'pk', Curso: 'curso', Estudiante: 'estudiante'}
+_CUPOS_LIBERADOS = '_cupos_liberados'
+
+
+def _inscripciones_del_borrado(origin):
+    """Las inscripciones que se llevan el borrado de ``origin`` y sus cascadas."""
+    if isinstance(origin, QuerySet):
+        modelo, pks = origin.model, origin.values('pk')
+    else:
+        modelo, pks = type(origin), [origin.pk]
+    campo = _RELACION_INSCRIPCION.get(modelo)
+    if campo is None:
+        return None
+    return Inscripcion.objects.filter(**{f'{campo}__in': pks})
+
+
+@receiver(pre_delete, sender=Inscripcion)
+def liberar_cupo_inscripcion(sender, instance, origin=None, **kwargs):
+    # También se ejecuta en borrados en cascada desde Estudiante o Curso. El
+    # primer pre_delete del borrado libera los lugares de todas sus
+    # inscripciones: un COUNT de las activas por curso y un UPDATE por curso.
+    # Va en la misma transacción que el DELETE y mira el estado en la base:
+    # si otra petición ya la dio de baja o la borró, no hay lugar que liberar
+    borradas = None if origin is None else _inscripciones_del_borrado(origin)
+    if borradas is None:
+        confirmado = instance.confirmado()
+        if confirmado is not None and confirmado[0] == 'ACTIVO':
+            Curso.liberar_cupo(confirmado[1])
+        return
+    if origin.__dict__.get(_CUPOS_LIBERADOS):
+        return
+    origin.__dict__[_CUPOS_LIBERADOS] = True
+    Inscripcion.bloquear(borradas.values('id'))
+    activas = borradas.filter(estado='ACTIVO').values('curso_id').annotate(cantidad=Count('id'))
+    for curso_id, cantidad in activas.values_list('curso_id', 'cantidad'):
+        Curso.liberar_cupos(curso_id, cantidad)
+
+
+@receiver(post_delete, sender=Inscripcion)
+def fin_liberar_cupos(sender, instance, origin=None, **kwargs):
+    # Un nuevo borrado con el mismo origen (un queryset) vuelve a contar
+    if origin is not None:
+        origin.__dict__.pop(_CUPOS_LIBERADOS, None)
+
+
+def _invalidar_estadisticas(*curso_ids):
+    for curso_id in set(curso_ids):
+        if curso_id is not None:
+            transaction.on_commit(lambda curso_id=curso_id: estadisticas.invalidar(curso_id))
+
+
+@receiver(post_save, sender=Calificacion)
+@receiver(post_delete, sender=Calificacion)
+def invalidar_estadisticas_calificacion(sender, instance, **kwargs):
+    # Las vistas guardan la calificación con su inscripción ya cargada
+    if Calificacion.inscripcion.is_cached(instance):
+        curso_id = instance.inscripcion.curso_id
+    else:
+        curso_id = Inscripcion.objects.filter(
+            pk=instance.inscripcion_id
+        ).values_list('curso_id', flat=True).first()
+    _invalidar_estadisticas(curso_id)
+
+
+@receiver(post_save, sender=Inscripcion)
+def invalidar_estadisticas_cambio_curso(sender, instance, created, **kwargs):
+    curso_original_id = getattr(instance, '_curso_original_id', None)
+    if not created and curso_original_id != instance.curso_id:
+        _invalidar_estadisticas(curso_original_id, instance.curso_id)
+
+
+@receiver(post_save, sender=Curso)
+@receiver(post_delete, sender=Curso)
+def invalidar_estadisticas_curso(sender, instance, **kwargs):
+    _invalidar_estadisticas(instance.pk)
+
+
+def _entidades_curso(curso_id, *profesor_ids):
+    """Entidades cuya respuesta incluye los datos de un curso."""
+    entidades = ['catalogo', f'curso:{curso_id}']
+    entidades += [f'profesor:{profesor_id}' for profesor_id in profesor_ids if profesor_id]
+    entidades += [
+        f'estudiante:{estudiante_id}'
+        for estudiante_id in Inscripcion.objects.filter(
+            curso_id=curso_id
+        ).values_list('estudiante_id', flat=True)
+    ]
+    return entidades
+
+
+@receiver(post_save, sender=Curso)
+@receiver(post_delete, sender=Curso)
+def invalidar_cache_curso(sender, instance, **kwargs):
+    cache_respuestas.invalidar(*_entidades_curso(
+        instance.pk,
+        instance.profesor_id,
+        getattr(instance, '_profesor_original_id', None)
+    ))
+
+
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Inscripcion)
+def invalidar_cache_inscripcion(sender, instance, **kwargs):
+    curso_ids = {instance.curso_id, getattr(instance, '_curso_original_id', None)} - {None}
+    profesor_ids = Curso.objects.filter(
+        id__in=curso_ids,
+        profesor__isnull=False
+    ).values_list('profesor_id', flat=True)
+    cache_respuestas.invalidar(
+        'catalogo',
+        f'estudiante:{instance.estudiante_id}',
+        *(f'curso:{curso_id}' for curso_id in curso_ids),
+        *(f'profesor:{profesor_id}' for profesor_id in profesor_ids)
+    )
+
+
+@receiver(post_save, sender=Inscripcion)
+@receiver(post_delete, sender=Inscripcion)
+def invalidar_horario_inscripcion(sender, instance, **kwargs):
+    horarios.invalidar('estudiante', instance.estudiante_id)
+
+
+@receiver(post_save, sender=Curso)
+@receiver(post_delete, sender=Curso)
+def invalidar_horarios_curso(sender, instance, created=False, **kwargs):
+    horarios.invalidar('profesor', instance.profesor_id, getattr(instance, '_profesor_original_id', None))
+    if not created:
+        horarios.invalidar('estudiante', *Inscripcion.objects.filter(
+            curso_id=instance.pk, estado='ACTIVO'
+        ).values_list('estudiante_id', flat=True))
+
+
+@receiver(post_save, sender=Profesor)
+@receiver(pre_delete, sender=Profesor)
+def invalidar_cache_profesor(sender, instance, **kwargs):
+    entidades = ['catalogo', f'profesor:{instance.pk}']
+    entidades += [f'curso:{curso_id}' for curso_id in instance.cursos.values_list('id', flat=True)]
+    entidades += [
+        f'estudiante:{estudiante_id}'
+        for estudiante_id in Inscripcion.objects.filter(
+            curso__profesor=instance
+        ).values_list('estudiante_id', flat=True).distinct()
+    ]
+    cache_respuestas.invalidar(*entidades)
+
+
+@receiver(pre_delete, sender=Profesor)
+def marcar_cursos_sin_profesor(sender, instance, **kwargs):
+    # SET_NULL usa un UPDATE que no toca updated_at; se marca a mano para los ETag
+    instance.cursos.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Estudiante)
+@receiver(post_delete, sender=Estudiante)
+def invalidar_cache_estudiante(sender, instance, **kwargs):
+    cache_respuestas.invalidar(f'estudiante:{instance.pk}')
+
+
+# Las lápidas de un mismo borrado (con sus cascadas) se juntan en el objeto
+# que lo originó y se insertan de una vez. El Collector envía todos los
+# pre_delete antes del primer post_delete, así que ese es el momento.
+_ELIMINACIONES = '_eliminaciones_pendientes'
+
+
+@receiver(pre_delete, sender=Inscripcion)
+@receiver(pre_delete, sender=Calificacion)
+@receiver(pre_delete, sender=Asistencia)
+def anotar_eliminacion(sender, instance, origin=None, **kwargs):
+    eliminacion = Eliminacion(modelo=sender._meta.model_name, objeto_id=instance.pk)
+    if origin is None:
+        instance._eliminacion = eliminacion
+    else:
+        origin.__dict__.setdefault(_ELIMINACIONES, []).append(eliminacion)
+
+
+@receiver(post_delete, sender=Inscripcion)
+@receiver(post_delete, sender=Calificacion)
+@receiver(post_delete, sender=Asistencia)
+def registrar_eliminacion(sender, instance, origin=None, **kwargs):
+    if origin is None:
+        pendientes = [instance.__dict__.pop('_eliminacion')]
+    else:
+        # Solo el primer post_delete del borrado encuentra la lista
+        pendientes = origin.__dict__.pop(_ELIMINACIONES, None)
+    if pendientes:
+        Eliminacion.objects.bulk_create(pendientes)
+
+
+@receiver(post_save, sender=Estudiante)
+@receiver(post_save, sender=Curso)
+def indexar_busqueda(sender, instance, **kwargs):
+    busqueda.indexar([instance])
+
+
+@receiver(post_save, sender=Profesor)
+def indexar_busqueda_profesor(sender, instance, **kwargs):
+    # Los cursos se encuentran también por el nombre de su profesor
+    busqueda.indexar([instance])
+    busqueda.indexar(instance.cursos.select_related('profesor'))
+
+
+@receiver(pre_delete, sender=Profesor)
+def recordar_cursos_profesor(sender, instance, **kwargs):
+    instance._cursos_ids = list(instance.cursos.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Estudiante)
+@receiver(post_delete, sender=Profesor)
+@receiver(post_delete, sender=Curso)
+def desindexar_busqueda(sender, instance, **kwargs):
+    busqueda.desindexar(sender._meta.model_name, [instance.pk])
+    if sender is Profesor:
+        # Sus cursos quedaron sin profesor (SET_NULL)
+        busqueda.indexar(Curso.objects.filter(id__in=getattr(instance, '_cursos_ids', [])))
+
+
+connection_created.connect(metricas.instalar_en_conexion)
+connection_created.connect(perfilado.instalar_en_conexion)
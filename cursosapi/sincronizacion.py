@@ -0,0 +1,135 @@
+"""Sincronización incremental (``?since=``) para clientes sin conexión permanente.
+
+Los cambios salen de ``updated_at`` y los borrados del registro ``Eliminacion``.
+Ambos se recorren por claves ``(fecha, id)`` ascendentes y la respuesta
+incluye un ``sync_token`` opaco con la posición alcanzada en cada uno.
+
+La entrega es "al menos una vez": los últimos segundos (``ventana``) se
+vuelven a enviar en la llamada siguiente, porque una transacción lenta puede
+confirmar filas con un ``updated_at`` anterior a uno ya entregado.
+"""
+import base64
+import json
+from datetime import datetime, time, timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import Eliminacion
+
+SINCE_QUERY_PARAM = 'since'
+
+
+def _ventana():
+    return timedelta(seconds=getattr(settings, 'SINCRONIZACION_VENTANA_SEGUNDOS', 5))
+
+
+def _retencion():
+    return timedelta(days=getattr(settings, 'SINCRONIZACION_RETENCION_DIAS', 90))
+
+
+def codificar_token(cambios, eliminaciones):
+    datos = {
+        'c': [cambios[0].isoformat(), cambios[1]],
+        'e': [eliminaciones[0].isoformat(), eliminaciones[1]],
+    }
+    return base64.urlsafe_b64encode(json.dumps(datos).encode('ascii')).decode('ascii')
+
+
+def decodificar_since(valor):
+    """Acepta un ``sync_token`` o una fecha/fecha-hora ISO 8601.
+
+    Devuelve las posiciones ``(momento, id)`` de cambios y de eliminaciones.
+    """
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(valor.encode('ascii')))
+        posiciones = []
+        for clave in ('c', 'e'):
+            momento = parse_datetime(datos[clave][0])
+            if momento is None:
+                raise ValueError
+            posiciones.append((momento, int(datos[clave][1])))
+        return tuple(posiciones)
+    except (TypeError, ValueError, KeyError, IndexError, UnicodeEncodeError):
+        pass
+
+    momento = parse_datetime(valor)
+    if momento is None:
+        fecha = parse_date(valor)
+        if fecha is None:
+            raise ValidationError({SINCE_QUERY_PARAM: "Use un sync_token o una fecha ISO 8601"})
+        momento = datetime.combine(fecha, time.min)
+    if timezone.is_naive(momento):
+        momento = timezone.make_aware(momento)
+    return (momento, 0), (momento, 0)
+
+
+def _despues_de(campo, posicion):
+    momento, ultimo_id = posicion
+    return Q(**{f'{campo}__gt': momento}) | Q(**{campo: momento, 'id__gt': ultimo_id})
+
+
+def _avanzar(ultima_fila, campo, hay_mas, limite):
+    if hay_mas:
+        return (getattr(ultima_fila, campo), ultima_fila.id)
+    # Sin más páginas todo lo anterior al límite ya se entregó: el token llega
+    # hasta ahí aunque no haya habido filas, para que un flujo quieto no
+    # envejezca más allá de la retención
+    return (limite, 0)
+
+
+def respuesta_delta(view, request):
+    """Respuesta de ``list`` con solo lo cambiado o borrado desde ``since``."""
+    cambios, eliminaciones = decodificar_since(request.query_params[SINCE_QUERY_PARAM])
+    ahora = timezone.now()
+    if min(cambios[0], eliminaciones[0]) < ahora - _retencion():
+        return Response(
+            {"error": "El punto de sincronización es demasiado antiguo; descargue la lista completa"},
+            status=status.HTTP_410_GONE
+        )
+
+    limite = ahora - _ventana()
+    tamanio = view.paginator.get_page_size(request) if view.paginator else 100
+
+    filas = list(
+        view.filter_queryset(view.get_queryset())
+        .filter(_despues_de('updated_at', cambios))
+        .order_by('updated_at', 'id')[:tamanio + 1]
+    )
+    borrados = list(
+        Eliminacion.objects
+        .filter(modelo=view.get_queryset().model._meta.model_name)
+        .filter(_despues_de('eliminado_en', eliminaciones))
+        .order_by('eliminado_en', 'id')[:tamanio + 1]
+    )
+    hay_mas_filas = len(filas) > tamanio
+    hay_mas_borrados = len(borrados) > tamanio
+    filas = filas[:tamanio]
+    borrados = borrados[:tamanio]
+
+    serializer = view.get_serializer(filas, many=True)
+    return Response({
+        'results': serializer.data,
+        'eliminados': [eliminacion.objeto_id for eliminacion in borrados],
+        'hay_mas': hay_mas_filas or hay_mas_borrados,
+        'sync_token': codificar_token(
+            _avanzar(filas[-1] if filas else None, 'updated_at', hay_mas_filas, limite),
+            _avanzar(borrados[-1] if borrados else None, 'eliminado_en', hay_mas_borrados, limite),
+        ),
+    })
+
+
+def lista_con_delta(metodo):
+    """Decorador para ``list``: con ``?since=`` responde solo el delta."""
+    @wraps(metodo)
+    def envoltura(self, request, *args, **kwargs):
+        if SINCE_QUERY_PARAM in request.query_params:
+            return respuesta_delta(self, request)
+        return metodo(self, request, *args, **kwargs)
+    return envoltura
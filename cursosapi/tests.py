@@ -1,3 +1,2310 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import gzip
+import json
+import random
+import re
+import tempfile
+import threading
+import time as time_module
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from urllib.parse import urlencode
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Value
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.throttling import AnonRateThrottle
+
+from . import busqueda, cache_respuestas, en_vivo, horarios, metricas, proyecciones, rendimiento, renderers
+from .models import (
+    Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia, ResumenAsistencia,
+    Eliminacion,
+)
+from .pagination import PaginacionKeyset
+from .serializers import (
+    ProfesorSerializer, CursoSerializer, EstudianteSerializer, InscripcionSerializer,
+    CalificacionSerializer, AsistenciaSerializer, AsistenciaDetalleSerializer,
+    HorarioEstudianteSerializer, ListaAsistenciaSerializer,
+)
+from .sincronizacion import codificar_token, decodificar_since
+from .urls import router
+from .views import CursoViewSet, EstudianteViewSet, InscripcionViewSet
+
+
+class DatosMixin:
+    """Crea un escenario pequeño con varios cursos, estudiantes e inscripciones."""
+
+    num_cursos = 4
+    num_estudiantes = 6
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profesores = [
+            Profesor.objects.create(
+                nombre=f'Profesor{i}', apellido=f'Apellido{i}', email=f'profesor{i}@example.com',
+                especialidad='Matemáticas', fecha_contratacion=date(2020, 1, 1)
+            )
+            for i in range(2)
+        ]
+        cls.cursos = [
+            Curso.objects.create(
+                codigo=f'CUR{i:03d}', nombre=f'Curso {i}', creditos=4,
+                profesor=cls.profesores[i % 2] if i else None,
+                cupo_maximo=30, dias=Curso.DIAS_CHOICES[i % 5][0],
+                hora_inicio=time(8 + i), hora_fin=time(9 + i),
+                fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 30)
+            )
+            for i in range(cls.num_cursos)
+        ]
+        cls.estudiantes = [
+            Estudiante.objects.create(
+                matricula=f'MAT{i:04d}', nombre=f'Nombre{i}', apellido=f'Apellido{i}',
+                email=f'estudiante{i}@example.com', fecha_nacimiento=date(2000, 1, 1),
+                fecha_ingreso=date(2024, 8, 1)
+            )
+            for i in range(cls.num_estudiantes)
+        ]
+        for estudiante in cls.estudiantes:
+            for curso in cls.cursos:
+                inscripcion = Inscripcion.objects.create(estudiante=estudiante, curso=curso)
+                if curso.id % 2:
+                    Calificacion.objects.create(inscripcion=inscripcion, valor='7.50')
+
+    def setUp(self):
+        # La caché local sobrevive entre tests y los ids se reutilizan
+        cache.clear()
+        self.client = APIClient()
+
+
+class AccionesAnidadasQueryTests(DatosMixin, TestCase):
+    """Cada acción anidada debe resolverse con un número fijo de consultas.
+
+    Los presupuestos incluyen la consulta de validadores de ``respuesta_condicional``.
+    """
+
+    def test_estudiante_detalle(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/estudiantes/{self.estudiantes[0].id}/')
+        self.assertEqual(len(response.data['cursos_inscritos']), self.num_cursos)
+
+    def test_estudiante_cursos(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/estudiantes/{self.estudiantes[0].id}/cursos/')
+        self.assertEqual(len(response.data), self.num_cursos)
+
+    def test_estudiante_calificaciones(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/estudiantes/{self.estudiantes[0].id}/calificaciones/')
+        self.assertEqual(len(response.data), self.num_cursos)
+        self.assertEqual(
+            sum(1 for fila in response.data if fila['calificacion'] is not None),
+            self.num_cursos // 2
+        )
+
+    def test_estudiante_horario(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/estudiantes/{self.estudiantes[0].id}/horario/')
+        self.assertEqual(len(response.data), self.num_cursos)
+
+    def test_curso_estudiantes(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/cursos/{self.cursos[1].id}/estudiantes/')
+        self.assertEqual(len(response.data), self.num_estudiantes)
+
+    def test_profesor_cursos(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/profesores/{self.profesores[1].id}/cursos/')
+        self.assertEqual(len(response.data), 2)
+
+    def test_curso_lista_asistencia(self):
+        # Mismo número de consultas con 6 y con 2 inscritos, al crear la lista y al releerla
+        Inscripcion.objects.filter(curso=self.cursos[2], estudiante__in=self.estudiantes[2:]).update(estado='BAJA')
+        for curso, inscritos in ((self.cursos[1], self.num_estudiantes), (self.cursos[2], 2)):
+            url = f'/api/cursos/{curso.id}/lista_asistencia/?fecha=2025-03-03'
+            with self.subTest(inscritos=inscritos):
+                # Validadores, curso, inscritos, asistencias del día, la relectura y
+                # los INSERT bajo bloqueo (con sus SAVEPOINT) y los validadores otra vez
+                with self.assertNumQueries(15):
+                    response = self.client.get(url)
+                self.assertEqual(len(response.data), inscritos)
+                self.assertEqual(Asistencia.objects.filter(inscripcion__curso=curso).count(), inscritos)
+                # Con la lista ya creada no se escribe nada
+                with self.assertNumQueries(7):
+                    response = self.client.get(url)
+                self.assertEqual(len(response.data), inscritos)
+
+
+class RespuestaCondicionalTests(DatosMixin, TestCase):
+
+    def test_304_sin_serializar(self):
+        url = f'/api/estudiantes/{self.estudiantes[0].id}/horario/'
+        response = self.client.get(url)
+        self.assertIn('ETag', response)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_last_modified_solo_en_detalles(self):
+        detalle = f'/api/profesores/{self.profesores[0].id}/'
+        response = self.client.get(detalle)
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(detalle, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        for url in (
+            '/api/profesores/', f'/api/estudiantes/{self.estudiantes[0].id}/horario/',
+            f'/api/cursos/{self.cursos[1].id}/estudiantes/',
+            # El detalle del estudiante incluye sus inscripciones: es un conjunto
+            f'/api/estudiantes/{self.estudiantes[0].id}/',
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('ETag', response)
+                self.assertNotIn('Last-Modified', response)
+
+    def test_borrado_y_revalidacion(self):
+        url = '/api/profesores/'
+        ultima = http_date(time_module.time() + 60)
+        response = self.client.get(url)
+        self.assertEqual(response.data['count'], 2)
+        etag = response['ETag']
+        self.profesores[0].delete()
+        for cabeceras in ({'HTTP_IF_MODIFIED_SINCE': ultima}, {'HTTP_IF_NONE_MATCH': etag}):
+            with self.subTest(cabeceras=list(cabeceras)):
+                response = self.client.get(url, **cabeceras)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['count'], 1)
+
+    def test_etag_cambia_con_los_datos(self):
+        url = f'/api/cursos/{self.cursos[1].id}/estudiantes/'
+        etag = self.client.get(url)['ETag']
+        inscripcion = Inscripcion.objects.get(estudiante=self.estudiantes[0], curso=self.cursos[1])
+        inscripcion.estado = 'BAJA'
+        inscripcion.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), self.num_estudiantes - 1)
+
+    def test_pagina_de_cursor_sin_contar(self):
+        url = '/api/inscripciones/'
+        params = {'paginacion': 'cursor', 'page_size': 5}
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url, params)
+        self.assertFalse([c['sql'] for c in consultas.captured_queries if 'COUNT(' in c['sql']])
+        etag = response['ETag']
+        en_pagina = [fila['id'] for fila in response.data['results']]
+
+        # Un cambio fuera de la página no altera la respuesta
+        Inscripcion.objects.order_by('id').first().save()
+        self.assertEqual(self.client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Inscripcion.objects.get(id=en_pagina[-1]).save()
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        Inscripcion.objects.filter(id=en_pagina[1]).delete()
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(en_pagina[1], [fila['id'] for fila in response.data['results']])
+
+        # Con ?count=true la respuesta lleva el total y se cuenta
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url, {**params, 'count': 'true'})
+        self.assertEqual(response.data['count'], Inscripcion.objects.count())
+
+
+class ProyeccionesTests(DatosMixin, TestCase):
+    """Las proyecciones deben producir el mismo JSON, byte a byte, que los serializers."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Estudiante.objects.filter(pk=cls.estudiantes[0].pk).update(telefono='5551234')
+        Profesor.objects.filter(pk=cls.profesores[0].pk).update(telefono='5559876', activo=False)
+        Calificacion.objects.filter(inscripcion__estudiante=cls.estudiantes[1]).update(
+            valor='10.00', observaciones='Excelente'
+        )
+        cls.inscripcion = Inscripcion.objects.filter(curso=cls.cursos[1]).first()
+        for dia, presente, justificada in ((3, True, False), (4, False, True), (5, False, False)):
+            Asistencia.objects.create(
+                inscripcion=cls.inscripcion, fecha=date(2025, 2, dia), presente=presente,
+                justificada=justificada, observaciones='Llegó tarde' if presente else ''
+            )
+        ResumenAsistencia.recalcular()
+
+    def assertMismoJSON(self, datos, esperados):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(datos), renderer.render(esperados))
+
+    def test_modelos_completos(self):
+        casos = [
+            (proyecciones.PROFESOR, ProfesorSerializer, Profesor.objects.all()),
+            # Sin con_profesor_nombre(): el serializer arma el nombre en Python
+            (proyecciones.CURSO, CursoSerializer, Curso.objects.all()),
+            (proyecciones.ESTUDIANTE, EstudianteSerializer, Estudiante.objects.all()),
+            (proyecciones.INSCRIPCION, InscripcionSerializer, Inscripcion.objects.all()),
+            (proyecciones.CALIFICACION, CalificacionSerializer, Calificacion.objects.all()),
+            (proyecciones.ASISTENCIA, AsistenciaSerializer, Asistencia.objects.all()),
+            (proyecciones.ASISTENCIA_DETALLE, AsistenciaDetalleSerializer, Asistencia.objects.all()),
+        ]
+        for proyeccion, serializer_class, queryset in casos:
+            with self.subTest(serializer=serializer_class.__name__):
+                self.assertMismoJSON(
+                    proyeccion.datos(queryset),
+                    serializer_class(queryset, many=True).data
+                )
+
+    def test_modelo_relacionado_con_prefijo(self):
+        inscripciones = Inscripcion.objects.filter(estudiante=self.estudiantes[0])
+        self.assertMismoJSON(
+            proyecciones.CURSO.datos(inscripciones, prefijo='curso__'),
+            CursoSerializer([inscripcion.curso for inscripcion in inscripciones], many=True).data
+        )
+
+    def test_horario(self):
+        inscripciones = Inscripcion.objects.filter(estudiante=self.estudiantes[0])
+        self.assertMismoJSON(
+            proyecciones.HORARIO.datos(inscripciones),
+            HorarioEstudianteSerializer(inscripciones, many=True).data
+        )
+
+    def test_lista_asistencia(self):
+        inscripciones = Inscripcion.objects.filter(curso=self.cursos[1])
+        self.assertMismoJSON(
+            proyecciones.LISTA_ASISTENCIA.datos(
+                inscripciones.annotate(presente=Value(True))
+            ),
+            ListaAsistenciaSerializer(
+                [{'estudiante': inscripcion.estudiante, 'presente': True} for inscripcion in inscripciones],
+                many=True
+            ).data
+        )
+
+    def test_endpoints_anidados(self):
+        estudiante, curso = self.estudiantes[0], self.cursos[1]
+        inscripciones = Inscripcion.objects.filter(estudiante=estudiante, estado='ACTIVO')
+        casos = [
+            (
+                f'/api/estudiantes/{estudiante.id}/cursos/',
+                CursoSerializer([inscripcion.curso for inscripcion in inscripciones], many=True).data
+            ),
+            (
+                f'/api/estudiantes/{estudiante.id}/horario/',
+                HorarioEstudianteSerializer(inscripciones, many=True).data
+            ),
+            (
+                f'/api/profesores/{self.profesores[1].id}/cursos/',
+                CursoSerializer(Curso.objects.filter(profesor=self.profesores[1]), many=True).data
+            ),
+            (
+                f'/api/cursos/{curso.id}/estudiantes/',
+                EstudianteSerializer([
+                    inscripcion.estudiante
+                    for inscripcion in Inscripcion.objects.filter(curso=curso, estado='ACTIVO')
+                ], many=True).data
+            ),
+            (
+                f'/api/asistencias/por_curso/?curso_id={curso.id}',
+                AsistenciaDetalleSerializer(
+                    Asistencia.objects.filter(inscripcion__curso=curso), many=True
+                ).data
+            ),
+            # Al final: crea las asistencias que falten para la fecha
+            (
+                f'/api/cursos/{curso.id}/lista_asistencia/?fecha=2025-02-03',
+                ListaAsistenciaSerializer([
+                    {'estudiante': inscripcion.estudiante, 'presente': inscripcion == self.inscripcion}
+                    for inscripcion in Inscripcion.objects.filter(curso=curso, estado='ACTIVO')
+                ], many=True).data
+            ),
+        ]
+        for url, esperados in casos:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, JSONRenderer().render(esperados))
+
+    def test_listas_paginadas(self):
+        casos = [
+            ('profesores', ProfesorSerializer),
+            ('cursos', CursoSerializer),
+            ('estudiantes', EstudianteSerializer),
+            ('inscripciones', InscripcionSerializer),
+            ('inscripciones', InscripcionSerializer, {'paginacion': 'cursor'}),
+            ('calificaciones', CalificacionSerializer, {'ordering': '-valor'}),
+            ('asistencias', AsistenciaSerializer, {'paginacion': 'cursor'}),
+        ]
+        for ruta, serializer_class, *params in casos:
+            with self.subTest(ruta=ruta, params=params):
+                response = self.client.get(f'/api/{ruta}/', *params)
+                self.assertEqual(response.status_code, 200)
+                resultados = response.data['results']
+                modelo = serializer_class.Meta.model
+                objetos = modelo.objects.in_bulk([fila['id'] for fila in resultados])
+                self.assertMismoJSON(
+                    resultados,
+                    serializer_class([objetos[fila['id']] for fila in resultados], many=True).data
+                )
+
+    def test_siguiente_pagina_por_cursor(self):
+        response = self.client.get('/api/inscripciones/', {'paginacion': 'cursor', 'page_size': 5})
+        siguiente = self.client.get(response.data['next'])
+        self.assertEqual(siguiente.status_code, 200)
+        ids = [fila['id'] for fila in response.data['results'] + siguiente.data['results']]
+        self.assertEqual(
+            ids,
+            list(Inscripcion.objects.order_by('-fecha_inscripcion', '-id').values_list('id', flat=True)[:10])
+        )
+
+
+class CamposSolicitadosTests(DatosMixin, TestCase):
+    """``?fields=`` y ``?expand=``: la salida y el SQL se limitan a lo pedido."""
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response, ' '.join(consulta['sql'] for consulta in consultas.captured_queries[1:])
+
+    def test_lista_limitada_a_los_campos(self):
+        response, sql = self.get('/api/cursos/', fields='codigo,nombre')
+        self.assertEqual(
+            response.data['results'],
+            [{'codigo': curso.codigo, 'nombre': curso.nombre} for curso in self.cursos]
+        )
+        # Sin profesor_nombre no hay JOIN con profesores ni se lee la descripción
+        self.assertNotIn('cursosapi_profesor', sql)
+        self.assertNotIn('descripcion', sql)
+
+    def test_expandir_en_la_lista(self):
+        response, sql = self.get('/api/cursos/', fields='codigo', expand='profesor')
+        resultados = response.data['results']
+        self.assertIsNone(resultados[0]['profesor'])
+        self.assertEqual(list(resultados[1]), ['codigo', 'profesor'])
+        self.assertEqual(resultados[1]['profesor'], ProfesorSerializer(self.profesores[1]).data)
+
+    def test_expandir_equivale_al_serializer(self):
+        response, _ = self.get(
+            '/api/inscripciones/', expand='estudiante,curso', paginacion='cursor'
+        )
+        resultados = response.data['results']
+        objetos = Inscripcion.objects.in_bulk([fila['id'] for fila in resultados])
+        esperados = InscripcionSerializer(
+            [objetos[fila['id']] for fila in resultados], many=True,
+            context={'campos': None, 'expandir': ['estudiante', 'curso']}
+        ).data
+        self.assertEqual(JSONRenderer().render(resultados), JSONRenderer().render(esperados))
+
+    def test_detalle_sin_anotaciones_ni_prefetch(self):
+        curso = self.cursos[1]
+        response, sql = self.get(f'/api/cursos/{curso.id}/', fields='codigo,estudiantes_inscritos')
+        self.assertEqual(response.data, {'estudiantes_inscritos': self.num_estudiantes, 'codigo': curso.codigo})
+        self.assertNotIn('cursosapi_profesor', sql)
+        self.assertNotIn('descripcion', sql)
+
+        estudiante = self.estudiantes[0]
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/estudiantes/{estudiante.id}/', {'fields': 'matricula'})
+        self.assertEqual(response.data, {'matricula': estudiante.matricula})
+
+        inscripcion = Inscripcion.objects.filter(curso=curso).first()
+        response, sql = self.get(f'/api/inscripciones/{inscripcion.id}/', fields='estado,curso_nombre')
+        self.assertEqual(set(response.data), {'estado', 'curso_nombre'})
+        self.assertNotIn('cursosapi_estudiante', sql)
+        self.assertNotIn('cursosapi_calificacion', sql)
+
+    def test_detalle_expandido(self):
+        curso = self.cursos[1]
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/cursos/{curso.id}/', {'fields': 'codigo', 'expand': 'profesor'})
+        self.assertEqual(response.data['profesor'], ProfesorSerializer(curso.profesor).data)
+
+    def test_acciones_anidadas(self):
+        response, sql = self.get(f'/api/estudiantes/{self.estudiantes[0].id}/horario/', fields='dia,curso')
+        self.assertEqual(set(response.data[0]), {'dia', 'curso'})
+        self.assertNotIn('cursosapi_profesor', sql)
+
+        response, _ = self.get(
+            f'/api/estudiantes/{self.estudiantes[0].id}/cursos/', fields='codigo', expand='profesor'
+        )
+        self.assertEqual(
+            [fila['profesor'] and fila['profesor']['id'] for fila in response.data],
+            [curso.profesor_id for curso in self.cursos]
+        )
+
+    def test_campos_con_paginacion_por_cursor(self):
+        inscripcion = Inscripcion.objects.first()
+        for dia in range(1, 6):
+            Asistencia.objects.create(inscripcion=inscripcion, fecha=date(2025, 3, dia))
+        for ruta, modelo in (
+            ('asistencias', Asistencia), ('inscripciones', Inscripcion), ('calificaciones', Calificacion)
+        ):
+            with self.subTest(ruta=ruta):
+                response, _ = self.get(f'/api/{ruta}/', fields='id', paginacion='cursor', page_size=2)
+                self.assertEqual(list(response.data['results'][0]), ['id'])
+                ids = [fila['id'] for fila in response.data['results']]
+                while response.data['next']:
+                    response = self.client.get(response.data['next'])
+                    self.assertEqual(response.status_code, 200)
+                    ids += [fila['id'] for fila in response.data['results']]
+                self.assertEqual(sorted(ids), sorted(modelo.objects.values_list('id', flat=True)))
+
+    def test_nombres_desconocidos(self):
+        response = self.client.get('/api/cursos/', {'fields': 'codigo,inexistente'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('inexistente', str(response.data['fields']))
+        response = self.client.get(f'/api/cursos/{self.cursos[1].id}/', {'expand': 'estudiantes'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('expand', response.data)
+
+    def test_etag_cambia_con_la_relacion_expandida(self):
+        url = '/api/inscripciones/'
+        etag = self.client.get(url, {'expand': 'estudiante'})['ETag']
+        self.assertEqual(
+            self.client.get(url, {'expand': 'estudiante'}, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        estudiante = self.estudiantes[0]
+        estudiante.telefono = '5550000'
+        estudiante.save()
+        response = self.client.get(url, {'expand': 'estudiante'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class RenderizadoTests(DatosMixin, TestCase):
+
+    datos = {
+        'decimal': Decimal('7.50'),
+        'fecha': date(2025, 3, 1),
+        'hora': time(8, 30),
+        'hora_micro': time(8, 30, 0, 250),
+        'utc': datetime(2025, 3, 1, 12, 0, 0, 123456, tzinfo=dt_timezone.utc),
+        'ingenua': datetime(2025, 3, 1, 12, 0),
+        'texto': 'Sánchez\u2028Núñez "citado"',
+        'perezoso': gettext_lazy('Hola'),
+        'error': [ErrorDetail('Campo obligatorio', code='required')],
+        'uuid': uuid.UUID(int=1),
+        'tupla': (1, 2.5, None, True),
+        1: 'clave entera',
+        'anidado': [{'vacio': {}, 'lista': []}],
+    }
+
+    def assertIgualADRF(self, renderer, *args):
+        self.assertEqual(renderer.render(self.datos, *args), JSONRenderer().render(self.datos, *args))
+
+    def test_misma_salida_que_drf(self):
+        self.assertIgualADRF(renderers.JSONRapidoRenderer())
+
+    def test_sin_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertIgualADRF(renderers.JSONRapidoRenderer())
+
+    def test_con_sangria(self):
+        self.assertIgualADRF(renderers.JSONRapidoRenderer(), 'application/json; indent=4')
+
+    def test_renderer_configurado(self):
+        response = self.client.get(f'/api/estudiantes/{self.estudiantes[0].id}/calificaciones/')
+        self.assertIsInstance(response.accepted_renderer, renderers.JSONRapidoRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_comprime_por_tamanio_y_tipo(self):
+        grande = self.client.get('/api/inscripciones/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(grande['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', grande['Vary'])
+        self.assertEqual(gzip.decompress(grande.content), self.client.get('/api/inscripciones/').content)
+
+        pequenia = self.client.get(f'/api/profesores/{self.profesores[0].id}/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(pequenia.has_header('Content-Encoding'))
+
+        exportacion = self.client.get(
+            '/api/asistencias/por_curso/', {'curso_id': self.cursos[1].id, 'format': 'csv'},
+            HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(exportacion['Content-Encoding'], 'gzip')
+
+        with override_settings(COMPRESION_TIPOS=('text/csv',)):
+            response = self.client.get('/api/inscripciones/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class ExportacionTests(DatosMixin, TestCase):
+    """Exportaciones NDJSON y CSV de ``por_curso`` y ``por_estudiante``."""
+
+    campos = [
+        'id', 'estudiante_nombre', 'curso_nombre', 'fecha',
+        'presente', 'justificada', 'observaciones', 'inscripcion',
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self.curso = self.cursos[1]
+        self.estudiante = self.estudiantes[0]
+        inscripciones = Inscripcion.objects.filter(curso=self.curso)
+        Asistencia.objects.bulk_create(
+            Asistencia(inscripcion=inscripcion, fecha=date(2025, 3, dia), presente=dia == 3)
+            for inscripcion in inscripciones for dia in (3, 4)
+        )
+        Asistencia.objects.filter(inscripcion__estudiante=self.estudiante, fecha=date(2025, 3, 4)).update(
+            observaciones='Llegó tarde, dijo "tráfico"'
+        )
+        self.exportaciones = [
+            ('/api/asistencias/por_curso/', {'curso_id': self.curso.id}, f'asistencias_curso_{self.curso.id}',
+             Asistencia.objects.filter(inscripcion__curso=self.curso)),
+            ('/api/asistencias/por_estudiante/', {'estudiante_id': self.estudiante.id, 'curso_id': self.curso.id},
+             f'asistencias_estudiante_{self.estudiante.id}',
+             Asistencia.objects.filter(inscripcion__estudiante=self.estudiante, inscripcion__curso=self.curso)),
+        ]
+
+    def exportar(self, url, parametros, formato, tipo, archivo):
+        response = self.client.get(url, {**parametros, 'format': formato})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], f'{tipo}; charset=utf-8')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{archivo}.{formato}"')
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_ndjson(self):
+        for url, parametros, archivo, esperadas in self.exportaciones:
+            with self.subTest(url=url):
+                cuerpo = self.exportar(url, parametros, 'ndjson', 'application/x-ndjson', archivo)
+                self.assertTrue(cuerpo.endswith('\n'))
+                filas = [json.loads(linea) for linea in cuerpo.splitlines()]
+                self.assertEqual({fila['id'] for fila in filas}, set(esperadas.values_list('id', flat=True)))
+                self.assertEqual({tuple(fila) for fila in filas}, {tuple(self.campos)})
+                fila = next(fila for fila in filas if fila['observaciones'])
+                self.assertEqual(fila['observaciones'], 'Llegó tarde, dijo "tráfico"')
+                self.assertEqual((fila['fecha'], fila['presente']), ('2025-03-04', False))
+                self.assertEqual(fila['curso_nombre'], Asistencia.objects.con_detalle().get(id=fila['id']).curso_nombre)
+
+    def test_csv(self):
+        for url, parametros, archivo, esperadas in self.exportaciones:
+            with self.subTest(url=url):
+                cuerpo = self.exportar(url, parametros, 'csv', 'text/csv', archivo)
+                cabecera, *filas = csv.reader(StringIO(cuerpo))
+                self.assertEqual(cabecera, self.campos)
+                self.assertEqual({int(fila[0]) for fila in filas}, set(esperadas.values_list('id', flat=True)))
+                fila = next(fila for fila in filas if fila[6])
+                self.assertEqual(fila[6], 'Llegó tarde, dijo "tráfico"')
+                self.assertEqual((fila[3], fila[4]), ('2025-03-04', 'False'))
+
+    def test_sin_filas_y_errores(self):
+        cuerpo = self.exportar(
+            '/api/asistencias/por_curso/', {'curso_id': self.cursos[0].id, 'fecha_inicio': '2030-01-01'},
+            'csv', 'text/csv', f'asistencias_curso_{self.cursos[0].id}'
+        )
+        self.assertEqual(cuerpo, ','.join(self.campos) + '\r\n')
+
+        response = self.client.get('/api/asistencias/por_curso/', {'format': 'ndjson'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), {"error": "Se requiere el parámetro curso_id"})
+
+
+@skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN es específico de SQLite")
+class PlanConsultasTests(DatosMixin, TestCase):
+    """Las consultas de los endpoints más usados no deben recorrer tablas completas.
+
+    Se ejecuta ``EXPLAIN QUERY PLAN`` sobre cada consulta capturada y se falla
+    si alguna hace ``SCAN`` sobre una tabla que crece con el uso, aunque sea
+    recorriendo un índice: solo vale ``SEARCH``. Los catálogos pequeños
+    (profesores, cursos, estudiantes) pueden recorrerse. Los listados sin
+    filtro (el total de la paginación numerada, la primera página por cursor)
+    recorren por definición un índice entero y no se comprueban aquí.
+    """
+
+    tablas_grandes = {
+        Inscripcion._meta.db_table,
+        Calificacion._meta.db_table,
+        Asistencia._meta.db_table,
+        ResumenAsistencia._meta.db_table,
+        Eliminacion._meta.db_table,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.inscripcion = Inscripcion.objects.filter(curso=cls.cursos[1]).first()
+        for dia in range(1, 4):
+            Asistencia.objects.create(inscripcion=cls.inscripcion, fecha=date(2025, 2, dia))
+        ResumenAsistencia.recalcular()
+
+    def escaneos(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            detalles = [fila[-1] for fila in cursor.fetchall()]
+        # Las subconsultas de Django renombran las tablas como U0, T3...
+        alias = {alias: tabla for tabla, alias in re.findall(r'"(\w+)" ([UT]\d+)\b', sql)}
+        encontrados = []
+        for detalle in detalles:
+            escaneo = re.match(r'SCAN (\w+)', detalle)
+            if not escaneo:
+                continue
+            if alias.get(escaneo.group(1), escaneo.group(1)) in self.tablas_grandes:
+                encontrados.append(detalle)
+        return encontrados
+
+    def assertSinEscaneos(self, metodo, url, datos=None, solo=None):
+        with CaptureQueriesContext(connection) as consultas:
+            if metodo == 'post':
+                response = self.client.post(url, datos, format='json')
+            else:
+                response = self.client.get(url)
+        self.assertLess(response.status_code, 400, response.content)
+        sentencias = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if consulta['sql'].lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE'))
+            and (solo is None or solo in consulta['sql'])
+        ]
+        self.assertGreater(len(sentencias), 0)
+        for sql in sentencias:
+            with self.subTest(url=url, sql=sql):
+                self.assertEqual(self.escaneos(sql), [])
+
+    def test_curso_estudiantes(self):
+        self.assertSinEscaneos('get', f'/api/cursos/{self.cursos[1].id}/estudiantes/')
+
+    def test_curso_lista_asistencia(self):
+        self.assertSinEscaneos('get', f'/api/cursos/{self.cursos[1].id}/lista_asistencia/?fecha=2025-03-01')
+
+    def test_curso_resumen_asistencia(self):
+        self.assertSinEscaneos('get', f'/api/cursos/{self.cursos[1].id}/resumen_asistencia/')
+
+    def test_curso_registrar_asistencia(self):
+        self.assertSinEscaneos('post', f'/api/cursos/{self.cursos[1].id}/registrar_asistencia/', {
+            'fecha': '2025-02-01',
+            'asistencias': [
+                {'estudiante_id': estudiante.id, 'presente': True} for estudiante in self.estudiantes
+            ],
+        })
+
+    def test_estudiante_acciones(self):
+        for accion in ('cursos', 'calificaciones', 'resumen_asistencia', 'horario'):
+            self.assertSinEscaneos('get', f'/api/estudiantes/{self.estudiantes[0].id}/{accion}/')
+
+    def test_asistencias_por_curso(self):
+        self.assertSinEscaneos(
+            'get',
+            f'/api/asistencias/por_curso/?curso_id={self.cursos[1].id}'
+            f'&fecha_inicio=2025-02-01&fecha_fin=2025-02-28'
+        )
+
+    def test_asistencias_por_estudiante(self):
+        self.assertSinEscaneos(
+            'get',
+            f'/api/asistencias/por_estudiante/?estudiante_id={self.estudiantes[0].id}'
+            f'&curso_id={self.cursos[1].id}'
+        )
+
+    def test_inscribir_estudiante(self):
+        Inscripcion.objects.filter(estudiante=self.estudiantes[0], curso=self.cursos[2]).delete()
+        self.assertSinEscaneos('post', '/api/inscripciones/inscribir_estudiante/', {
+            'estudiante_id': self.estudiantes[0].id, 'curso_id': self.cursos[2].id,
+        })
+
+    def test_listas_filtradas(self):
+        busqueda = f'search={self.inscripcion.estudiante.nombre}'
+        for ruta in ('inscripciones', 'calificaciones', 'asistencias'):
+            for modo in ('', '&paginacion=cursor'):
+                self.assertSinEscaneos('get', f'/api/{ruta}/?{busqueda}&page_size=2{modo}')
+            self.assertSinEscaneos('get', f'/api/{ruta}/?{busqueda}&page_size=1&page=2')
+
+    def test_cambios_desde_since(self):
+        # ``?since=`` recorre updated_at por índice: es lo que justifica ese índice.
+        # Los validadores de la lista completa no se comprueban (ver el docstring)
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        for ruta in ('inscripciones', 'calificaciones', 'asistencias'):
+            self.assertSinEscaneos(
+                'get', f'/api/{ruta}/?{urlencode({"since": since})}', solo='"updated_at" >'
+            )
+
+    def test_paginas_siguientes_por_cursor(self):
+        for ruta in ('inscripciones', 'calificaciones', 'asistencias'):
+            siguiente = self.client.get(f'/api/{ruta}/?paginacion=cursor&page_size=2').json()['next']
+            self.assertIsNotNone(siguiente)
+            self.assertSinEscaneos('get', siguiente)
+            anterior = self.client.get(siguiente).json()['previous']
+            self.assertSinEscaneos('get', anterior)
+
+
+class GenerarDatosTests(TestCase):
+
+    def generar(self, **opciones):
+        call_command(
+            'generar_datos', profesores=3, cursos=6, estudiantes=20, dias=28, semilla=3,
+            stdout=StringIO(), **opciones
+        )
+
+    def foto(self):
+        return (
+            list(Estudiante.objects.order_by('matricula').values_list('matricula', 'nombre', 'apellido')),
+            list(
+                Inscripcion.objects
+                .order_by('estudiante__matricula', 'curso__codigo')
+                .values_list('estudiante__matricula', 'curso__codigo', 'estado')
+            ),
+            list(
+                Asistencia.objects
+                .order_by('inscripcion__estudiante__matricula', 'inscripcion__curso__codigo', 'fecha')
+                .values_list('fecha', 'presente', 'justificada')
+            ),
+        )
+
+    def test_misma_semilla_mismos_datos(self):
+        self.generar()
+        primera = self.foto()
+        self.generar(limpiar=True, rapido=True)
+        self.assertEqual(self.foto(), primera)
+        self.assertTrue(primera[2])
+
+    def test_datos_derivados_coherentes(self):
+        self.generar(rapido=True)
+        for curso in Curso.objects.all():
+            self.assertEqual(
+                curso.inscritos_activos,
+                curso.inscripciones.filter(estado='ACTIVO').count()
+            )
+            self.assertLessEqual(curso.inscritos_activos, curso.cupo_maximo)
+        resumenes = {r.inscripcion_id: r for r in ResumenAsistencia.objects.all()}
+        ResumenAsistencia.recalcular()
+        for resumen in ResumenAsistencia.objects.all():
+            anterior = resumenes[resumen.inscripcion_id]
+            self.assertEqual(
+                (anterior.sesiones, anterior.presentes, anterior.justificadas, anterior.ausentes),
+                (resumen.sesiones, resumen.presentes, resumen.justificadas, resumen.ausentes)
+            )
+
+
+class RendimientoTests(TestCase):
+
+    def test_mide_todos_los_endpoints(self):
+        call_command(
+            'generar_datos', profesores=3, cursos=6, estudiantes=30, dias=28, semilla=1,
+            stdout=StringIO()
+        )
+        resultados = rendimiento.medir(repeticiones=1)
+        for _, viewset, basename in router.registry:
+            nombres = {f'{basename}-list', f'{basename}-detail'} | {
+                f'{basename}-{accion.url_name}' for accion in viewset.get_extra_actions()
+            }
+            self.assertLessEqual(nombres, set(resultados))
+        for nombre, medida in resultados.items():
+            self.assertLess(medida['estado'], 400, nombre)
+            self.assertGreater(medida['consultas'], 0, nombre)
+            self.assertGreater(medida['filas'], 0, nombre)
+
+    def test_renderizado_igual_a_drf(self):
+        call_command(
+            'generar_datos', profesores=3, cursos=6, estudiantes=30, dias=28, semilla=1,
+            stdout=StringIO()
+        )
+        resultados = rendimiento.medir_renderizado(repeticiones=1)
+        self.assertEqual(len(resultados), 6)
+        for nombre, medida in resultados.items():
+            self.assertTrue(medida['igual'], nombre)
+            self.assertGreater(medida['bytes'], 2, nombre)
+
+    def test_comparar_detecta_regresiones(self):
+        base = {'pequena': {'curso-list': {
+            'estado': 200, 'p50_ms': 10.0, 'p95_ms': 12.0, 'consultas': 3, 'filas': 12, 'memoria_kb': 100,
+        }}}
+        igual = {'pequena': {'curso-list': dict(base['pequena']['curso-list'], p50_ms=12.0)}}
+        self.assertEqual(rendimiento.comparar(igual, base), [])
+
+        peor = {'pequena': {'curso-list': dict(base['pequena']['curso-list'], consultas=4, p50_ms=40.0)}}
+        regresiones = rendimiento.comparar(peor, base)
+        self.assertEqual(len(regresiones), 2)
+
+        # Una escala medida que falta en la base no se salta en silencio
+        otra_escala = {**igual, 'mediana': igual['pequena']}
+        self.assertEqual(rendimiento.comparar(otra_escala, base), ['mediana: no está en la línea base'])
+        self.assertEqual(rendimiento.comparar(otra_escala, {}), [])
+
+    def test_crecimiento_de_consultas(self):
+        medida = {'estado': 200, 'p50_ms': 1, 'p95_ms': 1, 'filas': 1, 'memoria_kb': 1}
+        resultados = {
+            'pequena': {'a': dict(medida, consultas=3), 'b': dict(medida, consultas=3)},
+            'mediana': {'a': dict(medida, consultas=3), 'b': dict(medida, consultas=40)},
+        }
+        self.assertEqual(len(rendimiento.crecimiento_consultas(resultados)), 1)
+
+
+class MetricasTests(DatosMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        metricas.reiniciar()
+
+    def test_server_timing(self):
+        response = self.client.get(f'/api/cursos/{self.cursos[1].id}/estudiantes/')
+        fases = dict(
+            parte.split(';', 1) for parte in response['Server-Timing'].split(', ')
+        )
+        self.assertEqual(set(fases), {'db', 'vista', 'serializador', 'render', 'total'})
+        self.assertIn('desc="3 consultas"', fases['db'])
+
+    def test_histogramas_por_accion(self):
+        self.client.get(f'/api/estudiantes/{self.estudiantes[0].id}/horario/')
+        self.client.get(f'/api/estudiantes/{self.estudiantes[0].id}/horario/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        texto = response.content.decode()
+        self.assertIn('# TYPE cursosapi_request_duration_seconds histogram', texto)
+        self.assertIn(
+            'cursosapi_db_queries_count{metodo="GET",ruta="EstudianteViewSet.horario"} 2', texto
+        )
+        self.assertIn(
+            'cursosapi_response_size_bytes_bucket{metodo="GET",ruta="EstudianteViewSet.horario",le="+Inf"} 2',
+            texto
+        )
+
+    def test_metrics_solo_ips_internas(self):
+        response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICAS_CONSULTA_LENTA_MS=0)
+    def test_registra_consultas_lentas(self):
+        with self.assertLogs('cursosapi.metricas', level='WARNING') as registros:
+            self.client.get(f'/api/profesores/{self.profesores[0].id}/')
+        self.assertIn('cursosapi_profesor', registros.output[0])
+        self.assertRegex(registros.output[0], r'desde \S+cursosapi/\w+\.py:\d+ en \w+')
+
+
+class PerfiladoTests(DatosMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(PERFILADO_DIRECTORIO=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.staff = User.objects.create_user('admin', password='x', is_staff=True)
+        self.url = f'/api/cursos/{self.cursos[1].id}/estudiantes/'
+
+    def test_staff_obtiene_perfil_descargable(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, HTTP_X_PERFILAR='1')
+        self.assertEqual(response.status_code, 200)
+        resumen = self.client.get(response['X-Perfil']).json()
+        self.assertEqual(resumen['ruta'], 'CursoViewSet.estudiantes')
+        self.assertEqual(resumen['consultas'], sum(grupo['veces'] for grupo in resumen['sql']))
+        self.assertIn('cumulative', resumen['llamadas'])
+        self.assertTrue(resumen['asignaciones'])
+
+        lista = self.client.get('/internal/perfiles/').json()
+        self.assertEqual([perfil['id'] for perfil in lista], [resumen['id']])
+        descarga = self.client.get(lista[0]['descarga'])
+        self.assertEqual(descarga.status_code, 200)
+        self.assertTrue(b''.join(descarga.streaming_content))
+
+    def test_sin_staff_no_se_perfila(self):
+        response = self.client.get(self.url, {'perfilar': '1'})
+        self.assertNotIn('X-Perfil', response)
+        self.assertEqual(self.client.get('/internal/perfiles/').status_code, 403)
+
+    @override_settings(PERFILADO_MAX_POR_MINUTO=1)
+    def test_limite_por_minuto(self):
+        self.client.force_login(self.staff)
+        self.assertIn('X-Perfil', self.client.get(self.url, {'perfilar': '1'}))
+        response = self.client.get(self.url, {'perfilar': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Perfil', response)
+        self.assertEqual(response['X-Perfil-Omitido'], 'limite')
+
+
+class AsincronoTests(DatosMixin, TestCase):
+    """Bajo ASGI las vistas de ``asincrono`` deben responder igual que los viewsets."""
+
+    def setUp(self):
+        super().setUp()
+        self.estudiante = self.estudiantes[0]
+        self.urls = [
+            f'/api/estudiantes/{self.estudiante.id}/horario/',
+            f'/api/estudiantes/{self.estudiante.id}/cursos/',
+            f'/api/estudiantes/{self.estudiante.id}/calificaciones/',
+            f'/api/cursos/{self.cursos[1].id}/estudiantes/',
+            f'/api/cursos/{self.cursos[1].id}/estudiantes/?fields=id,matricula',
+            '/api/cursos/',
+            '/api/cursos/?page=2',
+            '/api/cursos/?fields=codigo,profesor&expand=profesor',
+        ]
+
+    def get_asgi(self, url, cliente=None, headers=None):
+        cliente = cliente or AsyncClient()
+        with override_settings(ROOT_URLCONF='config.urls_asgi'):
+            response = async_to_sync(cliente.get)(
+                url, headers={'accept': 'application/json', **(headers or {})}
+            )
+            # resolver_match se resuelve al usarlo: hay que hacerlo con estas URLs
+            response.vista = response.resolver_match.func
+        return response
+
+    @mock.patch.object(PageNumberPagination, 'page_size', 3)
+    def test_mismas_respuestas_que_wsgi(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                esperada = self.client.get(url, HTTP_ACCEPT='application/json')
+                cache.clear()
+                response = self.get_asgi(url)
+                self.assertEqual(response.vista.__module__, 'cursosapi.asincrono')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, esperada.content)
+                self.assertEqual(response['Content-Type'], esperada['Content-Type'])
+                self.assertEqual(response['Allow'], esperada['Allow'])
+                self.assertEqual(response['ETag'], esperada['ETag'])
+                # Ya en caché: la misma respuesta
+                self.assertEqual(self.get_asgi(url).content, esperada.content)
+
+    def test_etag_de_wsgi_vale_en_asgi(self):
+        url = f'/api/estudiantes/{self.estudiante.id}/horario/'
+        etag = self.client.get(url)['ETag']
+        response = self.get_asgi(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_delega_lo_que_no_cubre(self):
+        urls = [
+            '/api/estudiantes/999999/horario/',
+            '/api/cursos/?page=99',
+            '/api/cursos/?fields=inexistente',
+            '/api/cursos/?search=Curso',
+            f'/api/estudiantes/{self.estudiante.id}/calificaciones/?format=json',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                esperada = self.client.get(url, HTTP_ACCEPT='application/json')
+                response = self.get_asgi(url)
+                self.assertEqual(response.status_code, esperada.status_code)
+                self.assertEqual(response.content, esperada.content)
+
+        navegable = self.get_asgi('/api/cursos/', headers={'accept': 'text/html'})
+        self.assertEqual(navegable.status_code, 200)
+        self.assertIn('text/html', navegable['Content-Type'])
+
+        with override_settings(ROOT_URLCONF='config.urls_asgi'):
+            creado = async_to_sync(AsyncClient().post)('/api/cursos/', {
+                'codigo': 'ASY001', 'nombre': 'Async', 'creditos': 3, 'cupo_maximo': 10,
+                'dias': 'LUN', 'hora_inicio': '10:00', 'hora_fin': '11:00',
+                'fecha_inicio': '2025-01-01', 'fecha_fin': '2025-06-30',
+            }, content_type='application/json')
+        self.assertEqual(creado.status_code, 201)
+        self.assertTrue(Curso.objects.filter(codigo='ASY001').exists())
+
+    def test_csrf_como_en_wsgi(self):
+        # DRF exime del middleware a sus vistas y solo exige el token a las sesiones
+        def crear(cliente, codigo):
+            return cliente.post('/api/cursos/', {
+                'codigo': codigo, 'nombre': codigo, 'creditos': 3, 'cupo_maximo': 10,
+                'dias': 'LUN', 'hora_inicio': '10:00', 'hora_fin': '11:00',
+                'fecha_inicio': '2025-01-01', 'fecha_fin': '2025-06-30',
+            }, content_type='application/json')
+
+        esperado = crear(APIClient(enforce_csrf_checks=True), 'CSRF01')
+        self.assertEqual(esperado.status_code, 201)
+        with override_settings(ROOT_URLCONF='config.urls_asgi'):
+            cliente = AsyncClient(enforce_csrf_checks=True)
+            self.assertEqual(async_to_sync(crear)(cliente, 'CSRF02').status_code, 201)
+            # El flujo en vivo solo admite GET: el middleware no debe adelantarse
+            en_vivo = async_to_sync(cliente.post)(f'/api/cursos/{self.cursos[1].id}/asistencia_en_vivo/')
+            self.assertEqual(en_vivo.status_code, 405)
+
+            # Con sesión, DRF exige el token igual que con WSGI
+            usuario = User.objects.create_user('csrf', password='clave')
+            async_to_sync(cliente.aforce_login)(usuario)
+            response = async_to_sync(crear)(cliente, 'CSRF03')
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('CSRF', response.json()['detail'])
+        self.assertFalse(Curso.objects.filter(codigo='CSRF03').exists())
+
+    @mock.patch.object(renderers.StreamingRenderer, 'filas_por_bloque', 2)
+    @mock.patch('cursosapi.views.AsistenciaViewSet.chunk_size_exportacion', 2)
+    def test_exportaciones_se_envian_por_bloques(self):
+        inscripciones = Inscripcion.objects.filter(curso=self.cursos[1])
+        Asistencia.objects.bulk_create(
+            Asistencia(inscripcion=inscripcion, fecha=date(2025, 3, dia))
+            for inscripcion in inscripciones for dia in (3, 4)
+        )
+
+        async def bloques(url, parametros):
+            response = await AsyncClient().get(url, parametros)
+            self.assertTrue(response.is_async)
+            return response, [bloque async for bloque in response.streaming_content]
+
+        consultas = [
+            ('/api/asistencias/por_curso/', {'curso_id': self.cursos[1].id}),
+            ('/api/asistencias/por_estudiante/', {'estudiante_id': self.estudiante.id}),
+        ]
+        for url, parametros in consultas:
+            for formato in ('ndjson', 'csv'):
+                with self.subTest(url=url, formato=formato):
+                    parametros = {**parametros, 'format': formato}
+                    esperada = self.client.get(url, parametros)
+                    response, contenido = async_to_sync(bloques)(url, parametros)
+                    self.assertEqual(response['Content-Type'], esperada['Content-Type'])
+                    self.assertEqual(b''.join(contenido), b''.join(esperada.streaming_content))
+                    self.assertGreater(len(contenido), 1)
+
+    def test_aplica_permisos_y_limites_del_viewset(self):
+        url = f'/api/estudiantes/{self.estudiante.id}/horario/'
+        with mock.patch.object(EstudianteViewSet, 'permission_classes', [IsAuthenticated]):
+            esperada = self.client.get(url, HTTP_ACCEPT='application/json')
+            response = self.get_asgi(url)
+            self.assertEqual(response.vista.__module__, 'cursosapi.asincrono')
+            self.assertEqual(response.status_code, 403)
+            self.assertEqual(response.content, esperada.content)
+
+            cliente = AsyncClient()
+            cliente.force_login(User.objects.create_user('alumno', password='x'))
+            self.assertEqual(self.get_asgi(url, cliente).status_code, 200)
+
+        class UnaPorMinuto(AnonRateThrottle):
+            rate = '1/min'
+
+        with mock.patch.object(EstudianteViewSet, 'throttle_classes', [UnaPorMinuto]):
+            self.assertEqual(self.get_asgi(url).status_code, 200)
+            limitada = self.get_asgi(url)
+        self.assertEqual(limitada.status_code, 429)
+        self.assertIn('Retry-After', limitada)
+
+    def test_metricas_con_la_ruta_del_viewset(self):
+        metricas.reiniciar()
+        response = self.get_asgi(f'/api/cursos/{self.cursos[1].id}/estudiantes/')
+        fases = dict(parte.split(';', 1) for parte in response['Server-Timing'].split(', '))
+        self.assertIn('desc="3 consultas"', fases['db'])
+        self.assertIn(
+            'cursosapi_db_queries_count{metodo="GET",ruta="CursoViewSet.estudiantes"} 1', metricas.exponer()
+        )
+
+    def test_perfilado_bajo_asgi(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        cliente = AsyncClient()
+        cliente.force_login(User.objects.create_user('admin', password='x', is_staff=True))
+        with override_settings(PERFILADO_DIRECTORIO=directorio.name):
+            response = self.get_asgi(
+                f'/api/estudiantes/{self.estudiante.id}/horario/', cliente, {'x-perfilar': '1'}
+            )
+            self.assertEqual(response.status_code, 200)
+            resumen = self.client.get(response['X-Perfil'])
+        self.assertEqual(resumen.status_code, 403)
+        self.client.force_login(User.objects.get(username='admin'))
+        with override_settings(PERFILADO_DIRECTORIO=directorio.name):
+            resumen = self.client.get(response['X-Perfil']).json()
+        self.assertEqual(resumen['ruta'], 'EstudianteViewSet.horario')
+        self.assertEqual(resumen['usuario'], 'admin')
+        self.assertGreater(resumen['consultas'], 0)
+
+
+class EnVivoTests(DatosMixin, TestCase):
+    """Flujo SSE de ``asistencia_en_vivo`` y difusión de ``en_vivo.CANALES``."""
+
+    fecha = date(2025, 3, 3)
+
+    def setUp(self):
+        super().setUp()
+        self.curso = self.cursos[1]
+        self.url = f'/api/cursos/{self.curso.id}/asistencia_en_vivo/?fecha={self.fecha}'
+        self.clave = (self.curso.id, self.fecha)
+
+    @staticmethod
+    def evento(contenido):
+        campos = dict(linea.split(': ', 1) for linea in contenido.decode().strip().split('\n'))
+        return campos['event'], json.loads(campos['data'])
+
+    async def abrir(self, url=None):
+        with override_settings(ROOT_URLCONF='config.urls_asgi'):
+            response = await AsyncClient().get(url or self.url)
+        return response
+
+    def confirmar(self, funcion, *args, **kwargs):
+        # En TestCase la transacción no se confirma: se ejecutan los on_commit a mano
+        with self.captureOnCommitCallbacks(execute=True):
+            return funcion(*args, **kwargs)
+
+    async def cerrar(self, flujo):
+        # Como al desconectarse el cliente: ASGIHandler cancela la tarea que escribe
+        lector = asyncio.ensure_future(anext(flujo))
+        await asyncio.sleep(0)
+        lector.cancel()
+        await asyncio.gather(lector, return_exceptions=True)
+
+    def test_hoja_y_cambios(self):
+        estudiante = self.estudiantes[2]
+
+        async def escenario():
+            response = await self.abrir()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            self.assertEqual(response['Cache-Control'], 'no-cache')
+            flujo = aiter(response.streaming_content)
+            self.assertTrue((await anext(flujo)).startswith(b'retry: '))
+            evento, hoja = self.evento(await anext(flujo))
+            self.assertEqual(evento, 'lista')
+            self.assertEqual(len(hoja), len(self.estudiantes))
+            self.assertFalse(any(fila['presente'] for fila in hoja))
+            self.assertEqual(en_vivo.CANALES.suscriptores(self.clave), 1)
+
+            registrado = await sync_to_async(self.confirmar)(
+                self.client.post,
+                f'/api/cursos/{self.curso.id}/registrar_asistencia/',
+                {'fecha': str(self.fecha), 'asistencias': [{'estudiante_id': estudiante.id, 'presente': True}]},
+                format='json'
+            )
+            self.assertEqual(registrado.data['actualizados'], 1)
+            evento, cambios = self.evento(await asyncio.wait_for(anext(flujo), 1))
+            self.assertEqual(evento, 'asistencia')
+            self.assertEqual(cambios, [{'estudiante_id': estudiante.id, 'presente': True, 'justificada': False}])
+
+            # Cambiarle la fecha la quita de esta sesión
+            asistencia = await Asistencia.objects.aget(inscripcion__estudiante=estudiante, fecha=self.fecha)
+            await sync_to_async(self.confirmar)(
+                self.client.patch, f'/api/asistencias/{asistencia.id}/', {'fecha': '2025-03-04'}, format='json'
+            )
+            evento, cambios = self.evento(await asyncio.wait_for(anext(flujo), 1))
+            self.assertEqual(cambios, [{'estudiante_id': estudiante.id, 'presente': False, 'justificada': False}])
+
+            await self.cerrar(flujo)
+            self.assertEqual(en_vivo.CANALES.suscriptores(self.clave), 0)
+
+        async_to_sync(escenario)()
+
+    @override_settings(EN_VIVO_LATIDO_SEGUNDOS=0.01)
+    def test_latido(self):
+        async def escenario():
+            flujo = aiter((await self.abrir()).streaming_content)
+            await anext(flujo)
+            await anext(flujo)
+            self.assertEqual(await asyncio.wait_for(anext(flujo), 1), b': latido\n\n')
+            await self.cerrar(flujo)
+
+        async_to_sync(escenario)()
+
+    def test_errores(self):
+        async def escenario():
+            return [
+                await self.abrir(f'/api/cursos/{self.curso.id}/asistencia_en_vivo/?fecha=03-03-2025'),
+                await self.abrir('/api/cursos/999999/asistencia_en_vivo/'),
+            ]
+
+        formato, inexistente = async_to_sync(escenario)()
+        self.assertEqual(formato.status_code, 400)
+        self.assertEqual(formato.json(), {"error": "Formato de fecha inválido. Use YYYY-MM-DD"})
+        self.assertEqual(inexistente.status_code, 404)
+
+    def test_permisos_de_la_hoja_de_asistencia(self):
+        with mock.patch.object(CursoViewSet, 'permission_classes', [IsAuthenticated]):
+            response = async_to_sync(self.abrir)()
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('detail', response.json())
+
+    def test_sin_suscriptores_no_consulta(self):
+        asistencia = Asistencia.objects.create(
+            inscripcion=Inscripcion.objects.filter(curso=self.curso).first(), fecha=self.fecha
+        )
+        with self.assertNumQueries(0), self.captureOnCommitCallbacks() as callbacks:
+            en_vivo.publicar_asistencia(asistencia)
+        self.assertEqual(callbacks, [])
+
+    def test_difusion_desde_otro_hilo_y_desborde(self):
+        canales = en_vivo.Canales()
+
+        async def escenario():
+            suscripciones = [canales.suscribir(self.clave, maximo=2) for _ in range(3)]
+            hilo = threading.Thread(target=canales.publicar, args=(self.clave, 'asistencia', [1]))
+            hilo.start()
+            await sync_to_async(hilo.join)()
+            await asyncio.sleep(0)
+            # Un solo mensaje, compartido por todos
+            mensajes = [suscripcion.cola.get_nowait() for suscripcion in suscripciones]
+            self.assertTrue(all(mensaje is mensajes[0] for mensaje in mensajes))
+            self.assertEqual(self.evento(mensajes[0]), ('asistencia', [1]))
+
+            for _ in range(3):
+                canales.publicar(self.clave, 'asistencia', [2])
+            await asyncio.sleep(0)
+            self.assertIs(suscripciones[0].cola.get_nowait(), en_vivo.RESINCRONIZAR)
+            self.assertTrue(suscripciones[0].cola.empty())
+
+            for suscripcion in suscripciones:
+                canales.cancelar(suscripcion)
+            self.assertEqual(canales.suscriptores(self.clave), 0)
+            self.assertFalse(canales.escuchando(self.fecha))
+
+        async_to_sync(escenario)()
+
+
+class CacheRespuestasTests(DatosMixin, TestCase):
+    """Claves versionadas por entidad y candado contra estampidas de ``cache_respuestas``."""
+
+    def test_escritura_invalida_solo_su_entidad(self):
+        cambiado, otro = self.cursos[1], self.cursos[2]
+        inscrito = Inscripcion.objects.filter(curso=cambiado).values_list('estudiante_id', flat=True)[0]
+        entidades = ['catalogo', f'curso:{cambiado.id}', f'estudiante:{inscrito}', f'curso:{otro.id}']
+        for curso in (cambiado, otro):
+            self.client.get(f'/api/cursos/{curso.id}/')
+        antes = cache_respuestas.obtener_versiones(entidades)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/cursos/{cambiado.id}/', {'nombre': 'Renombrado'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        despues = cache_respuestas.obtener_versiones(entidades)
+        self.assertEqual([a != d for a, d in zip(antes, despues)], [True, True, True, False])
+
+        get_object = CursoViewSet.get_object
+        with mock.patch.object(CursoViewSet, 'get_object', autospec=True, side_effect=get_object) as leido:
+            self.assertEqual(self.client.get(f'/api/cursos/{otro.id}/').json()['nombre'], otro.nombre)
+            self.assertEqual(leido.call_count, 0)
+            self.assertEqual(self.client.get(f'/api/cursos/{cambiado.id}/').json()['nombre'], 'Renombrado')
+            self.assertEqual(leido.call_count, 1)
+
+    def test_sin_confirmar_no_invalida(self):
+        antes = cache_respuestas.obtener_versiones(['catalogo'])
+        with self.captureOnCommitCallbacks(execute=False):
+            cache_respuestas.invalidar('catalogo')
+            self.assertEqual(cache_respuestas.obtener_versiones(['catalogo']), antes)
+
+    def estampida(self, clave, hilos=5):
+        calculos = []
+
+        def calcular():
+            calculos.append(1)
+            time_module.sleep(0.2)
+            return 'nuevo'
+
+        resultados = [None] * hilos
+
+        def pedir(i):
+            resultados[i] = cache_respuestas.obtener_o_calcular(clave, calcular, timeout=60)
+
+        hilos = [threading.Thread(target=pedir, args=(i,)) for i in range(hilos)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return len(calculos), resultados
+
+    def test_candado_contra_estampidas(self):
+        calculos, resultados = self.estampida('respuesta:prueba:vacia')
+        self.assertEqual(calculos, 1)
+        self.assertEqual(resultados, ['nuevo'] * 5)
+
+    def test_valor_vencido_mientras_se_recalcula(self):
+        clave = 'respuesta:prueba:vencida'
+        # Como lo deja obtener_o_calcular pasada su expiración suave
+        cache.set(clave, {'valor': 'viejo', 'fresco_hasta': time_module.time() - 1}, 60)
+        calculos, resultados = self.estampida(clave)
+        self.assertEqual(calculos, 1)
+        self.assertEqual(sorted(resultados), ['nuevo'] + ['viejo'] * 4)
+
+
+class EstadisticasTests(DatosMixin, TestCase):
+    """Estadísticas de calificaciones por curso y su caché."""
+
+    valores = ('2.00', '5.50', '6.00', '9.00', '10.00')
+
+    def setUp(self):
+        super().setUp()
+        self.curso = Curso.objects.create(
+            codigo='EST001', nombre='Estadística', creditos=3, profesor=self.profesores[0],
+            dias=Curso.DIAS_CHOICES[4][0], hora_inicio=time(14), hora_fin=time(15),
+            fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 30)
+        )
+        self.calificaciones = [
+            Calificacion.objects.create(
+                inscripcion=Inscripcion.objects.create(estudiante=estudiante, curso=self.curso), valor=valor
+            )
+            for estudiante, valor in zip(self.estudiantes, self.valores)
+        ]
+        self.url = f'/api/cursos/{self.curso.id}/estadisticas_calificaciones/'
+
+    def test_medidas(self):
+        datos = self.client.get(self.url).json()
+        self.assertEqual(datos['total'], 5)
+        self.assertEqual(datos['promedio'], 6.5)
+        self.assertEqual(datos['mediana'], 6.0)
+        # Desviación estándar poblacional: sqrt(40 / 5)
+        self.assertEqual(datos['desviacion_estandar'], 2.83)
+        self.assertEqual((datos['percentil_25'], datos['percentil_75']), (5.5, 9.0))
+        self.assertEqual((datos['minimo'], datos['maximo']), (2.0, 10.0))
+        self.assertEqual((datos['aprobados'], datos['tasa_aprobacion']), (3, 0.6))
+
+    def test_histograma(self):
+        histograma = self.client.get(self.url).json()['histograma']
+        self.assertEqual([rango['rango'] for rango in histograma], [f'{i}-{i + 1}' for i in range(10)])
+        # 5.50 va en 5-6, 6.00 en 6-7 y 10.00 en el último rango junto a 9.00
+        self.assertEqual([rango['total'] for rango in histograma], [0, 0, 1, 0, 0, 1, 1, 0, 0, 2])
+
+    def test_curso_sin_calificaciones(self):
+        vacio = Curso.objects.create(
+            codigo='EST002', nombre='Sin notas', creditos=3, profesor=self.profesores[0],
+            dias=Curso.DIAS_CHOICES[4][0], hora_inicio=time(16), hora_fin=time(17),
+            fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 30)
+        )
+        datos = self.client.get(f'/api/cursos/{vacio.id}/estadisticas_calificaciones/').json()
+        self.assertEqual(datos['total'], 0)
+        self.assertEqual(datos['aprobados'], 0)
+        for campo in ('promedio', 'mediana', 'desviacion_estandar', 'minimo', 'maximo', 'tasa_aprobacion'):
+            self.assertIsNone(datos[campo], campo)
+        self.assertEqual({rango['total'] for rango in datos['histograma']}, {0})
+
+        por_profesor = self.client.get(
+            f'/api/profesores/{self.profesores[0].id}/estadisticas_calificaciones/'
+        ).json()
+        self.assertEqual(
+            {curso['curso_id']: curso['total'] for curso in por_profesor}[vacio.id], 0
+        )
+
+    def test_cache_se_invalida_al_cambiar_una_calificacion(self):
+        self.assertEqual(self.client.get(self.url).json()['maximo'], 10.0)
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(self.url)
+        tabla = Calificacion._meta.db_table
+        self.assertFalse([c['sql'] for c in consultas.captured_queries if tabla in c['sql']])
+
+        calificacion = self.calificaciones[-1]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/calificaciones/{calificacion.id}/', {'valor': '4.00'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        datos = self.client.get(self.url).json()
+        self.assertEqual((datos['maximo'], datos['aprobados']), (9.0, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            calificacion.delete()
+        self.assertEqual(self.client.get(self.url).json()['total'], 4)
+
+    def test_escrituras_no_releen_el_curso(self):
+        # La señal toma el curso de la inscripción que la vista ya cargó
+        nueva = Inscripcion.objects.create(estudiante=self.estudiantes[5], curso=self.curso)
+        calificacion = self.calificaciones[-1]
+        escrituras = [
+            (lambda: self.client.post('/api/calificaciones/', {
+                'inscripcion': nueva.id, 'valor': '1.00',
+            }, format='json'), 'minimo', 1.0),
+            (lambda: self.client.post('/api/calificaciones/registrar_calificacion/', {
+                'inscripcion_id': nueva.id, 'valor': '3.00',
+            }, format='json'), 'minimo', 2.0),
+            (lambda: self.client.patch(
+                f'/api/calificaciones/{calificacion.id}/', {'valor': '9.50'}, format='json'
+            ), 'maximo', 9.5),
+            (lambda: self.client.delete(f'/api/calificaciones/{calificacion.id}/'), 'maximo', 9.0),
+        ]
+        for escribir, medida, esperado in escrituras:
+            self.client.get(self.url)
+            with CaptureQueriesContext(connection) as consultas, self.captureOnCommitCallbacks(execute=True):
+                self.assertLess(escribir().status_code, 300)
+            self.assertFalse([
+                c['sql'] for c in consultas.captured_queries
+                if c['sql'].startswith('SELECT "cursosapi_inscripcion"."curso_id" AS "curso_id" FROM')
+            ])
+            self.assertEqual(self.client.get(self.url).json()[medida], esperado)
+
+
+class CupoInscritosTests(DatosMixin, TestCase):
+    """``Curso.inscritos_activos`` al borrar inscripciones, directamente o en cascada."""
+
+    def assertContadoresCorrectos(self):
+        EscriturasConcurrentesTests.assertContadoresCorrectos(self)
+
+    def consultas_de_cupo(self, consultas):
+        sentencias = [consulta['sql'] for consulta in consultas.captured_queries]
+        return (
+            sum('GROUP BY' in sql and '"cursosapi_inscripcion"' in sql for sql in sentencias),
+            sum(sql.startswith('UPDATE "cursosapi_curso"') and 'inscritos_activos' in sql for sql in sentencias),
+        )
+
+    def test_borrar_estudiante_libera_un_lugar_por_curso(self):
+        estudiante = self.estudiantes[0]
+        Inscripcion.objects.get(estudiante=estudiante, curso=self.cursos[0]).dar_baja()
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.delete(f'/api/estudiantes/{estudiante.id}/').status_code, 204)
+        # Un COUNT agrupado y un UPDATE por cada curso en el que seguía activo
+        self.assertEqual(self.consultas_de_cupo(consultas), (1, self.num_cursos - 1))
+        self.assertContadoresCorrectos()
+
+    def test_borrar_un_lote_de_inscripciones(self):
+        inscripciones = Inscripcion.objects.filter(curso=self.cursos[1], estudiante__in=self.estudiantes[:3])
+        for _ in range(2):
+            # El mismo queryset otra vez, con las inscripciones creadas de nuevo
+            with CaptureQueriesContext(connection) as consultas:
+                inscripciones.delete()
+            self.assertEqual(self.consultas_de_cupo(consultas), (1, 1))
+            self.assertEqual(Curso.objects.get(pk=self.cursos[1].pk).inscritos_activos, self.num_estudiantes - 3)
+            self.assertContadoresCorrectos()
+            for estudiante in self.estudiantes[:3]:
+                Inscripcion.objects.create(estudiante=estudiante, curso=self.cursos[1])
+
+    def test_save_desactualizado_no_pisa_el_contador(self):
+        curso = Curso.objects.get(pk=self.cursos[1].pk)
+        Inscripcion.objects.get(estudiante=self.estudiantes[0], curso=curso).dar_baja()
+        curso.nombre = 'Renombrado'
+        curso.save()
+        curso.refresh_from_db()
+        self.assertEqual((curso.nombre, curso.inscritos_activos), ('Renombrado', self.num_estudiantes - 1))
+
+    def test_contador_de_solo_lectura_en_la_api(self):
+        url = f'/api/cursos/{self.cursos[1].id}/'
+        response = self.client.patch(url, {'inscritos_activos': 0, 'cupo_maximo': 40}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['inscritos_activos'], self.num_estudiantes)
+        self.assertContadoresCorrectos()
+
+    def test_borrar_curso_no_toca_los_demas(self):
+        self.assertEqual(self.client.delete(f'/api/cursos/{self.cursos[2].id}/').status_code, 204)
+        self.assertContadoresCorrectos()
+        self.assertEqual(
+            set(Curso.objects.values_list('inscritos_activos', flat=True)), {self.num_estudiantes}
+        )
+
+
+class InscribirLoteTests(DatosMixin, TestCase):
+    """``inscribir_lote``: resultados por par, cupos, duplicados y validación de la entrada."""
+
+    url = '/api/inscripciones/inscribir_lote/'
+
+    def crear_curso(self, codigo, cupo_maximo=30, hora=14):
+        # Viernes por la tarde: no choca con los cursos de DatosMixin
+        return Curso.objects.create(
+            codigo=codigo, nombre=codigo, creditos=3, cupo_maximo=cupo_maximo,
+            dias=Curso.DIAS_CHOICES[4][0], hora_inicio=time(hora), hora_fin=time(hora + 1),
+            fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 30)
+        )
+
+    def lote(self, **datos):
+        return self.client.post(self.url, datos, format='json')
+
+    def test_dry_run_no_escribe(self):
+        curso = self.crear_curso('LOTE01')
+        ids = [estudiante.id for estudiante in self.estudiantes]
+        response = self.lote(estudiante_ids=ids, curso_ids=[curso.id], dry_run=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['dry_run'])
+        self.assertEqual(response.data['inscritos'], self.num_estudiantes)
+        self.assertFalse(Inscripcion.objects.filter(curso=curso).exists())
+        self.assertNotIn('inscripcion_id', response.data['resultados'][0])
+        curso.refresh_from_db()
+        self.assertEqual(curso.inscritos_activos, 0)
+
+        response = self.lote(estudiante_ids=ids, curso_ids=[curso.id])
+        self.assertEqual(response.data['inscritos'], self.num_estudiantes)
+        curso.refresh_from_db()
+        self.assertEqual(curso.inscritos_activos, self.num_estudiantes)
+
+    def test_resultados_por_par(self):
+        curso = self.crear_curso('LOTE02')
+        primero, segundo = self.estudiantes[:2]
+        Inscripcion.objects.filter(estudiante=segundo, curso=self.cursos[1]).update(estado='BAJA')
+        response = self.lote(inscripciones=[
+            {'estudiante_id': primero.id, 'curso_id': curso.id},
+            {'estudiante_id': primero.id, 'curso_id': curso.id},
+            {'estudiante_id': primero.id, 'curso_id': self.cursos[0].id},
+            {'estudiante_id': segundo.id, 'curso_id': self.cursos[1].id},
+            {'estudiante_id': 999999, 'curso_id': curso.id},
+            {'estudiante_id': segundo.id, 'curso_id': 999999},
+            {'estudiante_id': segundo.id},
+            'no es un par',
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['inscritos'], 1)
+        resultados = response.data['resultados']
+        inscripcion = Inscripcion.objects.get(estudiante=primero, curso=curso)
+        self.assertEqual(resultados[0], {
+            'estudiante_id': primero.id, 'curso_id': curso.id, 'inscripcion_id': inscripcion.id, 'ok': True,
+        })
+        self.assertEqual([resultado.get('error') for resultado in resultados[1:]], [
+            "Par repetido en el lote",
+            "El estudiante ya está inscrito en este curso",
+            "El estudiante tiene una inscripción dada de baja en este curso",
+            "Estudiante no encontrado",
+            "Curso no encontrado",
+            "Se requieren estudiante_id y curso_id",
+            "Se requieren estudiante_id y curso_id",
+        ])
+        self.assertFalse(any(resultado['ok'] for resultado in resultados[1:]))
+
+    def test_cupo_se_agota_a_mitad_del_lote(self):
+        curso = self.crear_curso('LOTE03', cupo_maximo=2)
+        ids = [estudiante.id for estudiante in self.estudiantes[:4]]
+        response = self.lote(estudiante_ids=ids, curso_ids=[curso.id])
+        self.assertEqual([resultado['ok'] for resultado in response.data['resultados']], [True, True, False, False])
+        self.assertEqual(response.data['resultados'][2]['error'], "El curso ha alcanzado su cupo máximo")
+        curso.refresh_from_db()
+        self.assertEqual(curso.inscritos_activos, 2)
+        self.assertEqual(list(
+            Inscripcion.objects.filter(curso=curso).order_by('estudiante_id').values_list('estudiante_id', flat=True)
+        ), ids[:2])
+
+    def test_entrada_invalida(self):
+        curso = self.crear_curso('LOTE04')
+        estudiante = self.estudiantes[0]
+        for datos in (
+            {'estudiante_ids': str(estudiante.id), 'curso_ids': [curso.id]},
+            {'estudiante_ids': [estudiante.id], 'curso_ids': [str(curso.id)]},
+            {'estudiante_ids': [True], 'curso_ids': [curso.id]},
+            {'estudiante_ids': [estudiante.id], 'curso_ids': {'id': curso.id}},
+            {'estudiante_ids': [estudiante.id]},
+            {'inscripciones': {'estudiante_id': estudiante.id, 'curso_id': curso.id}},
+            {'inscripciones': []},
+            {},
+        ):
+            with self.subTest(datos=datos):
+                response = self.lote(**datos)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.data)
+        self.assertFalse(Inscripcion.objects.filter(curso=curso).exists())
+
+
+class HorariosTests(DatosMixin, TestCase):
+    """Choques de horario al inscribir estudiantes y asignar profesores."""
+
+    def setUp(self):
+        super().setUp()
+        self.estudiante = self.estudiantes[0]
+        self.profesor = self.profesores[1]
+
+    def crear_curso(self, codigo, dias='LUN', hora_inicio=time(8, 30), hora_fin=time(9, 30), **extra):
+        datos = dict(
+            codigo=codigo, nombre=codigo, creditos=3, dias=dias, hora_inicio=hora_inicio, hora_fin=hora_fin,
+            fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 30)
+        )
+        datos.update(extra)
+        return Curso.objects.create(**datos)
+
+    def inscribir(self, curso):
+        return self.client.post('/api/inscripciones/inscribir_estudiante/', {
+            'estudiante_id': self.estudiante.id, 'curso_id': curso.id,
+        }, format='json')
+
+    def test_inscribir_estudiante(self):
+        # CUR000 es LUN 08:00-09:00
+        response = self.inscribir(self.crear_curso('SOLAPA'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {"error": "El horario se superpone con CUR000 (LUN 08:00-09:00)"})
+
+        contiguo = self.crear_curso('CONTIGUO', hora_inicio=time(9), hora_fin=time(10))
+        otro_periodo = self.crear_curso('VERANO', fecha_inicio=date(2025, 7, 1), fecha_fin=date(2025, 8, 31))
+        self.assertEqual(self.inscribir(contiguo).status_code, 201)
+        self.assertEqual(self.inscribir(otro_periodo).status_code, 201)
+        # La inscripción nueva invalida el índice
+        response = self.inscribir(self.crear_curso('TARDE', hora_inicio=time(9, 30), hora_fin=time(11)))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('CONTIGUO', response.data['error'])
+
+        Inscripcion.objects.filter(estudiante=self.estudiante, curso=self.cursos[0]).update(estado='BAJA')
+        horarios.invalidar('estudiante', self.estudiante.id)
+        temprano = self.crear_curso('TEMPRANO', hora_inicio=time(8), hora_fin=time(8, 45))
+        self.assertEqual(self.inscribir(temprano).status_code, 201)
+
+    def test_inscribir_lote(self):
+        primero = self.crear_curso('PRIMERO', hora_inicio=time(18), hora_fin=time(20))
+        segundo = self.crear_curso('SEGUNDO', hora_inicio=time(19), hora_fin=time(21))
+        for dry_run in (True, False):
+            response = self.client.post('/api/inscripciones/inscribir_lote/', {
+                'estudiante_ids': [self.estudiante.id],
+                'curso_ids': [primero.id, segundo.id, self.crear_curso(f'SOLAPA{dry_run:d}').id],
+                'dry_run': dry_run,
+            }, format='json')
+            resultados = response.data['resultados']
+            self.assertEqual(response.data['inscritos'], 1)
+            self.assertTrue(resultados[0]['ok'])
+            self.assertEqual(resultados[1]['error'], "El horario se superpone con PRIMERO (LUN 18:00-20:00)")
+            self.assertIn('CUR000', resultados[2]['error'])
+        self.assertEqual(len(horarios.indice_estudiante(self.estudiante.id).conflictos(
+            horarios.franja_curso(segundo)
+        )), 1)
+
+    def test_inscripcion_por_serializer(self):
+        curso = self.crear_curso('SOLAPA')
+        response = self.client.post('/api/inscripciones/', {
+            'estudiante': self.estudiante.id, 'curso': curso.id,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('CUR000', response.data['non_field_errors'][0])
+
+        # Mover la inscripción que causa el choque no choca consigo misma
+        inscripcion = Inscripcion.objects.get(estudiante=self.estudiante, curso=self.cursos[0])
+        response = self.client.patch(f'/api/inscripciones/{inscripcion.id}/', {'curso': curso.id}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def test_profesor_al_crear_y_editar_curso(self):
+        # El profesor 1 da CUR001 (MAR 09:00-10:00) y CUR003 (JUE 11:00-12:00)
+        datos = {
+            'codigo': 'NUEVO', 'nombre': 'Nuevo', 'creditos': 3, 'cupo_maximo': 10,
+            'profesor': self.profesor.id, 'dias': 'MAR', 'hora_inicio': '09:30', 'hora_fin': '10:30',
+            'fecha_inicio': '2025-01-01', 'fecha_fin': '2025-06-30',
+        }
+        response = self.client.post('/api/cursos/', datos, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['profesor'], ["El horario se superpone con CUR001 (MAR 09:00-10:00)"])
+
+        self.assertEqual(self.client.post('/api/cursos/', {**datos, 'dias': 'MIE'}, format='json').status_code, 201)
+        url = f'/api/cursos/{self.cursos[3].id}/'
+        self.assertEqual(self.client.patch(url, {'nombre': 'Renombrado'}, format='json').status_code, 200)
+        response = self.client.patch(url, {'dias': 'MAR', 'hora_inicio': '08:00'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('CUR001', response.data['profesor'][0])
+        response = self.client.patch(url, {'dias': 'MAR', 'hora_inicio': '08:00', 'activo': False}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_accion_conflictos(self):
+        curso = self.crear_curso('SOLAPA', profesor=self.profesores[0])
+        url = f'/api/estudiantes/{self.estudiante.id}/conflictos/'
+        self.assertEqual(self.client.get(url).data, [])
+        response = self.client.get(f'{url}?curso_id={curso.id}')
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(
+            [franja['codigo'] for franja in response.data[0]['cursos']], ['SOLAPA', 'CUR000']
+        )
+        self.assertEqual(self.client.get(f'{url}?curso_id=999999').status_code, 404)
+
+        # Una inscripción hecha sin pasar por la API también invalida el índice
+        Inscripcion.objects.create(estudiante=self.estudiante, curso=curso)
+        response = self.client.get(url)
+        self.assertEqual(response.data[0]['dia'], 'LUN')
+        self.assertEqual({franja['codigo'] for franja in response.data[0]['cursos']}, {'SOLAPA', 'CUR000'})
+
+        # CUR002 (MIE 10:00-11:00) también es del profesor 0
+        response = self.client.get(f'/api/profesores/{self.profesores[0].id}/conflictos/')
+        self.assertEqual(response.data, [])
+        Curso.objects.filter(pk=curso.pk).update(dias='MIE', hora_inicio=time(10, 30), hora_fin=time(11, 30))
+        curso.refresh_from_db()
+        curso.save()
+        response = self.client.get(f'/api/profesores/{self.profesores[0].id}/conflictos/')
+        self.assertEqual(len(response.data), 1)
+
+    def test_indice_en_cache(self):
+        horarios.indice_estudiante(self.estudiante.id)
+        franja = horarios.franja_curso(self.cursos[0])
+        with self.assertNumQueries(0):
+            self.assertEqual(horarios.indice_estudiante(self.estudiante.id).conflictos(franja), [])
+
+    def test_indice_igual_que_comparar_todo(self):
+        aleatorio = random.Random(7)
+
+        def franja(curso_id):
+            inicio = aleatorio.randrange(7 * 60, 20 * 60, 15)
+            fin = inicio + aleatorio.choice((45, 60, 90, 120, 180))
+            mes = aleatorio.choice((1, 7))
+            return horarios.Franja(
+                curso_id, f'C{curso_id}', '', aleatorio.choice(('LUN', 'MAR')),
+                time(*divmod(inicio, 60)), time(*divmod(fin, 60)), date(2025, mes, 1), date(2025, mes + 5, 28)
+            )
+
+        franjas = [franja(i) for i in range(200)]
+        indice = horarios.IndiceHorario(franjas[:100])
+        for nueva in franjas[100:150]:
+            indice.agregar(nueva)
+        existentes = franjas[:150]
+        for buscada in franjas[150:]:
+            esperadas = {otra for otra in existentes if horarios.se_cruzan(buscada, otra)}
+            self.assertEqual(set(indice.conflictos(buscada)), esperadas)
+        self.assertEqual(
+            {frozenset(par) for par in indice.choques()},
+            {
+                frozenset((a, b)) for i, a in enumerate(existentes) for b in existentes[i + 1:]
+                if horarios.se_cruzan(a, b)
+            }
+        )
+
+
+class PaginacionKeysetTests(DatosMixin, TestCase):
+    """Enlaces, cursores y límites de ``PaginacionKeyset`` en modo cursor."""
+
+    url = '/api/inscripciones/'
+
+    def pagina(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        datos = response.json()
+        return [fila['id'] for fila in datos['results']], datos
+
+    def cursor(self, *posicion):
+        return base64.urlsafe_b64encode(json.dumps({'p': list(posicion)}).encode()).decode()
+
+    def test_recorrido_con_siguiente_y_anterior(self):
+        esperados = list(
+            Inscripcion.objects.order_by('-fecha_inscripcion', '-id').values_list('id', flat=True)
+        )
+        ids, datos = self.pagina(self.url, paginacion='cursor', page_size=5)
+        self.assertIsNone(datos['previous'])
+        paginas = [ids]
+        while datos['next']:
+            ids, datos = self.pagina(datos['next'])
+            paginas.append(ids)
+        self.assertEqual([id_ for pagina in paginas for id_ in pagina], esperados)
+        self.assertEqual([len(pagina) for pagina in paginas], [5, 5, 5, 5, 4])
+
+        # Hacia atrás desde la última página se repiten las mismas páginas
+        for anterior in reversed(paginas[:-1]):
+            ids, datos = self.pagina(datos['previous'])
+            self.assertEqual(ids, anterior)
+        self.assertIsNone(datos['previous'])
+
+    def test_sin_count(self):
+        with CaptureQueriesContext(connection) as consultas:
+            _, datos = self.pagina(self.url, paginacion='cursor')
+        self.assertNotIn('count', datos)
+        self.assertFalse([c['sql'] for c in consultas.captured_queries if 'COUNT(' in c['sql']])
+
+        _, datos = self.pagina(self.url, paginacion='cursor', count='true')
+        self.assertEqual(datos['count'], Inscripcion.objects.count())
+
+    def test_page_size_acotado(self):
+        inscripcion = Inscripcion.objects.first()
+        Asistencia.objects.bulk_create(
+            Asistencia(inscripcion=inscripcion, fecha=date(2025, 1, 1) + timedelta(days=dia))
+            for dia in range(120)
+        )
+        ids, datos = self.pagina('/api/asistencias/', paginacion='cursor', page_size=1000)
+        self.assertEqual(len(ids), 100)
+        self.assertIsNotNone(datos['next'])
+
+    def test_cursores_invalidos(self):
+        for cursor in (
+            'no-es-base64!', self.cursor('2025-01-01'), self.cursor('ayer', 1),
+            self.cursor('2025-01-01', 'uno'), self.cursor(None, 1), self.cursor('2025-01-01', [1]),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json(), {'detail': 'Cursor inválido'})
+
+        ids, _ = self.pagina(self.url, cursor=self.cursor('2100-01-01', '0'))
+        self.assertEqual(len(ids), 10)
+
+    def test_ordering_con_cursor(self):
+        # El orden del cursor es el de la vista: pedir otro es un error, no se ignora
+        _, datos = self.pagina(self.url, paginacion='cursor', page_size=5)
+        for params in ({'paginacion': 'cursor'}, {'cursor': datos['next'].split('cursor=')[1]}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, {**params, 'ordering': '-estado'})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'ordering': [PaginacionKeyset.ordering_con_cursor_message]})
+
+        # Con paginación numerada se sigue respetando
+        baja = Inscripcion.objects.last()
+        baja.dar_baja()
+        ids, _ = self.pagina(self.url, ordering='-estado', page_size=5)
+        self.assertEqual(ids[0], baja.id)
+
+
+@skipUnless(busqueda.soportado(), "El índice de texto completo requiere SQLite o PostgreSQL")
+class BusquedaTests(DatosMixin, TestCase):
+    """``BusquedaTextoFilter`` sobre el índice de texto completo y su mantenimiento por señales."""
+
+    def buscar(self, ruta, texto):
+        response = self.client.get(f'/api/{ruta}/', {'search': texto, 'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        return {fila['id'] for fila in response.json()['results']}
+
+    def indexados(self, modelo):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {busqueda.tabla_sqlite(modelo)}')
+            return cursor.fetchone()[0]
+
+    def test_prefijos_y_acentos(self):
+        estudiante = Estudiante.objects.create(
+            matricula='MAT9001', nombre='José', apellido='Núñez', email='jnunez@example.com',
+            fecha_nacimiento=date(2000, 1, 1), fecha_ingreso=date(2024, 8, 1)
+        )
+        self.assertEqual(len(self.buscar('estudiantes', 'MAT00')), self.num_estudiantes)
+        for texto in ('nunez', 'NÚÑ', 'jose nun', 'mat9'):
+            with self.subTest(texto=texto):
+                self.assertEqual(self.buscar('estudiantes', texto), {estudiante.id})
+        self.assertEqual(self.buscar('estudiantes', 'zzz'), set())
+
+    def test_terminos_en_modelos_distintos(self):
+        estudiante, curso = self.estudiantes[0], self.cursos[1]
+        esperada = {Inscripcion.objects.get(estudiante=estudiante, curso=curso).id}
+        texto = f'{estudiante.nombre} {curso.codigo}'
+        self.assertEqual(self.buscar('inscripciones', texto), esperada)
+        # Mismo resultado que SearchFilter con icontains
+        with mock.patch.object(busqueda, 'soportado', return_value=False):
+            self.assertEqual(self.buscar('inscripciones', texto), esperada)
+
+        calificaciones = self.buscar('calificaciones', f'{estudiante.matricula} {curso.codigo}')
+        self.assertEqual(
+            calificaciones,
+            set(Calificacion.objects.filter(inscripcion__in=esperada).values_list('id', flat=True))
+        )
+        # Las palabras de un mismo término deben estar en el mismo modelo
+        self.assertEqual(self.buscar('inscripciones', f'{estudiante.nombre}.{curso.codigo}'), set())
+
+    def test_indice_al_guardar_y_borrar(self):
+        estudiante = self.estudiantes[0]
+        estudiante.apellido = 'Quiroga'
+        estudiante.save()
+        self.assertEqual(self.buscar('estudiantes', 'quiroga'), {estudiante.id})
+        self.assertEqual(self.buscar('estudiantes', 'Apellido0'), set())
+        self.assertEqual(self.indexados('estudiante'), self.num_estudiantes)
+
+        profesor = self.profesores[1]
+        profesor.apellido = 'Valdivia'
+        profesor.save()
+        self.assertEqual(
+            self.buscar('cursos', 'valdivia'),
+            set(Curso.objects.filter(profesor=profesor).values_list('id', flat=True))
+        )
+
+        # La caché de respuestas se invalida al confirmar
+        with self.captureOnCommitCallbacks(execute=True):
+            estudiante.delete()
+            profesor.delete()
+        self.assertEqual(self.buscar('estudiantes', 'quiroga'), set())
+        self.assertEqual(self.indexados('estudiante'), self.num_estudiantes - 1)
+        self.assertEqual(self.buscar('cursos', 'valdivia'), set())
+        self.assertEqual(self.indexados('profesor'), 1)
+
+    def test_reconstruir(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {busqueda.tabla_sqlite("curso")}')
+        call_command('reconstruir_indice_busqueda', stdout=StringIO())
+        self.assertEqual(self.indexados('curso'), self.num_cursos)
+        self.assertEqual(self.buscar('cursos', self.cursos[2].codigo), {self.cursos[2].id})
+
+
+class SincronizacionTests(DatosMixin, TestCase):
+    """``?since=`` en las listas: cambios, eliminaciones y ``sync_token``."""
+
+    url = '/api/inscripciones/'
+
+    def delta(self, since, **extra):
+        response = self.client.get(self.url, {'since': since, **extra})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def test_cambios_y_eliminados_desde_una_fecha(self):
+        antes = timezone.now() - timedelta(days=1)
+        Inscripcion.objects.update(updated_at=antes - timedelta(days=1))
+        cambiada = Inscripcion.objects.first()
+        cambiada.save()
+        borrada = Inscripcion.objects.last()
+        borrada_id = borrada.id
+        borrada.delete()
+
+        datos = self.delta(antes.isoformat())
+        self.assertEqual([fila['id'] for fila in datos['results']], [cambiada.id])
+        self.assertEqual(datos['eliminados'], [borrada_id])
+        self.assertFalse(datos['hay_mas'])
+
+    @override_settings(SINCRONIZACION_VENTANA_SEGUNDOS=0)
+    def test_token_ida_y_vuelta(self):
+        primera = self.delta((timezone.now() - timedelta(days=1)).isoformat(), page_size=5)
+        self.assertEqual(len(primera['results']), 5)
+        self.assertTrue(primera['hay_mas'])
+        vistos = [fila['id'] for fila in primera['results']]
+        token = primera['sync_token']
+        while True:
+            datos = self.delta(token, page_size=5)
+            vistos += [fila['id'] for fila in datos['results']]
+            token = datos['sync_token']
+            if not datos['hay_mas']:
+                break
+        self.assertEqual(sorted(vistos), sorted(Inscripcion.objects.values_list('id', flat=True)))
+        self.assertEqual(self.delta(token)['results'], [])
+
+        cambiada = Inscripcion.objects.first()
+        cambiada.save()
+        self.assertEqual([fila['id'] for fila in self.delta(token)['results']], [cambiada.id])
+        self.assertEqual(decodificar_since(codificar_token(*decodificar_since(token))), decodificar_since(token))
+
+    def test_flujo_quieto_no_envejece(self):
+        ahora = timezone.now()
+        token = self.delta((ahora - timedelta(days=80)).isoformat())['sync_token']
+        for posicion in decodificar_since(token):
+            self.assertGreater(posicion[0], ahora - timedelta(minutes=1))
+
+        # Un cliente que sincroniza a diario sigue siendo válido pasada la retención
+        for dias in range(1, 100, 30):
+            with mock.patch('django.utils.timezone.now', return_value=ahora + timedelta(days=dias)):
+                token = self.delta(token)['sync_token']
+
+    def test_lapidas_de_un_borrado_en_una_insercion(self):
+        estudiante = self.estudiantes[0]
+        inscripciones = list(Inscripcion.objects.filter(estudiante=estudiante).values_list('id', flat=True))
+        Asistencia.objects.bulk_create(
+            Asistencia(inscripcion_id=inscripcion_id, fecha=date(2025, 3, 3)) for inscripcion_id in inscripciones
+        )
+        esperadas = {
+            ('inscripcion', inscripcion_id) for inscripcion_id in inscripciones
+        } | {
+            ('calificacion', calificacion_id) for calificacion_id in
+            Calificacion.objects.filter(inscripcion__estudiante=estudiante).values_list('id', flat=True)
+        } | {
+            ('asistencia', asistencia_id) for asistencia_id in
+            Asistencia.objects.filter(inscripcion__estudiante=estudiante).values_list('id', flat=True)
+        }
+
+        with CaptureQueriesContext(connection) as consultas:
+            estudiante.delete()
+        inserciones = [
+            consulta for consulta in consultas.captured_queries
+            if consulta['sql'].startswith(f'INSERT INTO "{Eliminacion._meta.db_table}"')
+        ]
+        self.assertEqual(len(inserciones), 1)
+        self.assertEqual(set(Eliminacion.objects.values_list('modelo', 'objeto_id')), esperadas)
+
+        # Borrado de un solo objeto y de un queryset
+        Inscripcion.objects.filter(calificacion__isnull=True).first().delete()
+        borradas, _ = Calificacion.objects.all().delete()
+        self.assertGreater(borradas, 0)
+        self.assertEqual(Eliminacion.objects.count(), len(esperadas) + 1 + borradas)
+
+    def test_since_demasiado_antiguo(self):
+        since = (timezone.now() - timedelta(days=91)).isoformat()
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(self.client.get(self.url, {'since': 'ayer'}).status_code, 400)
+
+
+class EscriturasConcurrentesTests(DatosMixin, TransactionTestCase):
+    """Escrituras simultáneas desde varios hilos, cada uno con su conexión."""
+
+    def setUp(self):
+        # TransactionTestCase no llama a setUpTestData
+        self.setUpTestData()
+        super().setUp()
+
+    def en_paralelo(self, *funciones):
+        resultados = [None] * len(funciones)
+        errores = []
+
+        def ejecutar(i, funcion):
+            try:
+                resultados[i] = funcion()
+            except Exception as error:
+                errores.append(error)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=ejecutar, args=(i, funcion)) for i, funcion in enumerate(funciones)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(errores, [])
+        return resultados
+
+    def test_registrar_asistencia_simultaneo(self):
+        bulk_create = Asistencia.objects.bulk_create
+
+        def lento(*args, **kwargs):
+            # Ensancha la ventana entre la lectura del estado previo y la escritura
+            time_module.sleep(0.2)
+            return bulk_create(*args, **kwargs)
+
+        def registrar(curso):
+            return APIClient().post(f'/api/cursos/{curso.id}/registrar_asistencia/', {
+                'fecha': '2025-03-03',
+                'asistencias': [{'estudiante_id': e.id, 'presente': True} for e in self.estudiantes],
+            }, format='json')
+
+        with mock.patch.object(Asistencia.objects, 'bulk_create', lento):
+            respuestas = self.en_paralelo(lambda: registrar(self.cursos[1]), lambda: registrar(self.cursos[2]))
+        self.assertEqual([r.status_code for r in respuestas], [200, 200])
+        self.assertEqual(Asistencia.objects.filter(fecha=date(2025, 3, 3)).count(), 2 * self.num_estudiantes)
+
+    def assertContadoresCorrectos(self):
+        for curso in Curso.objects.all():
+            self.assertEqual(
+                curso.inscritos_activos,
+                Inscripcion.objects.filter(curso=curso, estado='ACTIVO').count(),
+                curso.codigo
+            )
+
+    def lento(self, clase, metodo):
+        # Ensancha la ventana entre leer la inscripción y escribirla
+        original = getattr(clase, metodo)
+
+        def envoltura(*args, **kwargs):
+            resultado = original(*args, **kwargs)
+            time_module.sleep(0.2)
+            return resultado
+        return mock.patch.object(clase, metodo, envoltura)
+
+    def test_cupo_sin_sobreventa(self):
+        curso = Curso.objects.create(
+            codigo='CUPO02', nombre='Cupo dos', creditos=3, cupo_maximo=2,
+            dias=Curso.DIAS_CHOICES[4][0], hora_inicio=time(8), hora_fin=time(9),
+            fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 30)
+        )
+
+        def inscribir(estudiante):
+            return lambda: APIClient().post('/api/inscripciones/', {
+                'estudiante': estudiante.id, 'curso': curso.id,
+            }, format='json')
+
+        with self.lento(InscripcionSerializer, 'validate'):
+            respuestas = self.en_paralelo(*map(inscribir, self.estudiantes[:4]))
+        self.assertEqual(sorted(r.status_code for r in respuestas), [201, 201, 400, 400])
+        curso.refresh_from_db()
+        self.assertEqual(curso.inscritos_activos, 2)
+        self.assertContadoresCorrectos()
+
+    def test_bajas_y_borrados_simultaneos(self):
+        inscripciones = Inscripcion.objects.filter(curso=self.cursos[1]).order_by('id')
+        primera, segunda = inscripciones[0].id, inscripciones[1].id
+
+        def dar_baja(pk):
+            return lambda: APIClient().post(f'/api/inscripciones/{pk}/dar_baja/')
+
+        def borrar(pk):
+            return lambda: APIClient().delete(f'/api/inscripciones/{pk}/')
+
+        with self.lento(InscripcionViewSet, 'get_object'):
+            respuestas = self.en_paralelo(dar_baja(primera), dar_baja(primera))
+            self.assertEqual(sorted(r.status_code for r in respuestas), [200, 400])
+            self.assertContadoresCorrectos()
+
+            respuestas = self.en_paralelo(borrar(segunda), dar_baja(segunda))
+            self.assertEqual(respuestas[0].status_code, 204)
+            self.assertContadoresCorrectos()
+        self.assertEqual(Curso.objects.get(pk=self.cursos[1].pk).inscritos_activos, self.num_estudiantes - 2)
+
+    def test_cambios_de_estado_y_curso_simultaneos(self):
+        curso = Curso.objects.create(
+            codigo='LIBRE1', nombre='Libre', creditos=3, cupo_maximo=10,
+            dias=Curso.DIAS_CHOICES[4][0], hora_inicio=time(8), hora_fin=time(9),
+            fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 30)
+        )
+        inscripcion = Inscripcion.objects.filter(curso=self.cursos[1]).first()
+        url = f'/api/inscripciones/{inscripcion.id}/'
+
+        def cambiar(datos):
+            return lambda: APIClient().patch(url, datos, format='json')
+
+        with self.lento(InscripcionViewSet, 'get_object'):
+            respuestas = self.en_paralelo(cambiar({'estado': 'BAJA'}), cambiar({'curso': curso.id}))
+        self.assertEqual([r.status_code for r in respuestas], [200, 200])
+        self.assertContadoresCorrectos()
+
+        with self.lento(InscripcionViewSet, 'get_object'):
+            respuestas = self.en_paralelo(cambiar({'estado': 'ACTIVO'}), cambiar({'estado': 'ACTIVO'}))
+        self.assertEqual([r.status_code for r in respuestas], [200, 200])
+        self.assertContadoresCorrectos()
+
+    def test_choques_de_horario_simultaneos(self):
+        def curso(codigo, hora_inicio, **extra):
+            return Curso.objects.create(
+                codigo=codigo, nombre=codigo, creditos=3, cupo_maximo=10,
+                dias=Curso.DIAS_CHOICES[4][0], hora_inicio=time(hora_inicio), hora_fin=time(hora_inicio + 2),
+                fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 30), **extra
+            )
+
+        def inscribir(estudiante, curso):
+            return lambda: APIClient().post('/api/inscripciones/inscribir_estudiante/', {
+                'estudiante_id': estudiante.id, 'curso_id': curso.id,
+            }, format='json')
+
+        def crear_inscripcion(estudiante, curso):
+            return lambda: APIClient().post('/api/inscripciones/', {
+                'estudiante': estudiante.id, 'curso': curso.id,
+            }, format='json')
+
+        def inscribir_lote(estudiante, curso):
+            return lambda: APIClient().post('/api/inscripciones/inscribir_lote/', {
+                'estudiante_ids': [estudiante.id], 'curso_ids': [curso.id],
+            }, format='json')
+
+        def crear_curso(codigo, hora_inicio):
+            return lambda: APIClient().post('/api/cursos/', {
+                'codigo': codigo, 'nombre': codigo, 'creditos': 3, 'cupo_maximo': 10,
+                'profesor': self.profesores[0].id, 'dias': Curso.DIAS_CHOICES[4][0],
+                'hora_inicio': f'{hora_inicio}:00', 'hora_fin': f'{hora_inicio + 2}:00',
+                'fecha_inicio': '2025-01-01', 'fecha_fin': '2025-06-30',
+            }, format='json')
+
+        tarde, noche = curso('TARDE1', 18), curso('NOCHE1', 19)
+        # Ambas peticiones leen el índice en caché antes de que la otra escriba
+        with self.lento(horarios, 'indices'):
+            respuestas = self.en_paralelo(
+                inscribir(self.estudiantes[0], tarde), crear_inscripcion(self.estudiantes[0], noche)
+            )
+            self.assertEqual(sorted(r.status_code for r in respuestas), [201, 400])
+
+            respuestas = self.en_paralelo(
+                inscribir_lote(self.estudiantes[1], tarde), crear_inscripcion(self.estudiantes[1], noche)
+            )
+            self.assertEqual(respuestas[0].status_code, 200)
+            self.assertEqual(respuestas[0].data['inscritos'] + (respuestas[1].status_code == 201), 1)
+
+            respuestas = self.en_paralelo(crear_curso('TARDE2', 18), crear_curso('NOCHE2', 19))
+            self.assertEqual(sorted(r.status_code for r in respuestas), [201, 400])
+
+        for estudiante in self.estudiantes[:2]:
+            self.assertEqual(Inscripcion.objects.filter(estudiante=estudiante, curso__in=[tarde, noche]).count(), 1)
+        self.assertEqual(Curso.objects.filter(codigo__in=['TARDE2', 'NOCHE2']).count(), 1)
+        self.assertContadoresCorrectos()
+
+    def assertResumenCoincide(self):
+        ResumenIncrementalTests.assertResumenCoincide(self)
+
+    def test_misma_lista_abierta_a_la_vez(self):
+        url = f'/api/cursos/{self.cursos[1].id}/lista_asistencia/?fecha=2025-03-03'
+        respuestas = self.en_paralelo(*[lambda: APIClient().get(url)] * 3)
+        self.assertEqual([r.status_code for r in respuestas], [200] * 3)
+        self.assertEqual(Asistencia.objects.count(), self.num_estudiantes)
+        self.assertEqual(set(ResumenAsistencia.objects.values_list('ausentes', flat=True)), {1})
+        self.assertResumenCoincide()
+
+    def test_editar_y_borrar_la_misma_asistencia(self):
+        asistencia = Asistencia.objects.create(
+            inscripcion=Inscripcion.objects.filter(curso=self.cursos[1]).first(), fecha=date(2025, 3, 3)
+        )
+        ResumenAsistencia.recalcular()
+        url = f'/api/asistencias/{asistencia.id}/'
+        respuestas = self.en_paralelo(
+            *[lambda: APIClient().patch(url, {'presente': True}, format='json')] * 2
+        )
+        self.assertEqual([r.status_code for r in respuestas], [200, 200])
+        self.assertResumenCoincide()
+        respuestas = self.en_paralelo(*[lambda: APIClient().delete(url)] * 2)
+        self.assertEqual(sorted(r.status_code for r in respuestas), [204, 404])
+        self.assertResumenCoincide()
+
+
+class ResumenIncrementalTests(DatosMixin, TestCase):
+    """``ResumenAsistencia`` mantenido por las vistas debe coincidir con recalcularlo desde cero."""
+
+    fecha = '2025-03-03'
+
+    def setUp(self):
+        super().setUp()
+        self.curso = self.cursos[1]
+        self.inscripciones = list(Inscripcion.objects.filter(curso=self.curso).order_by('id'))
+
+    def assertResumenCoincide(self):
+        def resumenes():
+            # Un resumen en cero equivale a no tener fila
+            return {
+                fila[0]: fila[1:] for fila in ResumenAsistencia.objects.filter(sesiones__gt=0).values_list(
+                    'inscripcion_id', 'sesiones', 'presentes', 'justificadas', 'ausentes'
+                )
+            }
+        incrementales = resumenes()
+        ResumenAsistencia.recalcular()
+        self.assertEqual(incrementales, resumenes())
+
+    def test_lista_asistencia_cuenta_ausencias_una_vez(self):
+        url = f'/api/cursos/{self.curso.id}/lista_asistencia/'
+        for _ in range(2):
+            self.assertEqual(self.client.get(url, {'fecha': self.fecha}).status_code, 200)
+        self.assertEqual(
+            ResumenAsistencia.objects.get(inscripcion=self.inscripciones[0]).ausentes, 1
+        )
+        self.assertResumenCoincide()
+
+    def test_registrar_asistencia(self):
+        url = f'/api/cursos/{self.curso.id}/registrar_asistencia/'
+        self.client.get(f'/api/cursos/{self.curso.id}/lista_asistencia/', {'fecha': self.fecha})
+        estudiante = self.inscripciones[0].estudiante_id
+        for datos in (
+            {'presente': True},
+            {'presente': False, 'justificada': True},
+            {'presente': True, 'fecha': '2025-03-04'},
+        ):
+            response = self.client.post(url, {
+                'fecha': self.fecha, 'asistencias': [{'estudiante_id': estudiante, **datos}],
+            }, format='json')
+            self.assertEqual(response.data['actualizados'], 1)
+        resumen = ResumenAsistencia.objects.get(inscripcion=self.inscripciones[0])
+        self.assertEqual((resumen.sesiones, resumen.presentes, resumen.justificadas), (2, 1, 1))
+        self.assertResumenCoincide()
+
+    def test_registrar_asistencia_repetida(self):
+        # El mismo estudiante dos veces para la misma fecha: cuenta una vez y vale el último
+        estudiante = self.inscripciones[0].estudiante_id
+        response = self.client.post(f'/api/cursos/{self.curso.id}/registrar_asistencia/', {
+            'fecha': self.fecha, 'asistencias': [
+                {'estudiante_id': estudiante, 'presente': False},
+                {'estudiante_id': estudiante, 'presente': True},
+            ],
+        }, format='json')
+        self.assertEqual(response.data, {'actualizados': 1, 'errores': []})
+        self.assertTrue(Asistencia.objects.get(inscripcion=self.inscripciones[0], fecha=self.fecha).presente)
+        resumen = ResumenAsistencia.objects.get(inscripcion=self.inscripciones[0])
+        self.assertEqual((resumen.sesiones, resumen.presentes), (1, 1))
+        self.assertResumenCoincide()
+
+    def test_registrar_asistencia_ids_no_enteros(self):
+        url = f'/api/cursos/{self.curso.id}/registrar_asistencia/'
+        estudiante = self.inscripciones[0].estudiante_id
+        response = self.client.post(url, {
+            'fecha': self.fecha, 'asistencias': [
+                {'estudiante_id': estudiante + 0.5, 'presente': True},
+                {'estudiante_id': str(estudiante), 'presente': True},
+                {'estudiante_id': True, 'presente': True},
+                {'presente': True},
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['actualizados'], 0)
+        self.assertEqual(response.data['errores'], [
+            f"El ID de estudiante {estudiante + 0.5!r} no es un entero",
+            f"El ID de estudiante '{estudiante}' no es un entero",
+            "El ID de estudiante True no es un entero",
+            "El ID de estudiante None no es un entero",
+        ])
+        self.assertFalse(Asistencia.objects.filter(inscripcion__curso=self.curso).exists())
+
+        for asistencias in ({'estudiante_id': estudiante}, [estudiante]):
+            response = self.client.post(url, {'fecha': self.fecha, 'asistencias': asistencias}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data, {"error": "asistencias debe ser una lista de objetos"})
+
+    def test_crud_de_asistencias(self):
+        primera, segunda = self.inscripciones[:2]
+        response = self.client.post('/api/asistencias/', {
+            'inscripcion': primera.id, 'fecha': self.fecha, 'presente': True,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        url = f"/api/asistencias/{response.data['id']}/"
+        self.assertResumenCoincide()
+
+        self.client.patch(url, {'presente': False, 'justificada': True}, format='json')
+        self.assertResumenCoincide()
+        # Pasa a otra inscripción: se descuenta de una y se suma a la otra
+        self.client.patch(url, {'inscripcion': segunda.id}, format='json')
+        self.assertEqual(ResumenAsistencia.objects.get(inscripcion=primera).sesiones, 0)
+        self.assertEqual(ResumenAsistencia.objects.get(inscripcion=segunda).justificadas, 1)
+        self.assertResumenCoincide()
+
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(ResumenAsistencia.objects.get(inscripcion=segunda).sesiones, 0)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertResumenCoincide()
+
+
+class ConcurrenciaTests(TransactionTestCase):
+    """La prueba de carga usa otros hilos y conexiones: los datos tienen que estar confirmados."""
+
+    def test_wsgi_y_asgi_responden_igual(self):
+        call_command(
+            'generar_datos', profesores=3, cursos=6, estudiantes=30, dias=7, semilla=1,
+            stdout=StringIO()
+        )
+        resultados = rendimiento.medir_concurrencia(
+            concurrencia=3, peticiones=6, hilos_wsgi=2, latencia_ms=0
+        )
+        self.assertEqual(set(resultados), set(rendimiento.rutas_concurrencia(rendimiento.muestras())))
+        for nombre, medida in resultados.items():
+            self.assertTrue(medida['igual'], nombre)
+            self.assertGreater(medida['wsgi_peticiones_s'], 0, nombre)
+            self.assertGreater(medida['asgi_peticiones_s'], 0, nombre)
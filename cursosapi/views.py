@@ -1,47 +1,233 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from rest_framework.settings import api_settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
 from datetime import datetime
-from .models import Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia
+from .models import (
+    Profesor, Curso, Estudiante, Inscripcion, Calificacion, Asistencia, ResumenAsistencia,
+    CupoAgotado, apellido_nombre,
+)
+from . import cache_respuestas, condicional, en_vivo, estadisticas, horarios, proyecciones
+from .busqueda import BusquedaTextoFilter
+from .cache_respuestas import cachear_respuesta
+from .condicional import respuesta_condicional
+from .sincronizacion import lista_con_delta
+from .pagination import PaginacionKeyset
+from .renderers import CSVRenderer, NDJSONRenderer, StreamingRenderer
+from .serializers import (
+    ProfesorSerializer,
+    CursoSerializer,
+    CursoDetalleSerializer,
+    EstudianteSerializer,
+    EstudianteDetalleSerializer,
+    InscripcionSerializer,
+    InscripcionDetalleSerializer,
+    CalificacionSerializer,
+    CalificacionDetalleSerializer,
+    AsistenciaDetalleSerializer,
+    AsistenciaSerializer,
+)
+from .proyecciones import ListaProyectadaMixin
 
+RENDERERS_EXPORTACION = api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer, CSVRenderer]
 
-class ProfesorViewSet(viewsets.ModelViewSet):
+
+# Columnas de ResumenAsistencia leídas desde una Inscripcion, para conteos_asistencia()
+COLUMNAS_CONTEOS = (
+    'resumen_asistencia__sesiones',
+    'resumen_asistencia__presentes',
+    'resumen_asistencia__justificadas',
+    'resumen_asistencia__ausentes',
+)
+
+
+def conteos_asistencia(sesiones, presentes, justificadas, ausentes):
+    """Conteos precalculados; todos ``None`` si la inscripción aún no tiene resumen."""
+    sesiones, presentes = sesiones or 0, presentes or 0
+    return {
+        'sesiones': sesiones,
+        'presentes': presentes,
+        'justificadas': justificadas or 0,
+        'ausentes': ausentes or 0,
+        'porcentaje_asistencia': ResumenAsistencia.calcular_porcentaje(presentes, sesiones),
+    }
+
+
+# Columnas de Inscripcion para calificacion_inscripcion()
+COLUMNAS_CALIFICACIONES = (
+    'curso_id', 'curso__codigo', 'curso__nombre', 'estado', 'fecha_inscripcion', 'calificacion__valor',
+)
+
+
+def calificacion_inscripcion(curso_id, codigo, nombre, estado, fecha_inscripcion, valor):
+    """Elemento de ``EstudianteViewSet.calificaciones`` a partir de ``COLUMNAS_CALIFICACIONES``."""
+    return {
+        'curso': {'id': curso_id, 'codigo': codigo, 'nombre': nombre},
+        'estado': estado,
+        'fecha_inscripcion': fecha_inscripcion,
+        'calificacion': valor
+    }
+
+
+def fuentes_cursos_profesor(view, pk=None):
+    return [(Curso.objects.filter(profesor_id=pk), ('updated_at', 'profesor__updated_at'))]
+
+
+def fuentes_estudiantes_curso(view, pk=None):
+    return [(
+        Inscripcion.objects.filter(curso_id=pk, estado='ACTIVO'),
+        ('updated_at', 'estudiante__updated_at')
+    )]
+
+
+def fuentes_lista_asistencia(view, pk=None):
+    fecha_str = view.request.query_params.get('fecha', None)
+    try:
+        fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date() if fecha_str else datetime.now().date()
+        asistencias = Asistencia.objects.filter(
+            inscripcion__curso_id=pk,
+            inscripcion__estado='ACTIVO',
+            fecha=fecha
+        )
+    except ValueError:
+        asistencias = Asistencia.objects.none()
+    return fuentes_estudiantes_curso(view, pk) + [(asistencias, ('updated_at',))]
+
+
+def fuentes_resumen_curso(view, pk=None):
+    return [(
+        Inscripcion.objects.filter(curso_id=pk, estado='ACTIVO'),
+        ('updated_at', 'estudiante__updated_at', 'resumen_asistencia__updated_at')
+    )]
+
+
+def fuentes_cursos_estudiante(view, pk=None):
+    return [(
+        Inscripcion.objects.filter(estudiante_id=pk, estado='ACTIVO'),
+        ('updated_at', 'curso__updated_at', 'curso__profesor__updated_at')
+    )]
+
+
+def fuentes_calificaciones_estudiante(view, pk=None):
+    return [
+        (Inscripcion.objects.filter(estudiante_id=pk), ('updated_at', 'curso__updated_at')),
+        (Calificacion.objects.filter(inscripcion__estudiante_id=pk), ('updated_at',)),
+    ]
+
+
+def fuentes_resumen_estudiante(view, pk=None):
+    return [(
+        Inscripcion.objects.filter(estudiante_id=pk),
+        ('updated_at', 'curso__updated_at', 'resumen_asistencia__updated_at')
+    )]
+
+
+def es_id(valor):
+    # int() aceptaría también 1.5, "1" o True
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+def es_lista_de_ids(valor):
+    return isinstance(valor, list) and all(es_id(elemento) for elemento in valor)
+
+
+def respuesta_conflictos(request, indice):
+    """Choques entre los cursos de ``indice`` o, con ``?curso_id=``, los que causaría sumarle ese curso."""
+    curso_id = request.query_params.get('curso_id')
+    if curso_id is None:
+        return Response(horarios.choques_indice(indice))
+    try:
+        curso = Curso.objects.only(*horarios.CAMPOS_FRANJA).get(id=curso_id)
+    except (Curso.DoesNotExist, ValueError):
+        return Response(
+            {"error": "Curso no encontrado"},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(horarios.conflictos_curso(indice, curso))
+
+
+class ProfesorViewSet(ListaProyectadaMixin, viewsets.ModelViewSet):
     queryset = Profesor.objects.all()
     serializer_class = ProfesorSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    proyeccion = proyecciones.PROFESOR
+    filter_backends = [BusquedaTextoFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'apellido', 'email', 'especialidad']
+    busqueda_indices = {'profesor': 'id'}
     ordering_fields = ['apellido', 'nombre', 'fecha_contratacion']
 
+    @respuesta_condicional(condicional.lista())
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @respuesta_condicional(condicional.detalle())
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=True, methods=['get'])
+    @respuesta_condicional(fuentes_cursos_profesor)
+    @cachear_respuesta('profesor:{pk}')
     def cursos(self, request, pk=None):
         profesor = self.get_object()
-        cursos = Curso.objects.filter(profesor=profesor)
-        serializer = CursoSerializer(cursos, many=True)
-        return Response(serializer.data)
+        proyeccion = self.proyeccion_solicitada(proyecciones.CURSO)
+        return Response(proyeccion.datos(Curso.objects.filter(profesor=profesor)))
+
+    @action(detail=True, methods=['get'])
+    def estadisticas_calificaciones(self, request, pk=None):
+        profesor = self.get_object()
+        curso_ids = list(
+            Curso.objects.filter(profesor=profesor).values_list('id', flat=True)
+        )
+        resultados = estadisticas.estadisticas_cursos(curso_ids)
+        return Response([resultados[curso_id] for curso_id in curso_ids if curso_id in resultados])
+
+    @action(detail=True, methods=['get'])
+    def conflictos(self, request, pk=None):
+        profesor = self.get_object()
+        return respuesta_conflictos(request, horarios.indice_profesor(profesor.id))
 
-class CursoViewSet(viewsets.ModelViewSet):
+class CursoViewSet(ListaProyectadaMixin, viewsets.ModelViewSet):
     queryset = Curso.objects.all()
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    proyeccion = proyecciones.CURSO
+    filter_backends = [BusquedaTextoFilter, filters.OrderingFilter]
     search_fields = ['codigo', 'nombre', 'descripcion', 'profesor__nombre', 'profesor__apellido']
+    busqueda_indices = {'curso': 'id'}
     ordering_fields = ['codigo', 'nombre', 'creditos', 'fecha_inicio', 'fecha_fin']
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve' and self.solicitado('profesor_nombre'):
+            queryset = queryset.con_profesor_nombre()
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return CursoDetalleSerializer
         return CursoSerializer
 
+    @respuesta_condicional(condicional.lista('updated_at', 'profesor__updated_at'))
+    @cachear_respuesta('catalogo')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @respuesta_condicional(condicional.detalle('updated_at', 'profesor__updated_at'))
+    @cachear_respuesta('curso:{pk}')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=True, methods=['get'])
+    @respuesta_condicional(fuentes_estudiantes_curso)
     def estudiantes(self, request, pk=None):
         curso = self.get_object()
         inscripciones = Inscripcion.objects.filter(curso=curso, estado='ACTIVO')
-        estudiantes = [inscripcion.estudiante for inscripcion in inscripciones]
-        serializer = EstudianteSerializer(estudiantes, many=True)
-        return Response(serializer.data)
+        proyeccion = self.proyeccion_solicitada(proyecciones.ESTUDIANTE)
+        return Response(proyeccion.datos(inscripciones, prefijo='estudiante__'))
 
     @action(detail=True, methods=['get'])
+    @respuesta_condicional(fuentes_lista_asistencia, con_efectos=True)
     def lista_asistencia(self, request, pk=None):
         curso = self.get_object()
         fecha_str = request.query_params.get('fecha', None)
@@ -57,38 +243,78 @@ class CursoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        inscripciones = Inscripcion.objects.filter(curso=curso, estado='ACTIVO')
-        
-        # Verificar asistencias existentes para esa fecha
-        for inscripcion in inscripciones:
-            Asistencia.objects.get_or_create(
-                inscripcion=inscripcion,
-                fecha=fecha,
-                defaults={'presente': False}
+        inscripciones = list(
+            Inscripcion.objects
+            .filter(curso=curso, estado='ACTIVO')
+            .values_list(
+                'id', 'estudiante_id', 'estudiante__matricula', apellido_nombre('estudiante__')
             )
-            
-        # Obtener asistencias actualizadas
-        asistencias = Asistencia.objects.filter(
+        )
+
+        # Obtener asistencias existentes en una sola consulta
+        asistencias_dia = Asistencia.objects.filter(
             inscripcion__curso=curso,
             inscripcion__estado='ACTIVO',
             fecha=fecha
+        ).values_list('inscripcion_id', 'presente')
+        presentes = dict(asistencias_dia)
+
+        faltantes = [
+            inscripcion_id for inscripcion_id, *_ in inscripciones
+            if inscripcion_id not in presentes
+        ]
+        if faltantes:
+            with transaction.atomic():
+                # Releídas con las inscripciones bloqueadas: otra petición pudo crearlas
+                Inscripcion.bloquear(faltantes)
+                creadas = dict(asistencias_dia.filter(inscripcion_id__in=faltantes))
+                presentes.update(creadas)
+                faltantes = [inscripcion_id for inscripcion_id in faltantes if inscripcion_id not in creadas]
+                # Crear en un solo INSERT las asistencias que falten para esa fecha
+                Asistencia.objects.bulk_create(
+                    [
+                        Asistencia(inscripcion_id=inscripcion_id, fecha=fecha, presente=False)
+                        for inscripcion_id in faltantes
+                    ],
+                    ignore_conflicts=True
+                )
+                ResumenAsistencia.aplicar_cambios(
+                    (inscripcion_id, None, 'ausente') for inscripcion_id in faltantes
+                )
+
+        # Filas en el orden de campos de ListaAsistenciaSerializer
+        filas = [
+            (estudiante_id, matricula, nombre, presentes.get(inscripcion_id, False))
+            for inscripcion_id, estudiante_id, matricula, nombre in inscripciones
+        ]
+        return Response(proyecciones.LISTA_ASISTENCIA.serializar(filas))
+
+    @action(detail=True, methods=['get'])
+    def estadisticas_calificaciones(self, request, pk=None):
+        curso = self.get_object()
+        return Response(estadisticas.estadisticas_cursos([curso.id])[curso.id])
+
+    @action(detail=True, methods=['get'])
+    @respuesta_condicional(fuentes_resumen_curso)
+    def resumen_asistencia(self, request, pk=None):
+        curso = self.get_object()
+        inscripciones = Inscripcion.objects.filter(
+            curso=curso,
+            estado='ACTIVO'
+        ).values_list(
+            'estudiante_id', 'estudiante__matricula', apellido_nombre('estudiante__'),
+            *COLUMNAS_CONTEOS
         )
-        
-        data = []
-        for inscripcion in inscripciones:
-            try:
-                asistencia = asistencias.get(inscripcion=inscripcion)
-                presente = asistencia.presente
-            except Asistencia.DoesNotExist:
-                presente = False
-                
-            data.append({
-                'estudiante': inscripcion.estudiante,
-                'presente': presente
-            })
-            
-        serializer = ListaAsistenciaSerializer(data, many=True)
-        return Response(serializer.data)
+        data = [
+            {
+                'estudiante_id': estudiante_id,
+                'matricula': matricula,
+                'nombre': nombre,
+                **conteos_asistencia(*conteos)
+            }
+            for estudiante_id, matricula, nombre, *conteos in inscripciones
+        ]
+        return Response(data)
 
     @action(detail=True, methods=['post'])
     def registrar_asistencia(self, request, pk=None):
@@ -106,111 +332,215 @@ class CursoViewSet(viewsets.ModelViewSet):
                 {"error": "Formato de fecha inválido. Use YYYY-MM-DD"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
-        actualizados = 0
+        if not isinstance(asistencias, list) or not all(isinstance(dato, dict) for dato in asistencias):
+            return Response(
+                {"error": "asistencias debe ser una lista de objetos"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         errores = []
-        
+
+        # Resolver todas las inscripciones activas del lote en una sola consulta
+        estudiante_ids = {
+            asistencia_data.get('estudiante_id') for asistencia_data in asistencias
+            if es_id(asistencia_data.get('estudiante_id'))
+        }
+        inscripciones = dict(
+            Inscripcion.objects.filter(
+                curso=curso,
+                estado='ACTIVO',
+                estudiante_id__in=estudiante_ids
+            ).values_list('estudiante_id', 'id')
+        )
+
+        # Cada registro puede traer su propia fecha para sincronizar varios días;
+        # si un estudiante se repite para la misma fecha, vale el último
+        registros = {}
         for asistencia_data in asistencias:
             estudiante_id = asistencia_data.get('estudiante_id')
-            presente = asistencia_data.get('presente', False)
-            justificada = asistencia_data.get('justificada', False)
-            observaciones = asistencia_data.get('observaciones', '')
-            
+            if not es_id(estudiante_id):
+                errores.append(f"El ID de estudiante {estudiante_id!r} no es un entero")
+                continue
+            fecha_registro = fecha
+            if asistencia_data.get('fecha'):
+                try:
+                    fecha_registro = datetime.strptime(asistencia_data['fecha'], '%Y-%m-%d').date()
+                except (TypeError, ValueError):
+                    errores.append(
+                        f"Formato de fecha inválido para el estudiante con ID {estudiante_id}. Use YYYY-MM-DD"
+                    )
+                    continue
+
             try:
-                inscripcion = Inscripcion.objects.get(
-                    estudiante_id=estudiante_id,
-                    curso=curso,
-                    estado='ACTIVO'
-                )
-                
-                asistencia, created = Asistencia.objects.update_or_create(
-                    inscripcion=inscripcion,
-                    fecha=fecha,
-                    defaults={
-                        'presente': presente,
-                        'justificada': justificada,
-                        'observaciones': observaciones
-                    }
-                )
-                actualizados += 1
-                
-            except Inscripcion.DoesNotExist:
+                inscripcion_id = inscripciones[estudiante_id]
+            except KeyError:
                 errores.append(f"El estudiante con ID {estudiante_id} no está inscrito en este curso")
+                continue
+
+            registros[(inscripcion_id, fecha_registro)] = Asistencia(
+                inscripcion_id=inscripcion_id,
+                fecha=fecha_registro,
+                presente=asistencia_data.get('presente', False),
+                justificada=asistencia_data.get('justificada', False),
+                observaciones=asistencia_data.get('observaciones', '')
+            )
+
+        with transaction.atomic():
+            Inscripcion.bloquear({clave[0] for clave in registros})
+            # Estado previo de los registros afectados, para actualizar el resumen
+            anteriores = {
+                (inscripcion_id, fecha_registro): Asistencia.categoria_de(presente, justificada)
+                for inscripcion_id, fecha_registro, presente, justificada in
+                Asistencia.objects.filter(
+                    inscripcion_id__in={clave[0] for clave in registros},
+                    fecha__in={clave[1] for clave in registros}
+                ).values_list('inscripcion_id', 'fecha', 'presente', 'justificada')
+            } if registros else {}
+
+            Asistencia.objects.bulk_create(
+                registros.values(),
+                update_conflicts=True,
+                unique_fields=['inscripcion', 'fecha'],
+                update_fields=['presente', 'justificada', 'observaciones', 'updated_at']
+            )
+            ResumenAsistencia.aplicar_cambios(
+                (clave[0], anteriores.get(clave), asistencia.categoria)
+                for clave, asistencia in registros.items()
+            )
+            estudiante_por_inscripcion = {
+                inscripcion_id: estudiante_id for estudiante_id, inscripcion_id in inscripciones.items()
+            }
+            en_vivo.publicar(
+                (curso.id, clave[1], estudiante_por_inscripcion[clave[0]], asistencia.presente, asistencia.justificada)
+                for clave, asistencia in registros.items()
+            )
         
         return Response({
-            "actualizados": actualizados,
+            "actualizados": len(registros),
             "errores": errores
         })
 
-class EstudianteViewSet(viewsets.ModelViewSet):
+class EstudianteViewSet(ListaProyectadaMixin, viewsets.ModelViewSet):
     queryset = Estudiante.objects.all()
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    proyeccion = proyecciones.ESTUDIANTE
+    filter_backends = [BusquedaTextoFilter, filters.OrderingFilter]
     search_fields = ['matricula', 'nombre', 'apellido', 'email']
+    busqueda_indices = {'estudiante': 'id'}
     ordering_fields = ['apellido', 'nombre', 'matricula', 'fecha_ingreso']
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve' and self.solicitado('cursos_inscritos'):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'inscripciones',
+                    queryset=Inscripcion.objects.filter(estado='ACTIVO').select_related('curso__profesor'),
+                    to_attr='inscripciones_activas'
+                )
+            )
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return EstudianteDetalleSerializer
         return EstudianteSerializer
 
+    @respuesta_condicional(condicional.lista())
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @respuesta_condicional(condicional.detalle(
+        'updated_at', 'inscripciones__updated_at',
+        'inscripciones__curso__updated_at', 'inscripciones__curso__profesor__updated_at'
+    ))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=True, methods=['get'])
+    @respuesta_condicional(fuentes_cursos_estudiante)
     def cursos(self, request, pk=None):
         estudiante = self.get_object()
         inscripciones = Inscripcion.objects.filter(estudiante=estudiante, estado='ACTIVO')
-        cursos = [inscripcion.curso for inscripcion in inscripciones]
-        serializer = CursoSerializer(cursos, many=True)
-        return Response(serializer.data)
+        proyeccion = self.proyeccion_solicitada(proyecciones.CURSO)
+        return Response(proyeccion.datos(inscripciones, prefijo='curso__'))
         
     @action(detail=True, methods=['get'])
+    @respuesta_condicional(fuentes_calificaciones_estudiante)
     def calificaciones(self, request, pk=None):
         estudiante = self.get_object()
-        inscripciones = Inscripcion.objects.filter(estudiante=estudiante)
-        data = []
+        inscripciones = Inscripcion.objects.filter(
+            estudiante=estudiante
+        ).values_list(*COLUMNAS_CALIFICACIONES)
+        return Response([calificacion_inscripcion(*fila) for fila in inscripciones])
         
-        for inscripcion in inscripciones:
-            try:
-                calificacion = inscripcion.calificacion
-                valor = calificacion.valor
-            except Calificacion.DoesNotExist:
-                valor = None
-                
-            data.append({
-                'curso': {
-                    'id': inscripcion.curso.id,
-                    'codigo': inscripcion.curso.codigo,
-                    'nombre': inscripcion.curso.nombre,
-                },
-                'estado': inscripcion.estado,
-                'fecha_inscripcion': inscripcion.fecha_inscripcion,
-                'calificacion': valor
-            })
-                
+    @action(detail=True, methods=['get'])
+    @respuesta_condicional(fuentes_resumen_estudiante)
+    def resumen_asistencia(self, request, pk=None):
+        estudiante = self.get_object()
+        inscripciones = Inscripcion.objects.filter(
+            estudiante=estudiante
+        ).values_list('curso_id', 'curso__codigo', 'curso__nombre', 'estado', *COLUMNAS_CONTEOS)
+        data = [
+            {
+                'curso': {'id': curso_id, 'codigo': codigo, 'nombre': nombre},
+                'estado': estado,
+                **conteos_asistencia(*conteos)
+            }
+            for curso_id, codigo, nombre, estado, *conteos in inscripciones
+        ]
         return Response(data)
-        
+
     @action(detail=True, methods=['get'])
+    @respuesta_condicional(fuentes_cursos_estudiante)
+    @cachear_respuesta('estudiante:{pk}')
     def horario(self, request, pk=None):
         estudiante = self.get_object()
-        inscripciones = Inscripcion.objects.filter(
-            estudiante=estudiante,
-            estado='ACTIVO'
-        )
-        serializer = HorarioEstudianteSerializer(inscripciones, many=True)
-        return Response(serializer.data)
+        inscripciones = Inscripcion.objects.filter(estudiante=estudiante, estado='ACTIVO')
+        proyeccion = self.proyeccion_solicitada(proyecciones.HORARIO)
+        return Response(proyeccion.datos(inscripciones))
+
+    @action(detail=True, methods=['get'])
+    def conflictos(self, request, pk=None):
+        estudiante = self.get_object()
+        return respuesta_conflictos(request, horarios.indice_estudiante(estudiante.id))
 
-class InscripcionViewSet(viewsets.ModelViewSet):
+class InscripcionViewSet(ListaProyectadaMixin, viewsets.ModelViewSet):
     queryset = Inscripcion.objects.all()
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    proyeccion = proyecciones.INSCRIPCION
+    filter_backends = [BusquedaTextoFilter, filters.OrderingFilter]
     search_fields = [
         'estudiante__nombre', 'estudiante__apellido', 'estudiante__matricula',
         'curso__codigo', 'curso__nombre'
     ]
+    busqueda_indices = {'estudiante': 'estudiante_id', 'curso': 'curso_id'}
     ordering_fields = ['fecha_inscripcion', 'estado']
+    pagination_class = PaginacionKeyset
+    cursor_ordering = ('-fecha_inscripcion', '-id')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.con_detalle(self.campos_solicitados())
+        elif self.action == 'dar_baja':
+            queryset = queryset.con_detalle()
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return InscripcionDetalleSerializer
         return InscripcionSerializer
 
+    @respuesta_condicional(condicional.lista())
+    @lista_con_delta
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @respuesta_condicional(condicional.detalle(
+        'updated_at', 'estudiante__updated_at', 'curso__updated_at', 'calificacion__updated_at'
+    ))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=['post'])
     def inscribir_estudiante(self, request):
         estudiante_id = request.data.get('estudiante_id')
@@ -236,24 +566,29 @@ class InscripcionViewSet(viewsets.ModelViewSet):
                     {"error": "El estudiante ya está inscrito en este curso"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-                
-            # Verificar cupo disponible
-            inscritos_activos = Inscripcion.objects.filter(
-                curso=curso, 
-                estado='ACTIVO'
-            ).count()
-            
-            if inscritos_activos >= curso.cupo_maximo:
-                return Response(
-                    {"error": "El curso ha alcanzado su cupo máximo"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-                
-            inscripcion = Inscripcion.objects.create(
-                estudiante=estudiante,
-                curso=curso,
-                estado='ACTIVO'
-            )
+
+            with transaction.atomic():
+                # El horario se comprueba con el estudiante bloqueado y en la misma transacción que inscribe
+                indice = horarios.indices_bloqueados('estudiante', [estudiante.id])[estudiante.id]
+                conflictos = indice.conflictos(horarios.franja_curso(curso))
+                if conflictos:
+                    return Response(
+                        {"error": horarios.mensaje(conflictos)},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                # Verificar cupo disponible: la reserva es un UPDATE condicional atómico
+                try:
+                    inscripcion = Inscripcion.objects.create(
+                        estudiante=estudiante,
+                        curso=curso,
+                        estado='ACTIVO'
+                    )
+                except CupoAgotado:
+                    return Response(
+                        {"error": "El curso ha alcanzado su cupo máximo"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
             
             serializer = InscripcionDetalleSerializer(inscripcion)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -269,37 +604,225 @@ class InscripcionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+    @action(detail=False, methods=['post'])
+    def inscribir_lote(self, request):
+        """Inscribe muchos pares (estudiante, curso) validando el lote completo de una vez.
+
+        Acepta ``inscripciones`` (lista de ``{estudiante_id, curso_id}``) o bien
+        ``estudiante_ids`` y ``curso_ids`` para inscribir a todos en todos.
+        Con ``dry_run`` solo valida y no escribe nada.
+        """
+        pares = []
+        if 'inscripciones' in request.data:
+            inscripciones = request.data.get('inscripciones')
+            if not isinstance(inscripciones, list):
+                return Response(
+                    {"error": "inscripciones debe ser una lista"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            for par in inscripciones:
+                if isinstance(par, dict):
+                    pares.append((par.get('estudiante_id'), par.get('curso_id')))
+                else:
+                    pares.append((None, None))
+        else:
+            estudiante_ids = request.data.get('estudiante_ids', [])
+            curso_ids = request.data.get('curso_ids', [])
+            # Un texto se recorrería carácter por carácter
+            if not (es_lista_de_ids(estudiante_ids) and es_lista_de_ids(curso_ids)):
+                return Response(
+                    {"error": "estudiante_ids y curso_ids deben ser listas de enteros"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            pares = [
+                (estudiante_id, curso_id)
+                for curso_id in curso_ids
+                for estudiante_id in estudiante_ids
+            ]
+
+        if not pares:
+            return Response(
+                {"error": "Se requiere inscripciones o estudiante_ids y curso_ids"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        dry_run = str(request.data.get('dry_run', False)).lower() in ('true', '1')
+
+        resultados = []
+        for estudiante_id, curso_id in pares:
+            resultado = {"estudiante_id": estudiante_id, "curso_id": curso_id}
+            try:
+                resultado["estudiante_id"] = int(estudiante_id)
+                resultado["curso_id"] = int(curso_id)
+            except (TypeError, ValueError):
+                resultado["error"] = "Se requieren estudiante_id y curso_id"
+            resultados.append(resultado)
+
+        validos = [r for r in resultados if "error" not in r]
+        estudiante_ids = {r["estudiante_id"] for r in validos}
+        curso_ids = {r["curso_id"] for r in validos}
+
+        # Consultas agrupadas para todo el lote
+        estudiantes = set(
+            Estudiante.objects.filter(id__in=estudiante_ids).values_list('id', flat=True)
+        )
+        cupos = {}
+        franjas = {}
+        for curso_id, cupo_maximo, inscritos_activos, *campos in Curso.objects.filter(
+            id__in=curso_ids
+        ).values_list('id', 'cupo_maximo', 'inscritos_activos', *horarios.CAMPOS_FRANJA):
+            cupos[curso_id] = cupo_maximo - inscritos_activos
+            franjas[curso_id] = horarios.Franja(*campos)
+        # Los aceptados se suman al índice para detectar choques dentro del propio lote
+        indices = horarios.indices('estudiante', estudiantes)
+        existentes = {
+            (estudiante_id, curso_id): estado
+            for estudiante_id, curso_id, estado in Inscripcion.objects.filter(
+                estudiante_id__in=estudiante_ids,
+                curso_id__in=curso_ids
+            ).values_list('estudiante_id', 'curso_id', 'estado')
+        }
+
+        vistos = set()
+        por_curso = {}
+        for resultado in validos:
+            clave = (resultado["estudiante_id"], resultado["curso_id"])
+            if clave[0] not in estudiantes:
+                resultado["error"] = "Estudiante no encontrado"
+            elif clave[1] not in cupos:
+                resultado["error"] = "Curso no encontrado"
+            elif clave in vistos:
+                resultado["error"] = "Par repetido en el lote"
+            elif existentes.get(clave) in ('ACTIVO', 'COMPLETO'):
+                resultado["error"] = "El estudiante ya está inscrito en este curso"
+            elif clave in existentes:
+                resultado["error"] = "El estudiante tiene una inscripción dada de baja en este curso"
+            elif cupos[clave[1]] <= 0:
+                resultado["error"] = "El curso ha alcanzado su cupo máximo"
+            else:
+                conflictos = indices[clave[0]].conflictos(franjas[clave[1]])
+                if conflictos:
+                    resultado["error"] = horarios.mensaje(conflictos)
+                else:
+                    cupos[clave[1]] -= 1
+                    indices[clave[0]].agregar(franjas[clave[1]])
+                    por_curso.setdefault(clave[1], []).append(resultado)
+            vistos.add(clave)
+
+        if not dry_run and por_curso:
+            try:
+                with transaction.atomic():
+                    # Con los estudiantes bloqueados, los choques se vuelven a comprobar contra la base:
+                    # otra petición pudo inscribirlos después de leer el índice en caché
+                    bloqueados = horarios.indices_bloqueados('estudiante', (
+                        resultado["estudiante_id"] for aceptados in por_curso.values() for resultado in aceptados
+                    ))
+                    for curso_id, aceptados in por_curso.items():
+                        for resultado in aceptados:
+                            conflictos = bloqueados[resultado["estudiante_id"]].conflictos(franjas[curso_id])
+                            if conflictos:
+                                resultado["error"] = horarios.mensaje(conflictos)
+                        aceptados[:] = [resultado for resultado in aceptados if "error" not in resultado]
+
+                    nuevas = []
+                    for curso_id, aceptados in por_curso.items():
+                        if not aceptados:
+                            continue
+                        # Si otra petición ocupó lugares entretanto, el curso completo falla
+                        if not Curso.reservar_cupos(curso_id, len(aceptados)):
+                            for resultado in aceptados:
+                                resultado["error"] = "El curso ha alcanzado su cupo máximo"
+                            continue
+                        nuevas.extend(
+                            (resultado, Inscripcion(
+                                estudiante_id=resultado["estudiante_id"],
+                                curso_id=curso_id,
+                                estado='ACTIVO'
+                            ))
+                            for resultado in aceptados
+                        )
+                    Inscripcion.objects.bulk_create([inscripcion for _, inscripcion in nuevas])
+            except IntegrityError:
+                return Response(
+                    {"error": "Otra petición inscribió a alguno de los estudiantes; reintente el lote"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            for resultado, inscripcion in nuevas:
+                resultado["inscripcion_id"] = inscripcion.pk
+            # bulk_create no emite señales: invalidar la caché explícitamente
+            cache_respuestas.invalidar(
+                'catalogo',
+                *(f'curso:{curso_id}' for curso_id in por_curso),
+                *(f'profesor:{profesor_id}' for profesor_id in Curso.objects.filter(
+                    id__in=por_curso,
+                    profesor__isnull=False
+                ).values_list('profesor_id', flat=True)),
+                *(f'estudiante:{inscripcion.estudiante_id}' for _, inscripcion in nuevas)
+            )
+            horarios.invalidar('estudiante', *(inscripcion.estudiante_id for _, inscripcion in nuevas))
+
+        for resultado in resultados:
+            resultado["ok"] = "error" not in resultado
+
+        return Response({
+            "dry_run": dry_run,
+            "inscritos": sum(resultado["ok"] for resultado in resultados),
+            "resultados": resultados
+        })
+
     @action(detail=True, methods=['post'])
     def dar_baja(self, request, pk=None):
         inscripcion = self.get_object()
         
-        if inscripcion.estado != 'ACTIVO':
+        # La transición se decide en la base: dos bajas simultáneas liberan un solo lugar
+        if not inscripcion.dar_baja():
             return Response(
                 {"error": "La inscripción no está activa"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
-        inscripcion.estado = 'BAJA'
-        inscripcion.save()
         
         serializer = InscripcionDetalleSerializer(inscripcion)
         return Response(serializer.data)
 
-class CalificacionViewSet(viewsets.ModelViewSet):
+class CalificacionViewSet(ListaProyectadaMixin, viewsets.ModelViewSet):
     queryset = Calificacion.objects.all()
     serializer_class = CalificacionSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    proyeccion = proyecciones.CALIFICACION
+    filter_backends = [BusquedaTextoFilter, filters.OrderingFilter]
     search_fields = [
         'inscripcion__estudiante__nombre', 'inscripcion__estudiante__apellido',
         'inscripcion__curso__codigo', 'inscripcion__curso__nombre'
     ]
+    busqueda_indices = {'estudiante': 'inscripcion__estudiante_id', 'curso': 'inscripcion__curso_id'}
     ordering_fields = ['fecha_registro', 'valor']
+    pagination_class = PaginacionKeyset
+    cursor_ordering = ('-fecha_registro', '-id')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.con_detalle(self.campos_solicitados())
+        elif self.action in ('update', 'partial_update', 'destroy'):
+            # La señal de estadísticas necesita el curso de la inscripción
+            queryset = queryset.select_related('inscripcion')
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return CalificacionDetalleSerializer
         return CalificacionSerializer
 
+    @respuesta_condicional(condicional.lista())
+    @lista_con_delta
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @respuesta_condicional(condicional.detalle(
+        'updated_at', 'inscripcion__estudiante__updated_at', 'inscripcion__curso__updated_at'
+    ))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=['post'])
     def registrar_calificacion(self, request):
         inscripcion_id = request.data.get('inscripcion_id')
@@ -322,7 +845,8 @@ class CalificacionViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
                 
-            calificacion, created = Calificacion.objects.update_or_create(
+            # Con la inscripción cargada, la señal de estadísticas no la vuelve a leer
+            calificacion, created = Calificacion.objects.select_related('inscripcion').update_or_create(
                 inscripcion=inscripcion,
                 defaults={
                     'valor': valor,
@@ -344,22 +868,110 @@ class CalificacionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class AsistenciaViewSet(viewsets.ModelViewSet):
+class AsistenciaViewSet(ListaProyectadaMixin, viewsets.ModelViewSet):
     queryset = Asistencia.objects.all()
     serializer_class = AsistenciaSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    proyeccion = proyecciones.ASISTENCIA
+    filter_backends = [BusquedaTextoFilter, filters.OrderingFilter]
     search_fields = [
         'inscripcion__estudiante__nombre', 'inscripcion__estudiante__apellido',
         'inscripcion__curso__codigo', 'inscripcion__curso__nombre'
     ]
+    busqueda_indices = {'estudiante': 'inscripcion__estudiante_id', 'curso': 'inscripcion__curso_id'}
     ordering_fields = ['fecha', 'presente']
+    pagination_class = PaginacionKeyset
+    cursor_ordering = ('-fecha', '-id')
+    campos_exportacion = (
+        'id', 'estudiante_nombre', 'curso_nombre', 'fecha',
+        'presente', 'justificada', 'observaciones', 'inscripcion'
+    )
+    chunk_size_exportacion = 2000
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.con_detalle(self.campos_solicitados())
+        return queryset
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return AsistenciaDetalleSerializer
         return AsistenciaSerializer
 
-    @action(detail=False, methods=['get'])
+    @respuesta_condicional(condicional.lista())
+    @lista_con_delta
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @respuesta_condicional(condicional.detalle(
+        'updated_at', 'inscripcion__estudiante__updated_at', 'inscripcion__curso__updated_at'
+    ))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        Inscripcion.bloquear([serializer.validated_data['inscripcion'].id])
+        asistencia = serializer.save()
+        ResumenAsistencia.aplicar_cambios([
+            (asistencia.inscripcion_id, None, asistencia.categoria)
+        ])
+        en_vivo.publicar_asistencia(asistencia)
+
+    def _releer_bloqueada(self, asistencia, *inscripcion_ids):
+        """Estado vigente de ``asistencia`` con sus inscripciones bloqueadas; 404 si ya no existe."""
+        Inscripcion.bloquear({asistencia.inscripcion_id, *inscripcion_ids})
+        vigente = Asistencia.objects.filter(pk=asistencia.pk).values_list(
+            'inscripcion_id', 'fecha', 'presente', 'justificada'
+        ).first()
+        if vigente is None:
+            raise Http404
+        return vigente
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        nueva = serializer.validated_data.get('inscripcion')
+        inscripcion_id, fecha, presente, justificada = self._releer_bloqueada(
+            serializer.instance, *([nueva.id] if nueva is not None else [])
+        )
+        anterior = (inscripcion_id, Asistencia.categoria_de(presente, justificada))
+        sesion_anterior = (inscripcion_id, fecha)
+        asistencia = serializer.save()
+        if anterior[0] == asistencia.inscripcion_id:
+            cambios = [(asistencia.inscripcion_id, anterior[1], asistencia.categoria)]
+        else:
+            cambios = [
+                (anterior[0], anterior[1], None),
+                (asistencia.inscripcion_id, None, asistencia.categoria),
+            ]
+        ResumenAsistencia.aplicar_cambios(cambios)
+        en_vivo.publicar_asistencia(asistencia, anterior=sesion_anterior)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        inscripcion_id, _, presente, justificada = self._releer_bloqueada(instance)
+        ResumenAsistencia.aplicar_cambios([
+            (inscripcion_id, Asistencia.categoria_de(presente, justificada), None)
+        ])
+        en_vivo.publicar_asistencia(anterior=(instance.inscripcion_id, instance.fecha))
+        instance.delete()
+
+    def _respuesta_asistencias(self, request, queryset, nombre_archivo):
+        renderer = request.accepted_renderer
+        if isinstance(renderer, StreamingRenderer):
+            # Proyección con values() leída por bloques: memoria constante
+            filas = queryset.values(*self.campos_exportacion)
+            if isinstance(request._request, ASGIRequest):
+                # Bajo ASGI un iterador síncrono se consumiría entero antes de
+                # enviar nada; con aiterator cada bloque se lee al enviarse
+                filas = filas.aiterator(chunk_size=self.chunk_size_exportacion)
+            else:
+                filas = filas.iterator(chunk_size=self.chunk_size_exportacion)
+            return renderer.streaming_response(filas, self.campos_exportacion, nombre_archivo)
+        proyeccion = self.proyeccion_solicitada(proyecciones.ASISTENCIA_DETALLE)
+        return Response(proyeccion.datos(queryset))
+
+    @action(detail=False, methods=['get'], renderer_classes=RENDERERS_EXPORTACION)
     def por_curso(self, request):
         curso_id = request.query_params.get('curso_id')
         fecha_inicio = request.query_params.get('fecha_inicio')
@@ -373,7 +985,7 @@ class AsistenciaViewSet(viewsets.ModelViewSet):
             
         try:
             curso = Curso.objects.get(id=curso_id)
-            queryset = Asistencia.objects.filter(inscripcion__curso=curso)
+            queryset = Asistencia.objects.filter(inscripcion__curso=curso).con_detalle()
             
             if fecha_inicio:
                 try:
@@ -395,8 +1007,7 @@ class AsistenciaViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_400_BAD_REQUEST
                     )
                     
-            serializer = AsistenciaDetalleSerializer(queryset, many=True)
-            return Response(serializer.data)
+            return self._respuesta_asistencias(request, queryset, f'asistencias_curso_{curso.id}')
             
         except Curso.DoesNotExist:
             return Response(
@@ -404,7 +1015,7 @@ class AsistenciaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], renderer_classes=RENDERERS_EXPORTACION)
     def por_estudiante(self, request):
         estudiante_id = request.query_params.get('estudiante_id')
         curso_id = request.query_params.get('curso_id')
@@ -417,7 +1028,7 @@ class AsistenciaViewSet(viewsets.ModelViewSet):
             
         try:
             estudiante = Estudiante.objects.get(id=estudiante_id)
-            queryset = Asistencia.objects.filter(inscripcion__estudiante=estudiante)
+            queryset = Asistencia.objects.filter(inscripcion__estudiante=estudiante).con_detalle()
             
             if curso_id:
                 try:
@@ -429,8 +1040,9 @@ class AsistenciaViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_404_NOT_FOUND
                     )
                     
-            serializer = AsistenciaDetalleSerializer(queryset, many=True)
-            return Response(serializer.data)
+            return self._respuesta_asistencias(
+                request, queryset, f'asistencias_estudiante_{estudiante.id}'
+            )
             
         except Estudiante.DoesNotExist:
             return Response(